@@ -1,15 +1,25 @@
+import json
+import numpy as np
 import pandas as pd
 import config
 import openai
 import utils
+import keyword_matcher
+import price_window
+
+# LLM 뉴스 점수(-1 ~ 1)에 곱하는 가중치
+LLM_NEWS_WEIGHT = 5
 
 class Analyzer:
-    def __init__(self):
-        pass
+    def __init__(self, news_store=None):
+        self.news_store = news_store # 있으면 기사(링크)별 점수를 저장해 두고 새 기사만 분석 (없으면 매번 LLM 호출)
+        self.llm_client = None
+        self.keyword_matcher = keyword_matcher.KeywordMatcher() # 키워드 설정으로 한 번만 생성
 
     def analyze_coupling(self, us_data, sector_mapping):
         """
         미국 주식 등락률을 기반으로 한국 관련주에 가점을 부여합니다.
+        (COUPLING_MODE='mapping'일 때 사용, 기본은 coupling.CouplingEngine의 상관/베타 행렬)
         """
         scores = {}
         for us_ticker, data in us_data.items():
@@ -41,120 +51,351 @@ class Analyzer:
 
         return scores
 
-    def analyze_news_llm(self, titles):
+    def get_llm_client(self):
+        """
+        OpenAI 클라이언트를 한 번만 만들어 재사용합니다. (키가 없으면 None)
+        """
+        if not config.OPENAI_API_KEY or config.OPENAI_API_KEY == "YOUR_OPENAI_API_KEY_HERE":
+            return None # 키가 없으면 키워드 분석으로 fallback
+        if self.llm_client is None:
+            self.llm_client = openai.OpenAI(
+                api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_BASE_URL, timeout=config.LLM_TIMEOUT
+            )
+        return self.llm_client
+
+    def analyze_news_llm(self, titles, links=None):
         """
         OpenAI API를 사용하여 뉴스 제목의 감성을 분석하고 요약합니다.
         Returns: (score, reason)
         """
         if not titles:
             return None, None
-            
-        try:
-            if config.OPENAI_API_KEY == "YOUR_OPENAI_API_KEY_HERE":
-                return None, None # 키가 없으면 키워드 분석으로 fallback
+        return self.analyze_news_llm_batch({0: titles}, {0: links} if links else None).get(0, (None, None))
 
-            client = openai.OpenAI(api_key=config.OPENAI_API_KEY)
-            
+    def analyze_news_llm_batch(self, news_by_stock, links_by_stock=None):
+        """
+        여러 종목의 뉴스 감성을 기사 단위로 한꺼번에 분석합니다.
+        기사 인덱스(news_store)에 같은 모델로 LLM_CACHE_TTL_HOURS 안에 분석한 점수가 있는 기사는 그대로 쓰고, 나머지만 묶어서
+        LLM_ARTICLE_BATCH_SIZE개씩 한 번의 프롬프트로 요청합니다. (링크가 없으면 제목을 기사 키로 사용, 저장하지 않음)
+        종목 점수는 기사 점수의 평균, 사유는 점수가 가장 극단적인 기사의 요약을 사용합니다.
+        news_by_stock: {종목: titles}, links_by_stock: {종목: links}
+        Returns: {종목: (score, reason)} - 뉴스가 없거나 분석에 실패한 종목은 제외
+        """
+        model = config.OPENAI_MODEL
+        links_by_stock = links_by_stock or {}
+        articles = {} # 기사 키(링크) -> 제목 (여러 종목에 나온 기사는 한 번만)
+        keys_by_stock = {}
+        for stock, titles in news_by_stock.items():
+            keys = links_by_stock.get(stock) or titles
+            keys_by_stock[stock] = [key for key, title in zip(keys, titles)]
+            articles.update(zip(keys, titles))
+        linked = {link for stock, links in links_by_stock.items() if stock in news_by_stock for link in links or []}
+
+        scores = self.news_store.get_llm_scores(linked, model) if self.news_store else {}
+        missing = [(key, title) for key, title in articles.items() if key not in scores]
+        utils.count("cache.llm_article.hit", len(articles) - len(missing))
+        utils.count("cache.llm_article.miss", len(missing))
+        client = self.get_llm_client()
+        if missing and client is not None:
+            # 기사마다 응답 한 줄(~100토큰)이 필요하므로 응답 토큰 한도 안에 들어가도록 나눠서 요청
+            batch_size = config.LLM_ARTICLE_BATCH_SIZE
+            fresh = {}
+            for i in range(0, len(missing), batch_size):
+                fresh.update(self._request_news_llm(client, model, missing[i:i + batch_size]))
+            if self.news_store:
+                self.news_store.save_llm_scores(model, {key: fresh[key] for key in fresh if key in linked})
+            scores.update(fresh)
+            utils.log_info(f"LLM article analysis: {len(articles) - len(missing)} indexed, {len(fresh)}/{len(missing)} requested")
+
+        results = {}
+        for stock, keys in keys_by_stock.items():
+            article_scores = [scores[key] for key in keys if key in scores]
+            if not article_scores:
+                continue
+            mean_score = sum(score for score, reason in article_scores) / len(article_scores)
+            reason = max(article_scores, key=lambda item: abs(item[0]))[1]
+            results[stock] = (mean_score, reason)
+        return results
+
+    @utils.timed("http.openai")
+    def _request_news_llm(self, client, model, items):
+        """
+        기사 items: [(key, title)] 를 한 번의 프롬프트로 분석합니다.
+        Returns: {key: (score, reason)}
+        """
+        try:
+            news_blocks = "\n".join(f"[{i}] {title}" for i, (key, title) in enumerate(items, 1))
             prompt = f"""
-            다음 뉴스 제목들을 보고 해당 주식에 대한 호재/악재 여부를 평가해줘.
+            다음은 주식 관련 최근 뉴스 기사 제목들이야. 기사(번호)마다 해당 종목에 호재/악재인지 평가해줘.
             
             [응답 형식]
-            점수 | 한줄요약
+            아래 형식의 JSON 객체 하나만 출력:
+            {{"results": [{{"id": 번호, "score": 점수, "reason": "한줄요약"}}]}}
             
             [규칙]
             1. 점수는 -1 (악재) ~ 1 (호재) 사이의 소수점 숫자.
-            2. 한줄요약은 뉴스 내용을 종합해서 "왜" 높은/낮은 점수를 줬는지 한국어로 설명 (50자 이내).
-            3. 구분자는 파이프(|) 기호 사용.
+            2. 한줄요약은 기사 제목을 바탕으로 "왜" 높은/낮은 점수를 줬는지 한국어로 설명 (50자 이내).
+            3. 모든 기사 번호에 대해 하나씩 응답.
             
             [뉴스 제목들]
-            {chr(10).join(titles)}
+            {news_blocks}
             """
             
+            utils.count("http.openai")
             response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=model,
                 messages=[{"role": "user", "content": prompt}],
-                max_tokens=100,
+                max_tokens=min(100 * len(items), config.LLM_MAX_OUTPUT_TOKENS), # 모델 완성 토큰 한도
                 temperature=0
             )
             
             content = response.choices[0].message.content.strip()
             
-            # 파싱
-            if "|" in content:
-                parts = content.split("|")
-                score_str = parts[0].strip()
-                reason_str = parts[1].strip()
-                return float(score_str), reason_str
-            else:
-                # 형식이 안 맞을 경우 점수만이라도 시도
-                return float(content), "AI 분석 완료"
+            # 파싱 (코드 블록 등으로 감싸져 있어도 JSON 부분만 사용)
+            parsed = json.loads(content[content.index("{"):content.rindex("}") + 1])
+            results = {}
+            for entry in parsed.get("results", []):
+                try:
+                    key = items[int(entry["id"]) - 1][0]
+                    score = max(-1.0, min(1.0, float(entry["score"]))) # 점수 상한(max_news_score) 유지
+                except (KeyError, IndexError, TypeError, ValueError):
+                    continue
+                results[key] = (score, str(entry.get("reason") or "AI 분석 완료"))
+            return results
             
         except Exception as e:
             utils.log_error(f"LLM Analysis Error: {e}")
-            return None, None
+            return {}
 
-    def analyze_news(self, titles):
+    def analyze_news(self, titles, links=None):
         """
         뉴스 제목에서 키워드를 찾아 점수를 매깁니다.
+        (한 제목에 여러 키워드가 있어도 극성별로 한 번만 카운트)
+        기사 인덱스와 링크가 있으면 저장된 기사별 점수를 쓰고 새 기사만 분석합니다.
         """
+        if not (self.news_store and links):
+            score, reasons = self.keyword_matcher.score_titles(titles)
+            return score, list(set(reasons)) # 중복 사유 제거
+
+        version = self.keyword_matcher.version
+        scores = self.news_store.get_keyword_scores(links, version)
+        missing = [(title, link) for title, link in zip(titles, links) if link not in scores]
+        utils.count("cache.keyword.hit", len(links) - len(missing))
+        utils.count("cache.keyword.miss", len(missing))
+        if missing:
+            fresh = dict(zip(
+                [link for title, link in missing],
+                self.keyword_matcher.score_each([title for title, link in missing])
+            ))
+            self.news_store.save_keyword_scores(version, fresh)
+            scores.update(fresh)
+
         score = 0
         reasons = []
-        
-        for title in titles:
-            for keyword in config.NEWS_KEYWORDS['positive']:
-                if keyword in title:
-                    score += 1
-                    reasons.append(f"호재 뉴스: {keyword} 포함")
-                    break # 한 제목에 여러 키워드가 있어도 한 번만 카운트
-            
-            for keyword in config.NEWS_KEYWORDS['negative']:
-                if keyword in title:
-                    score -= 1
-                    reasons.append(f"악재 뉴스: {keyword} 포함")
-                    break
-                    
+        for link in links:
+            if link in scores:
+                score += scores[link][0]
+                reasons.extend(scores[link][1])
         return score, list(set(reasons)) # 중복 사유 제거
 
-    def analyze_chart(self, df):
+    def analyze_news_window(self, ticker, end, days=None):
         """
-        주가 데이터를 분석하여 기술적 점수를 계산합니다. (이동평균선, RSI, 볼린저밴드)
+        뉴스 아카이브(news_store)에 저장된 end 이전 days일 동안의 최근 뉴스로 키워드 뉴스 점수를 다시 계산합니다.
+        (네트워크 없음, 실시간과 같이 최근 NEWS_MAX_TITLES개 기사 사용)
+        Returns: (score, reasons)
+        """
+        if not self.news_store:
+            return 0, []
+        end = pd.Timestamp(end)
+        since = end - pd.Timedelta(days=days or config.NEWS_WINDOW_DAYS)
+        articles = self.news_store.search(
+            ticker=ticker, since=since.strftime("%Y-%m-%d %H:%M:%S"), until=end.strftime("%Y-%m-%d %H:%M:%S"),
+            limit=config.NEWS_MAX_TITLES
+        )
+        return self.analyze_news([a['TITLE'] for a in articles], [a['LINK'] for a in articles])
+
+    def news_factor_history(self, ticker, start, end, days=None):
+        """
+        기간 내 영업일별 뉴스 점수 (백테스트용). 각 날짜는 그날 장 시작 전(0시)까지의 뉴스만 사용해 미래 정보를 쓰지 않습니다.
+        아카이브를 한 번만 조회하고 날짜별 구간은 메모리에서 나눕니다.
+        Returns: pd.Series (index: 날짜, value: 점수)
+        """
+        if not self.news_store:
+            return pd.Series(dtype=float)
+        days = days or config.NEWS_WINDOW_DAYS
+        dates = pd.bdate_range(start, end)
+        if len(dates) == 0:
+            return pd.Series(dtype=float)
+        articles = self.news_store.search(
+            ticker=ticker,
+            since=(dates[0] - pd.Timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S"),
+            until=dates[-1].strftime("%Y-%m-%d %H:%M:%S")
+        ) # 최신순
+        published = [pd.Timestamp(a['PUBLISHED_AT']) for a in articles]
+
+        scores = {}
+        for date in dates:
+            window_start = date - pd.Timedelta(days=days)
+            window = []
+            seen = set()
+            for article, published_at in zip(articles, published):
+                if published_at >= date or article['LINK'] in seen:
+                    continue
+                if published_at < window_start:
+                    break
+                seen.add(article['LINK'])
+                window.append(article)
+                if len(window) >= config.NEWS_MAX_TITLES:
+                    break
+            scores[date] = self.analyze_news([a['TITLE'] for a in window], [a['LINK'] for a in window])[0]
+        return pd.Series(scores, dtype=float)
+
+    def score_news(self, titles, links=None, llm_result=None):
+        """
+        뉴스 점수: LLM 분석을 먼저 시도하고, 실패하면 키워드 분석으로 대체합니다.
+        llm_result: analyze_news_llm_batch로 미리 분석한 (score, reason) - 없으면 여기서 분석
+        Returns: (score, reasons)
         """
-        score = 0
         reasons = []
+        llm_score, llm_reason = llm_result if llm_result is not None else self.analyze_news_llm(titles, links)
+        if llm_score is not None:
+            news_score = llm_score * LLM_NEWS_WEIGHT # 다소 높은 가중치 유지 (단, AI 신뢰)
+            
+            sentiment = "긍정적" if news_score >= 0 else "부정적"
+            if llm_reason:
+                reasons.append(f"[AI 뉴스 분석] {llm_reason} ({round(news_score, 1)}점)")
+            else:
+                reasons.append(f"뉴스 AI 분석 {sentiment} ({round(news_score, 1)}점)")
+        else:
+            news_score, news_reasons = self.analyze_news(titles, links)
+            reasons.extend(news_reasons)
         
+        if links:
+             reasons.append(f"관련 뉴스: {links[0]}")
+        return news_score, reasons
+
+    def analyze_supply_demand(self, foreigner_streak, institutional_streak):
+        """
+        외국인/기관 연속 순매수 여부로 수급 점수를 계산합니다.
+        """
+        supply_score = 0
+        reasons = []
+        # 기본 점수 하향 (+10 -> +3)
+        if foreigner_streak:
+            supply_score += 3
+            reasons.append("외국인 3일 연속 매수 (+3점)")
+        if institutional_streak:
+            supply_score += 3
+            reasons.append("기관 3일 연속 매수 (+3점)")
+            
+        # 양매수 보너스 (+5)
+        if foreigner_streak and institutional_streak:
+            supply_score += 5
+            reasons.append("🔥 메이저 쌍끌이 매수 (추가 +5점)")
+        return supply_score, reasons
+
+    def max_news_score(self):
+        """
+        뉴스 점수의 최댓값 (LLM: 1 x 가중치, 키워드: 수집한 제목마다 최대 호재 키워드 가중치)
+        """
+        return max(LLM_NEWS_WEIGHT, config.NEWS_MAX_TITLES * self.keyword_matcher.max_weight('positive'))
+
+    def max_supply_score(self):
+        """
+        수급 점수의 최댓값 (외국인/기관 동시 연속 순매수)
+        """
+        return self.analyze_supply_demand(True, True)[0]
+
+    def analyze_volume(self, data, require_bullish=False):
+        """
+        거래량 폭발 (최근 5일 평균 대비 2배 이상) 단독 이벤트를 체크합니다.
+        require_bullish=True면 양봉(현재가 >= 시가)일 때만 인정합니다. (국내 주식)
+        """
+        window = price_window.window_of(data)
+        if len(window) < 6: # 전일까지 5일 평균이 필요
+            return 0, []
+        avg_vol = window.volume[-6:-1].mean()
+        if not (avg_vol > 0 and data['volume'] > avg_vol * 2):
+            return 0, []
+        if not require_bullish:
+            return 1, ["거래량 폭발 (5일 평균 대비 2배 이상)"]
+        # 전일 대비 200% 이상 & 양봉일 때만 
+        if data['price'] >= window.open[-1]:
+            return 1, ["거래량 폭발+양봉 (진성 매수세)"]
+        return 0, []
+
+    @utils.timed("analyzer.chart")
+    def analyze_chart(self, df):
+        """
+        주가 데이터를 분석하여 기술적 점수를 계산합니다. (이동평균선, RSI, 볼린저밴드)
+        """
         if len(df) < 20:
             return 0, ["데이터 부족"]
 
-        # 1. 이동평균선 및 추세
-        ma5 = df['Close'].rolling(window=config.MA_SHORT).mean().iloc[-1]
-        ma20 = df['Close'].rolling(window=config.MA_LONG).mean().iloc[-1]
-        current_price = df['Close'].iloc[-1]
+        close = df['Close']
+
+        # 1. 이동평균선 및 추세 (롤링은 한 번만 계산하고 마지막 두 값을 사용)
+        ma_short = close.rolling(window=config.MA_SHORT).mean()
+        ma_long = close.rolling(window=config.MA_LONG).mean()
+        ma5, prev_ma5 = ma_short.iloc[-1], ma_short.iloc[-2]
+        ma20, prev_ma20 = ma_long.iloc[-1], ma_long.iloc[-2]
+        current_price = close.iloc[-1]
         
         # 2. 골든크로스 (거래량 동반 필수)
-        prev_ma5 = df['Close'].rolling(window=config.MA_SHORT).mean().iloc[-2]
-        prev_ma20 = df['Close'].rolling(window=config.MA_LONG).mean().iloc[-2]
-        
-        if prev_ma5 <= prev_ma20 and ma5 > ma20:
+        golden_cross = prev_ma5 <= prev_ma20 and ma5 > ma20
+        volume_surge = False
+        if golden_cross:
             # 거래량 확인 (최근 5일 평균 대비 150% 이상)
             vol_ma5 = df['Volume'].rolling(window=5).mean().iloc[-2]
             current_vol = df['Volume'].iloc[-1]
-            
-            if current_vol >= vol_ma5 * 1.5:
-                score += 2
-                reasons.append("골든크로스 + 거래량 급증 (진짜 상승 신호)")
-            else:
-                reasons.append("골든크로스 발생했으나 거래량 부족 (신뢰도 낮음)")
+            volume_surge = current_vol >= vol_ma5 * 1.5
             
         # 3. RSI (30 돌파 매수)
-        delta = df['Close'].diff()
+        delta = close.diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=config.RSI_PERIOD).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=config.RSI_PERIOD).mean()
         
-        rs = gain / loss
+        rs = gain.iloc[-2:] / loss.iloc[-2:]
         rsi_series = 100 - (100 / (1 + rs))
         current_rsi = rsi_series.iloc[-1]
         prev_rsi = rsi_series.iloc[-2]
-        
+            
+        # 4. 볼린저 밴드 (하단 지지)
+        std = close.rolling(window=20).std().iloc[-1]
+        lower_band = ma20 - (std * 2)
+        near_lower_band = current_price <= lower_band * 1.02 # 하단 밴드 근처 (2% 이내)
+            
+        return self._score_chart_signals(golden_cross, volume_surge, current_rsi, prev_rsi, near_lower_band)
+
+    def analyze_chart_state(self, state):
+        """
+        증분 지표 상태(indicators.IndicatorState)로 차트 점수를 계산합니다.
+        전체 기간을 다시 계산하지 않으므로 장중 재평가 비용이 종목당 상수 시간입니다.
+        """
+        if state is None or state.count < 20:
+            return 0, ["데이터 부족"]
+
+        golden_cross = state.prev_ma_short <= state.prev_ma_long and state.ma_short > state.ma_long
+        volume_surge = golden_cross and state.volume >= state.prev_volume_ma * 1.5
+        lower_band = state.ma_long - (state.std * 2)
+        near_lower_band = state.close <= lower_band * 1.02
+
+        return self._score_chart_signals(golden_cross, volume_surge, state.rsi, state.prev_rsi, near_lower_band)
+
+    def _score_chart_signals(self, golden_cross, volume_surge, current_rsi, prev_rsi, near_lower_band):
+        """
+        계산된 차트 신호를 점수와 사유로 변환합니다. (단일 종목/패널 분석 공용)
+        """
+        score = 0
+        reasons = []
+
+        if golden_cross:
+            if volume_surge:
+                score += 2
+                reasons.append("골든크로스 + 거래량 급증 (진짜 상승 신호)")
+            else:
+                reasons.append("골든크로스 발생했으나 거래량 부족 (신뢰도 낮음)")
+
         if current_rsi >= 70:
             score -= 1
             reasons.append(f"RSI 과열 ({round(current_rsi, 1)}) - 매도 주의")
@@ -162,27 +403,127 @@ class Analyzer:
             # 30을 밑에서 위로 뚫을 때 점수 부여 (침체 탈출)
             score += 2
             reasons.append(f"RSI 침체 구간 탈출 ({round(current_rsi, 1)}) - 반등 시작")
-            
-        # 4. 볼린저 밴드 (하단 지지)
-        std = df['Close'].rolling(window=20).std().iloc[-1]
-        upper_band = ma20 + (std * 2)
-        lower_band = ma20 - (std * 2)
-        
-        if current_price <= lower_band * 1.02: # 하단 밴드 근처 (2% 이내)
+
+        if near_lower_band:
             score += 1
             reasons.append("볼린저밴드 하단 지지 (저점 매수 기회)")
-            
+
         return score, reasons
 
+    def chart_lookback(self):
+        """
+        차트 지표(마지막 두 시점)를 계산하는 데 필요한 최소 봉 개수
+        """
+        return max(config.MA_LONG, config.MA_SHORT, config.RSI_PERIOD + 1, 20, 5) + 1
+
+    def build_panel(self, market_data, fields=('Close', 'Volume'), lookback=None):
+        """
+        종목별 시세 데이터(MarketRecord 또는 {'df': df})를 날짜 x 종목 패널로 변환합니다.
+        lookback을 주면 종목별 최근 lookback개 봉만 사용합니다.
+        Returns: {field: DataFrame(index=날짜, columns=종목코드)}
+        """
+        start = -lookback if lookback else 0
+        codes = list(market_data)
+        if not codes:
+            return {field: pd.DataFrame() for field in fields}
+        windows = [price_window.window_of(market_data[code]) for code in codes]
+
+        # 전 종목 날짜 합집합을 한 번 만들고 종목별 값을 해당 위치에 채움 (concat 정렬 비용 회피)
+        index_values = [window.dates[start:] for window in windows]
+        dates = pd.DatetimeIndex(np.unique(np.concatenate(index_values)))
+        positions = [np.searchsorted(dates.values, values) for values in index_values]
+
+        panels = {}
+        for field in fields:
+            arr = np.full((len(dates), len(codes)), np.nan)
+            for j, window in enumerate(windows):
+                arr[positions[j], j] = window.column(field)[start:]
+            panels[field] = pd.DataFrame(arr, index=dates, columns=codes)
+        return panels
+
+    @utils.timed("analyzer.chart_batch")
+    def analyze_chart_batch(self, market_data):
+        """
+        여러 종목의 차트 점수를 패널 연산 한 번으로 계산합니다.
+        Returns: {code: (score, reasons)}
+        """
+        panels = self.build_panel(market_data, lookback=self.chart_lookback())
+        return self.analyze_chart_panel(panels['Close'], panels['Volume'])
+
+    def analyze_chart_panel(self, close, volume):
+        """
+        날짜 x 종목 종가/거래량 패널에 대해 이동평균, 골든크로스, RSI, 볼린저밴드를
+        전 종목 한 번에 계산합니다. 결과는 종목별 analyze_chart와 동일합니다.
+        Returns: {code: (score, reasons)}
+        """
+        tickers = list(close.columns)
+        if not tickers:
+            return {}
+        volume = volume.reindex(index=close.index, columns=tickers)
+
+        # 종목별로 봉이 없는 날(NaN)을 제거하고 아래쪽(최근)으로 정렬
+        # -> 종목별 DataFrame을 따로 분석할 때와 같은 윈도우가 되도록 맞춤
+        close_arr = close.to_numpy(dtype='float64')
+        volume_arr = volume.to_numpy(dtype='float64')
+        has_bar = ~np.isnan(close_arr)
+        order = np.argsort(has_bar, axis=0, kind='stable')
+        close_arr = np.take_along_axis(close_arr, order, axis=0)
+        volume_arr = np.take_along_axis(volume_arr, order, axis=0)
+        bar_count = has_bar.sum(axis=0)
+
+        # 지표 계산에 필요한 최근 구간만 사용 (마지막 두 시점의 윈도우)
+        tail_len = self.chart_lookback()
+        if len(close_arr) < tail_len:
+            pad = np.full((tail_len - len(close_arr), len(tickers)), np.nan)
+            close_arr = np.vstack([pad, close_arr])
+            volume_arr = np.vstack([pad, volume_arr])
+        close_arr = close_arr[-tail_len:]
+        volume_arr = volume_arr[-tail_len:]
+
+        def last_two_means(arr, window):
+            # [직전 시점, 현재 시점]의 window 이동평균
+            return np.stack([arr[-window - 1:-1].mean(axis=0), arr[-window:].mean(axis=0)])
+
+        # 1. 이동평균선 (전 종목 동시 계산)
+        ma_short = last_two_means(close_arr, config.MA_SHORT)
+        ma_long = last_two_means(close_arr, config.MA_LONG)
+        current_price = close_arr[-1]
+
+        # 2. 골든크로스 + 거래량 (최근 5일 평균 대비 150% 이상)
+        golden_cross = (ma_short[0] <= ma_long[0]) & (ma_short[1] > ma_long[1])
+        vol_ma5 = volume_arr[-6:-1].mean(axis=0)
+        volume_surge = volume_arr[-1] >= vol_ma5 * 1.5
+
+        # 3. RSI
+        delta = np.diff(close_arr[-(config.RSI_PERIOD + 2):], axis=0)
+        gain = last_two_means(np.where(delta > 0, delta, 0), config.RSI_PERIOD)
+        loss = last_two_means(-np.where(delta < 0, delta, 0), config.RSI_PERIOD)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+
+        # 4. 볼린저 밴드 하단 (2% 이내)
+        std = close_arr[-20:].std(axis=0, ddof=1)
+        lower_band = ma_long[1] - (std * 2)
+        near_lower_band = current_price <= lower_band * 1.02
+
+        results = {}
+        for i, ticker in enumerate(tickers):
+            if bar_count[i] < 20:
+                results[ticker] = (0, ["데이터 부족"])
+                continue
+            results[ticker] = self._score_chart_signals(
+                bool(golden_cross[i]), bool(volume_surge[i]), rsi[1, i], rsi[0, i], bool(near_lower_band[i])
+            )
+        return results
+
     def analyze_fundamentals(self, data):
         """
         펀더멘털 데이터를 분석하여 자격 미달 종목을 필터링합니다.
-        Returns: True(합격), False(불합격), reason
+        Returns: True(합격), False(불합격), None(데이터 없음 - 판단 불가), reason
         """
-        if not data:
-            return True, "데이터 없음 (패스)" # 데이터 없으면 일단 통과
-            
-        market_cap = data.get('market_cap', 0)
+        market_cap = data.get('market_cap') if data else None
+        if market_cap is None:
+            return None, "펀더멘털 데이터 없음 (미확인)"
         
         # 1. 시가총액 필터링 (1,000억 원 미만 제외)
         if market_cap < 100000000000:
@@ -57,18 +57,115 @@ NEWS_KEYWORDS = {
     'positive': ['공급계약', '무상증자', 'FDA 승인', '신고가', '흑자전환', '인수합병', 'M&A', '체결', '급등', '호실적'],
     'negative': ['유상증자', '전환사채', 'CB', '임원 매도', '적자지속', '관리종목', '횡령', '배임', '하락', '손실']
 }
+# 키워드별 가중치 (없으면 1점). 한 제목에 같은 극성 키워드가 여러 개면 가중치가 큰 키워드 하나만 반영
+# 예: {'FDA 승인': 3, '횡령': 2}
+NEWS_KEYWORD_WEIGHTS = {}
 
 # 차트 분석 설정
 MA_SHORT = 5
 MA_LONG = 20
 RSI_PERIOD = 14
 RSI_OVERBOUGHT = 70
+# 종목별로 메모리에 보관할 최근 봉 개수 (차트 지표 21봉 + 여유, 이전 구간은 로컬 가격 저장소에만 보관)
+PRICE_WINDOW = 40
+
+# 미국장 연동 점수: 'correlation' = 시차(미국 t-1 -> 국내 t) 수익률 상관/베타 행렬 (coupling.py)
+# 'mapping' = KOREA_MAPPING 섹터 종목에 미국 등락률 구간별 고정 점수(±1/±2)
+COUPLING_MODE = 'correlation'
+COUPLING_WINDOW = 20          # 상관/베타 계산에 쓰는 최근 국내 거래일 수 (PRICE_WINDOW 안에서)
+COUPLING_MIN_OBS = 10         # 종목 쌍별 최소 관측일 수 (미만이면 상관 0)
+COUPLING_MIN_CORR = 0.3       # 이 이상(절댓값)인 종목 쌍만 점수에 반영
+COUPLING_PRIOR_WEIGHT = 10    # KOREA_MAPPING 종목 쌍의 사전 관측치 수 (0이면 매핑 미사용)
+COUPLING_PRIOR_CORR = 0.5     # KOREA_MAPPING 종목 쌍의 사전 상관계수
+COUPLING_PRIOR_BETA = 0.5     # KOREA_MAPPING 종목 쌍의 사전 베타
+COUPLING_PCT_PER_POINT = 1.0  # 국내 예상 등락률(%) 1점당 크기
+COUPLING_MAX_SCORE = 2        # 연동 점수 상한 (±)
+
+# 국내 주식 후보군: 미국장 연동 종목 + 시가총액 상위 N개
+KR_TOP_N = 50
+
+# 국내 주식 후보군 범위: 'top' = 시가총액 상위 KR_TOP_N (종목별 일봉 조회)
+# 'full' = KRX 전 종목 (거래일별 시장 전체 시세 스냅샷으로 패널 구성, 상위 K 평가 사용)
+KR_UNIVERSE = 'top'
+SNAPSHOT_DAYS = 30  # 전 종목 스냅샷 보관 거래일 수 (차트 지표 계산에 21일 이상 필요)
+
+# 단계별(Tiered) 상위 K 평가: 0이면 모든 후보에 뉴스/수급 분석 수행
+# K > 0이면 로컬 점수 + 뉴스/수급 최대 점수(상한)로 상위 K 진입이 불가능한 종목은 네트워크 단계를 생략
+KR_TOP_K = 0
+
+# 추천 강도 기준 점수 (GUI/CLI/DB 공통)
+STRONG_BUY_SCORE = 5   # 이상이면 강력 추천
+BUY_SCORE = 2          # 이상이면 매수 추천
+SELL_SCORE = -2        # 이하이면 매도 경고
 
 # API 키 설정 (사용자가 직접 입력해야 함)
 import os
 
 # API 키 설정 (환경변수 또는 직접 설정)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None # 호환 API/로컬 Mock 서버 주소 (없으면 기본값)
+OPENAI_MODEL = "gpt-3.5-turbo"
+
+# LLM 뉴스 감성 분석 캐시/배치 설정 (분석 결과는 뉴스 기사 인덱스에 기사별로 저장)
+LLM_CACHE_TTL_HOURS = 24     # 기사별 분석 결과 재사용 기간 (지나면 다시 분석)
+LLM_ARTICLE_BATCH_SIZE = 30  # 기사 단위 분석 시 한 번의 프롬프트로 분석할 기사 수 (기사당 응답 ~100토큰)
+LLM_MAX_OUTPUT_TOKENS = 4096 # 응답 최대 토큰 (gpt-3.5-turbo 완성 토큰 한도)
+LLM_TIMEOUT = 30             # API 요청 타임아웃 (초)
 
 # SQLite DB 설정
 DB_PATH = "stock_data.db"
+
+# 로컬 가격 저장소 (일봉 OHLCV, 분석 결과 DB와 같은 폴더)
+PRICE_DB_PATH = os.path.join(os.path.dirname(DB_PATH), "price_data.db")
+PRICE_OVERLAP_DAYS = 5       # 증분 수집 시 다시 받아 저장된 종가와 비교할 최근 거래일 수 (액면분할/배당 수정주가 감지)
+
+# 시세 병렬 수집 설정
+FETCH_PARALLEL = True        # False면 기존처럼 한 종목씩 순차 수집
+FETCH_MAX_WORKERS = 8        # 동시 수집 스레드 수
+# upstream 호스트별 초당 최대 요청 수 (fdr.DataReader가 종목코드에 따라 실제로 조회하는 호스트, data_collector.fdr_host)
+# 같은 호스트를 쓰는 요청은 시장/스레드와 관계없이 하나의 제한을 공유
+FETCH_RATE_LIMITS = {
+    'fchart.stock.naver.com': 10,    # 국내 종목 일봉
+    'query2.finance.yahoo.com': 5,   # 미국 종목 일봉
+    'raw.githubusercontent.com': 5,  # KRX 지수(KS11/KQ11) 일봉 캐시
+}
+
+# 뉴스 크롤링 설정 (네이버 차단 방지를 위해 토큰 버킷으로 속도 제한)
+NEWS_MAX_WORKERS = 4         # 동시 크롤링 스레드 수 (커넥션 풀 크기)
+NEWS_RATE_LIMIT = 2          # 초당 최대 요청 수
+NEWS_RATE_BURST = 2          # 한 번에 몰아서 보낼 수 있는 최대 요청 수
+NEWS_TIMEOUT = 10            # 요청 타임아웃 (초)
+NEWS_MAX_TITLES = 10         # 종목당 수집할 최근 뉴스 제목 수
+NEWS_MAX_PAGES = 3           # 이미 본 기사가 나올 때까지 넘겨볼 최대 검색 결과 페이지 수
+
+# 뉴스 기사 인덱스 (이미 본 기사/기사별 점수, 분석 결과 DB와 같은 폴더)
+NEWS_DB_PATH = os.path.join(os.path.dirname(DB_PATH), "news_data.db")
+NEWS_WINDOW_DAYS = 7         # 과거 뉴스 점수 재계산 시 날짜별로 보는 기간 (일)
+
+# 로그 파일 (크기 초과 시 회전)
+LOG_PATH = "stock_assistant.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024   # 5MB
+LOG_BACKUP_COUNT = 5              # 보관할 이전 로그 파일 수
+
+# 실행 계측 결과 파일 (분석 종료 시 저장, None이면 저장 안 함)
+METRICS_JSON_PATH = os.path.join(os.path.dirname(DB_PATH), "metrics.json")
+METRICS_PROM_PATH = os.path.join(os.path.dirname(DB_PATH), "metrics.prom") # Prometheus textfile
+
+# 수급 분석 (외국인/기관 연속 순매수 판단 기간)
+SUPPLY_STREAK_DAYS = 3
+
+# GUI 결과 스트리밍 (분석이 끝난 종목부터 표에 추가)
+STREAM_CHUNK_SIZE = 10       # 스트리밍 시 뉴스/수급/LLM을 한 번에 조회할 종목 수
+STREAM_BATCH_SIZE = 20       # 한 번에 GUI로 보낼 최대 결과 수
+STREAM_INTERVAL = 0.3        # GUI 갱신 최소 간격 (초) - 이보다 자주 보내지 않고 모아서 전송
+
+# 캐시 예열 스케줄러 (scheduler.py) - 분석 직전에 시세/뉴스를 미리 받아 로컬 캐시에 저장
+WARMUP_TIMES = ["08:30", "15:00"]   # 거래일 예열 시각 (8:50 / 15:20 분석 전)
+WARMUP_TASKS = ('listing', 'fundamentals', 'indices', 'us_prices', 'kr_prices', 'news') # 전 종목 분석 시 'snapshots' 추가
+WARMUP_VALID_MINUTES = 60           # 예열 시작 후 이 시간 안에 시작한 분석은 예열된 시세/뉴스를 다시 받지 않음
+# KRX 휴장일 (주말 제외, 매년 갱신)
+MARKET_HOLIDAYS = [
+    "2026-01-01", "2026-02-16", "2026-02-17", "2026-02-18", "2026-03-02", "2026-05-01",
+    "2026-05-05", "2026-05-25", "2026-06-03", "2026-08-17", "2026-09-24", "2026-09-25",
+    "2026-10-05", "2026-10-09", "2026-12-25", "2026-12-31",
+]
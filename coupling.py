@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+import config
+import utils
+import price_window
+
+class CouplingMatrix:
+    """
+    미국 종목(행) x 국내 종목(열) 시차 상관계수/베타 행렬 (as_of: 기준 국내 거래일)
+    """
+    __slots__ = ('as_of', 'us_tickers', 'kr_codes', 'corr', 'beta', 'obs')
+
+    def __init__(self, as_of, us_tickers, kr_codes, corr, beta, obs):
+        self.as_of = as_of
+        self.us_tickers = list(us_tickers)
+        self.kr_codes = list(kr_codes)
+        self.corr = corr
+        self.beta = beta
+        self.obs = obs
+
+    def select(self, us_tickers, kr_codes):
+        """
+        요청한 종목만 잘라낸 행렬 (없는 종목이나 저장되지 않은 종목 쌍(NaN)이 있으면 None)
+        """
+        us_pos = {ticker: i for i, ticker in enumerate(self.us_tickers)}
+        kr_pos = {code: j for j, code in enumerate(self.kr_codes)}
+        if any(ticker not in us_pos for ticker in us_tickers) or any(code not in kr_pos for code in kr_codes):
+            return None
+        block = np.ix_([us_pos[ticker] for ticker in us_tickers], [kr_pos[code] for code in kr_codes])
+        if np.isnan(self.corr[block]).any():
+            return None
+        return CouplingMatrix(self.as_of, us_tickers, kr_codes, self.corr[block], self.beta[block], self.obs[block])
+
+def lagged_returns(us_close, kr_close, window):
+    """
+    미국 t-1일 수익률 -> 국내 t일 수익률 쌍을 맞춥니다.
+    국내 t일에는 직전 국내 거래일(t-1) 이후, t일 이전에 마감한 미국 거래일의 수익률을 대응시킵니다.
+    (미국 장은 같은 날짜의 국내 장이 끝난 뒤에 마감하므로 국내 t-1일과 같은 날짜도 포함)
+    마지막 국내 봉(오늘, 장중일 수 있음)은 예측 대상이므로 제외하고 최근 window개 쌍을 사용합니다.
+    Returns: (X: window x 미국 종목, Y: window x 국내 종목) - 수익률, 쌍이 없으면 NaN
+    """
+    us_returns = us_close.pct_change(fill_method=None).to_numpy(dtype='float64')
+    kr_returns = kr_close.pct_change(fill_method=None).to_numpy(dtype='float64')
+    us_dates = us_close.index.values
+    kr_dates = kr_close.index.values
+
+    rows = np.arange(1, len(kr_dates) - 1)[-window:]
+    if len(rows) == 0 or len(us_dates) == 0:
+        return np.empty((0, us_close.shape[1])), np.empty((0, kr_close.shape[1]))
+    us_idx = np.searchsorted(us_dates, kr_dates[rows], side='left') - 1
+    valid = (us_idx >= 0) & (us_dates[np.maximum(us_idx, 0)] >= kr_dates[rows - 1])
+
+    x = np.full((len(rows), us_returns.shape[1]), np.nan)
+    x[valid] = us_returns[us_idx[valid]]
+    return x, kr_returns[rows]
+
+def correlation_matrix(x, y):
+    """
+    쌍별로 둘 다 값이 있는 날만 사용해(pairwise complete) 상관계수/베타(국내 수익률의 미국 수익률 회귀계수)를
+    행렬 곱 몇 번으로 전 종목 쌍에 대해 한 번에 계산합니다.
+    Returns: (corr, beta, obs) - 각각 미국 종목 x 국내 종목
+    """
+    mx = ~np.isnan(x)
+    my = ~np.isnan(y)
+    x0 = np.where(mx, x, 0.0)
+    y0 = np.where(my, y, 0.0)
+    fx = mx.astype('float64')
+    fy = my.astype('float64')
+
+    obs = fx.T @ fy
+    sx = x0.T @ fy
+    sy = fx.T @ y0
+    sxx = (x0 * x0).T @ fy
+    syy = fx.T @ (y0 * y0)
+    sxy = x0.T @ y0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sxy - sx * sy / obs
+        var_x = sxx - sx * sx / obs
+        var_y = syy - sy * sy / obs
+        corr = cov / np.sqrt(var_x * var_y)
+        beta = cov / var_x
+    enough = (obs >= config.COUPLING_MIN_OBS) & (var_x > 0) & (var_y > 0)
+    corr = np.where(enough, np.clip(corr, -1.0, 1.0), 0.0)
+    beta = np.where(enough, beta, 0.0)
+    obs = np.where(enough, obs, 0.0)
+    return corr, beta, obs
+
+def prior_mask(us_tickers, kr_codes, sector_mapping):
+    """
+    KOREA_MAPPING(미국 섹터 -> 국내 종목)에 있는 종목 쌍 = 1
+    """
+    kr_pos = {code: j for j, code in enumerate(kr_codes)}
+    mask = np.zeros((len(us_tickers), len(kr_codes)))
+    for i, ticker in enumerate(us_tickers):
+        for code in sector_mapping.get(config.US_TICKERS.get(ticker), []):
+            if code in kr_pos:
+                mask[i, kr_pos[code]] = 1.0
+    return mask
+
+class CouplingEngine:
+    """
+    데이터 기반 미국장 연동 점수.
+    미국 전 종목 x 국내 후보 전 종목의 시차(미국 t-1 -> 국내 t) 수익률 상관계수/베타 행렬을 NumPy로 한 번에 계산하고,
+    국내 거래일(as_of)별로 로컬 저장소에 캐시합니다. (같은 날 다시 분석하면 행렬을 다시 계산하지 않음)
+    점수는 상관계수 제곱으로 가중한 (베타 x 미국 등락률) 평균, 즉 행렬-벡터 곱 한 번으로 구합니다.
+    KOREA_MAPPING 종목 쌍은 사전 관측치(COUPLING_PRIOR_WEIGHT)만큼 사전 상관/베타 쪽으로 당겨집니다.
+    """
+    def __init__(self, store=None):
+        self.store = store # None이면 캐시 없이 매번 계산
+        self.create_table()
+
+    def create_table(self):
+        if self.store is None or not self.store.conn: return
+        try:
+            with self.store.lock:
+                self.store.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS COUPLING_MATRIX (
+                        AS_OF TEXT NOT NULL,
+                        US_TICKER TEXT NOT NULL,
+                        KR_CODE TEXT NOT NULL,
+                        CORR REAL,
+                        BETA REAL,
+                        OBS INTEGER,
+                        PRIMARY KEY (AS_OF, US_TICKER, KR_CODE)
+                    )
+                """)
+                self.store.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Coupling Table Creation Error: {e}")
+
+    # --- 행렬 ---
+
+    @utils.timed("coupling.matrix")
+    def matrix(self, us_data, kr_data):
+        """
+        us_data/kr_data(종목별 시세 레코드)의 시차 상관/베타 행렬. 같은 기준일 캐시가 있으면 재사용합니다.
+        """
+        us_tickers = list(us_data)
+        kr_codes = list(kr_data)
+        kr_close = self.close_panel(kr_data)
+        as_of = kr_close.index[-1].strftime("%Y-%m-%d") if len(kr_close.index) else None
+
+        cached = self.load(as_of)
+        if cached is not None:
+            selected = cached.select(us_tickers, kr_codes)
+            if selected is not None:
+                utils.count("cache.coupling.hit")
+                return selected
+        utils.count("cache.coupling.miss")
+
+        x, y = lagged_returns(self.close_panel(us_data), kr_close, config.COUPLING_WINDOW)
+        corr, beta, obs = correlation_matrix(x, y)
+        result = CouplingMatrix(as_of, us_tickers, kr_codes, corr, beta, obs)
+        if as_of is not None:
+            self.save(result)
+        utils.log_info(f"Coupling matrix computed: {len(us_tickers)} x {len(kr_codes)} (as of {as_of}, {len(x)} days)")
+        return result
+
+    @staticmethod
+    def close_panel(market_data):
+        # 날짜 x 종목 종가 패널 (Analyzer.build_panel과 같은 방식, 종가만)
+        codes = list(market_data)
+        if not codes:
+            return pd.DataFrame()
+        windows = [price_window.window_of(market_data[code]) for code in codes]
+        dates = pd.DatetimeIndex(np.unique(np.concatenate([window.dates for window in windows])))
+        arr = np.full((len(dates), len(codes)), np.nan)
+        for j, window in enumerate(windows):
+            arr[np.searchsorted(dates.values, window.dates), j] = window.close
+        return pd.DataFrame(arr, index=dates, columns=codes)
+
+    def load(self, as_of):
+        if as_of is None or self.store is None or not self.store.conn:
+            return None
+        with self.store.lock:
+            rows = self.store.conn.execute(
+                "SELECT US_TICKER, KR_CODE, CORR, BETA, OBS FROM COUPLING_MATRIX WHERE AS_OF = ?", (as_of,)
+            ).fetchall()
+        if not rows:
+            return None
+        us_tickers = sorted({row[0] for row in rows})
+        kr_codes = sorted({row[1] for row in rows})
+        us_pos = {ticker: i for i, ticker in enumerate(us_tickers)}
+        kr_pos = {code: j for j, code in enumerate(kr_codes)}
+        corr = np.full((len(us_tickers), len(kr_codes)), np.nan) # 저장되지 않은 쌍은 NaN
+        beta = np.zeros_like(corr)
+        obs = np.zeros_like(corr)
+        for ticker, code, c, b, n in rows:
+            i, j = us_pos[ticker], kr_pos[code]
+            corr[i, j], beta[i, j], obs[i, j] = c, b, n
+        return CouplingMatrix(as_of, us_tickers, kr_codes, corr, beta, obs)
+
+    def save(self, matrix):
+        """
+        기준일 행렬을 저장하고 이전 기준일 행렬은 지웁니다.
+        같은 기준일에 저장된 다른 종목 쌍은 그대로 두므로 후보군이 바뀌어도 합쳐서 재사용합니다.
+        """
+        if self.store is None or not self.store.conn: return
+        rows = [
+            (matrix.as_of, ticker, code, float(matrix.corr[i, j]), float(matrix.beta[i, j]), int(matrix.obs[i, j]))
+            for i, ticker in enumerate(matrix.us_tickers)
+            for j, code in enumerate(matrix.kr_codes)
+        ]
+        try:
+            with self.store.lock:
+                self.store.conn.execute("DELETE FROM COUPLING_MATRIX WHERE AS_OF < ?", (matrix.as_of,))
+                self.store.conn.executemany("""
+                    INSERT OR REPLACE INTO COUPLING_MATRIX (AS_OF, US_TICKER, KR_CODE, CORR, BETA, OBS)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, rows)
+                self.store.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Coupling Save Error ({matrix.as_of}): {e}")
+
+    # --- 점수 ---
+
+    def scores(self, us_data, kr_data, sector_mapping=None):
+        """
+        Returns: {kr_code: {'score', 'reason'}} (점수가 0인 종목 제외, Analyzer.analyze_coupling과 같은 형식)
+        """
+        us_tickers = list(us_data)
+        kr_codes = list(kr_data)
+        if not us_tickers or not kr_codes:
+            return {}
+        matrix = self.matrix(us_data, kr_data)
+        sector_mapping = config.KOREA_MAPPING if sector_mapping is None else sector_mapping
+
+        # KOREA_MAPPING 사전(prior): 관측치 n개 상관/베타와 사전 관측치 n0개의 가중 평균
+        n0 = config.COUPLING_PRIOR_WEIGHT * prior_mask(us_tickers, kr_codes, sector_mapping)
+        total = matrix.obs + n0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.where(total > 0, (matrix.obs * matrix.corr + n0 * config.COUPLING_PRIOR_CORR) / total, 0.0)
+            beta = np.where(total > 0, (matrix.obs * matrix.beta + n0 * config.COUPLING_PRIOR_BETA) / total, 0.0)
+
+        # 상관계수 제곱(설명력) 가중 평균: 국내 예상 등락률(%) = (W * beta)^T r / W^T 1
+        weight = np.where(np.abs(corr) >= config.COUPLING_MIN_CORR, corr * corr, 0.0)
+        change = np.array([us_data[ticker]['change_rate'] for ticker in us_tickers], dtype='float64')
+        weight_sum = weight.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            expected = np.where(weight_sum > 0, ((weight * beta).T @ change) / weight_sum, 0.0)
+        points = np.clip(np.round(expected / config.COUPLING_PCT_PER_POINT), -config.COUPLING_MAX_SCORE, config.COUPLING_MAX_SCORE)
+
+        # 사유: 기여도가 큰 미국 종목 (최대 2개)
+        contribution = np.abs(weight * beta * change[:, None])
+        scores = {}
+        for j in np.flatnonzero(points):
+            reasons = []
+            for i in np.argsort(-contribution[:, j])[:2]:
+                if contribution[i, j] <= 0:
+                    break
+                reasons.append(
+                    f"미국 {us_tickers[i]} {change[i]:+.2f}% 등락 영향 (상관 {corr[i, j]:.2f}, 베타 {beta[i, j]:.2f})"
+                )
+            scores[kr_codes[j]] = {'score': int(points[j]), 'reason': reasons}
+        return scores
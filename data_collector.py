@@ -1,123 +1,405 @@
 import yfinance as yf
 import FinanceDataReader as fdr
+import re
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import numpy as np
 import pandas as pd
 import time
+from concurrent.futures import ThreadPoolExecutor
+import config
 import utils
+import price_store
+import news_store
+import indicators
+import listing
+import market_snapshot
+import price_window
+
+# FinanceDataReader(fdr.DataReader)가 종목코드별로 조회하는 upstream 호스트
+# (KRX 지수 -> 지수 캐시, 국내 종목코드 -> 네이버 차트, 그 외 -> 야후)
+FDR_KRX_INDEX_SYMBOLS = {'KS11', 'KQ11', 'KS200', 'KOSPI', 'KOSDAQ', 'KPI200'}
+FDR_KRX_CODE_PATTERN = re.compile(r'\d{4}[0-9A-HJ-NP-TV-Z][0-9KLMN]')
+
+def fdr_host(code):
+    """
+    fdr.DataReader(code)가 요청을 보내는 호스트 (호스트별 속도 제한 키)
+    """
+    if code in FDR_KRX_INDEX_SYMBOLS:
+        return 'raw.githubusercontent.com'
+    if FDR_KRX_CODE_PATTERN.match(code):
+        return 'fchart.stock.naver.com'
+    return 'query2.finance.yahoo.com'
 
 class DataCollector:
-    def __init__(self):
-        pass
+    def __init__(self, parallel=None, max_workers=None):
+        # 로컬 가격 저장소 (매번 전체 기간을 다시 받지 않도록 증분 수집)
+        self.price_store = price_store.PriceStore()
+
+        # 병렬 수집 설정 (upstream 호스트별 속도 제한은 모든 스레드가 공유)
+        self.parallel = config.FETCH_PARALLEL if parallel is None else parallel
+        self.max_workers = max_workers or config.FETCH_MAX_WORKERS
+        self.rate_limiters = {
+            host: utils.RateLimiter(rate) for host, rate in config.FETCH_RATE_LIMITS.items()
+        }
+
+        # 뉴스 크롤링용 공유 세션 (커넥션 풀 + keep-alive)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.NEWS_MAX_WORKERS)
+        self.session.mount('https://', adapter)
+        self.news_rate_limiter = utils.RateLimiter(config.NEWS_RATE_LIMIT, burst=config.NEWS_RATE_BURST)
+        # 이미 본 뉴스 기사 인덱스 (새 기사만 받아서 분석)
+        self.news_store = news_store.NewsStore()
+
+        # 시장 전체 수급 인덱스 (load_supply_demand_index 호출 시 생성)
+        self.supply_index = None
+        # 시장 전체 펀더멘털 스냅샷 (load_fundamental_snapshot 호출 시 생성)
+        self.fundamentals = None
+        # KRX 상장 종목 목록 (get_krx_listing 호출 시 로드, 하루 단위 캐시)
+        self.krx_listing = None
+        # KRX 전 종목 일별 시세 스냅샷 (load_market_snapshots 호출 시 생성)
+        self.market_snapshots = None
+        # 최근 캐시 예열(scheduler.py) 시작 시각 - 이후에 받은 시세/뉴스는 다시 받지 않음
+        self.warm_since = self.load_warm_since()
 
-    def get_us_market_data(self, tickers):
+    def load_warm_since(self):
         """
-        미국 주식(티커 리스트)의 데이터를 가져옵니다.
+        WARMUP_VALID_MINUTES 안에 끝난 캐시 예열이 있으면 그 시작 시각(UTC), 없으면 None
         """
-        data = {}
-        print("Collecting US Market Data...")
-        for ticker in tickers:
-            try:
-                # FinanceDataReader를 사용하여 미국 주식 데이터 조회
-                # fdr은 미국 주식도 지원함 (예: 'NVDA', 'AAPL')
-                df = fdr.DataReader(ticker, '2024') # 1년치 데이터 확보를 위해 2024년부터 (필요시 조정)
-                
-                # 2024년 데이터가 너무 적으면 2023년부터
-                if len(df) < 20:
-                     df = fdr.DataReader(ticker, '2023')
+        started = self.price_store.get_meta('warmup_started_at')
+        finished = self.price_store.get_meta('warmup_finished_at')
+        if not started or not finished or finished < started:
+            return None
+        try:
+            age = datetime.now(timezone.utc).replace(tzinfo=None) - datetime.strptime(started, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return None
+        if age > timedelta(minutes=config.WARMUP_VALID_MINUTES):
+            return None
+        utils.log_info(f"Using caches warmed at {started} (UTC)")
+        return started
 
-                if len(df) >= 2:
-                    prev_close = df['Close'].iloc[-2]
-                    last_close = df['Close'].iloc[-1]
-                    change_rate = ((last_close - prev_close) / prev_close) * 100
-                    
-                    data[ticker] = {
-                        'price': float(last_close),
-                        'prev_close': float(prev_close),
-                        'change_rate': round(change_rate, 2),
-                        'volume': int(df['Volume'].iloc[-1]),
-                        'df': df
-                    }
+    def is_warm(self, updated_at):
+        return self.warm_since is not None and updated_at is not None and updated_at >= self.warm_since
+
+    def _wait_rate_limit(self, code):
+        limiter = self.rate_limiters.get(fdr_host(code))
+        if limiter:
+            limiter.acquire()
+
+    @utils.timed("collector.get_price_history")
+    def get_price_history(self, code, start):
+        """
+        start 이후 일봉을 반환합니다.
+        로컬 저장소에 이미 있는 구간은 다시 받지 않고, 최근 PRICE_OVERLAP_DAYS개 봉부터 받아 병합합니다.
+        겹치는 구간의 종가가 저장된 값과 다르면(액면분할/배당으로 수정주가가 바뀜) 전체 기간을 다시 받습니다.
+        """
+        if not self.price_store.conn:
+            self._wait_rate_limit(code)
+            utils.count("http.fdr")
+            return fdr.DataReader(code, start)
+
+        start_str = pd.Timestamp(start).strftime("%Y-%m-%d")
+        covered_from, last_date = self.price_store.get_coverage(code)
+
+        if covered_from is None or covered_from > start_str:
+            # 처음 받거나 더 과거 구간이 필요한 경우 전체 수집
+            utils.count("cache.price.miss")
+            self._reload_price_history(code, start_str)
+        elif self.is_warm(self.price_store.get_updated_at(code)):
+            # 캐시 예열에서 이미 갱신한 종목은 네트워크 조회 생략
+            utils.count("cache.price.warm")
+        else:
+            try:
+                # 최근 몇 개 봉을 겹쳐 다시 받아 당일(장중) 봉까지 갱신
+                utils.count("cache.price.hit")
+                overlap_from = self.price_store.overlap_start(code, config.PRICE_OVERLAP_DAYS) or last_date
+                self._wait_rate_limit(code)
+                utils.count("http.fdr")
+                df = fdr.DataReader(code, overlap_from)
+                if self._is_price_adjusted(code, df, overlap_from, last_date):
+                    utils.count("cache.price.adjusted")
+                    utils.log_info(f"Adjusted prices changed, reloading full history ({code})", ticker=code)
+                    self._reload_price_history(code, covered_from)
                 else:
-                    print(f"Insufficient data for {ticker}")
+                    self.price_store.upsert(code, df)
             except Exception as e:
-                print(f"Error fetching {ticker}: {e}")
-        return data
+                # 증분 수집 실패 시 저장된 데이터로 진행
+                utils.log_error(f"Incremental Fetch Error ({code}): {e}", ticker=code)
+
+        return self.price_store.load(code, start)
+
+    def _reload_price_history(self, code, start_str):
+        self._wait_rate_limit(code)
+        utils.count("http.fdr")
+        df = fdr.DataReader(code, start_str)
+        self.price_store.reset(code)
+        self.price_store.upsert(code, df, covered_from=start_str)
+
+    def _is_price_adjusted(self, code, df, overlap_from, last_date):
+        """
+        다시 받은 겹치는 구간의 종가가 저장된 종가와 다른지 확인합니다.
+        마지막 저장일 봉은 장중에 받은 값일 수 있으므로 비교하지 않습니다.
+        """
+        stored = self.price_store.load(code, overlap_from)['Close']
+        stored = stored[stored.index < pd.Timestamp(last_date)]
+        fresh = df['Close'].reindex(stored.index)
+        if fresh.isna().any():
+            return True # 저장된 날짜의 봉이 사라졌으면 다시 받음
+        return not np.allclose(fresh.to_numpy(dtype='float64'), stored.to_numpy(dtype='float64'), rtol=1e-6)
+
+    def get_indicator_state(self, code, df):
+        """
+        저장된 증분 지표 상태에 새로 들어온 봉만 반영하여 반환합니다.
+        저장된 상태가 없거나 df와 이어지지 않으면 df 전체로 다시 계산합니다.
+        """
+        state = self.price_store.load_indicator_state(code)
+        if state is None or pd.Timestamp(state.last_date) not in df.index:
+            state = indicators.IndicatorState()
+        state.update_from_df(df)
+        self.price_store.save_indicator_state(code, state)
+        return state
 
-    def get_korea_market_data(self, codes):
+    def get_krx_listing(self):
+        """
+        KRX 상장 종목 목록(listing.KrxListing)을 반환합니다. 하루에 한 번만 새로 받습니다.
+        """
+        if self.krx_listing is None:
+            self.krx_listing = listing.KrxListing(self.price_store).load()
+        return self.krx_listing
+
+    def get_us_market_data(self, tickers, parallel=None, cancel_event=None):
+        """
+        미국 주식(티커 리스트)의 데이터를 가져옵니다.
+        """
+        print("Collecting US Market Data...")
+        return self._collect(list(tickers), self._fetch_us_stock, parallel, cancel_event)
+
+    def get_korea_market_data(self, codes, parallel=None, cancel_event=None):
         """
         한국 주식(종목코드 리스트)의 현재가 및 등락률을 가져옵니다.
         """
-        data = {}
         print("Collecting Korea Market Data...")
-        for code in codes:
+        return self._collect(list(codes), self._fetch_korea_stock, parallel, cancel_event)
+
+    def _collect(self, codes, fetch_one, parallel=None, cancel_event=None):
+        """
+        종목별 수집 함수를 순차 또는 스레드 풀로 실행하여 {code: {...}} 로 모읍니다.
+        한 종목의 실패가 다른 종목에 영향을 주지 않도록 fetch_one 내부에서 예외를 처리합니다.
+        cancel_event가 설정되면 아직 시작하지 않은 종목은 받지 않고, 그때까지 받은 종목만 반환합니다.
+        (중단 여부 판단은 호출한 쪽에서)
+        """
+        if parallel is None:
+            parallel = self.parallel
+
+        def cancelled():
+            return cancel_event is not None and cancel_event.is_set()
+
+        records = []
+        if parallel and len(codes) > 1:
+            def fetch_unless_cancelled(code):
+                return None if cancelled() else fetch_one(code)
+
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
             try:
-                # FinanceDataReader를 사용하여 데이터 조회
-                df = fdr.DataReader(code, '2024') # 올해 데이터
-                if len(df) > 0:
-                    last_row = df.iloc[-1]
-                    
-                    # 전일 종가 계산 (데이터가 충분할 때)
-                    prev_close = last_row['Close'] # 기본값 (데이터 부족 시)
-                    if len(df) >= 2:
-                        prev_close = df['Close'].iloc[-2]
-                    
-                    # 전일 대비 등락률 계산 (Change 컬럼이 있으면 사용, 없으면 계산)
-                    if 'Change' in df.columns:
-                         change_rate = last_row['Change'] * 100
-                    else:
-                         if len(df) >= 2:
-                             change_rate = ((last_row['Close'] - prev_close) / prev_close) * 100
-                         else:
-                             change_rate = 0.0
-                    
-                    data[code] = {
-                        'price': int(last_row['Close']),
-                        'prev_close': int(prev_close),
-                        'change_rate': round(change_rate, 2),
-                        'volume': int(last_row['Volume']) if 'Volume' in df.columns else 0,
-                        'df': df # 차트 분석을 위해 DataFrame 저장
-                    }
-            except Exception as e:
-                print(f"Error fetching KR stock {code}: {e}")
+                futures = [executor.submit(utils.with_log_context(fetch_unless_cancelled), code) for code in codes]
+                for future in futures:
+                    if cancelled():
+                        break
+                    records.append(future.result())
+            finally:
+                # 중지 요청 시 대기 중인 작업은 취소하고 진행 중인 요청만 마무리
+                executor.shutdown(wait=True, cancel_futures=cancelled())
+        else:
+            for code in codes:
+                if cancelled():
+                    break
+                records.append(fetch_one(code))
+        if cancelled():
+            utils.count("collector.fetch_cancelled")
+            utils.log_info(f"Fetch cancelled after {len(records)}/{len(codes)} tickers")
+
+        # 입력 순서 유지
+        data = {}
+        for code, record in zip(codes, records):
+            if record is not None:
+                data[code] = record
         return data
 
-    def get_news_sentiment(self, keyword):
+    @utils.timed("collector.fetch_us_stock")
+    def _fetch_us_stock(self, ticker):
+        try:
+            # FinanceDataReader를 사용하여 미국 주식 데이터 조회
+            # fdr은 미국 주식도 지원함 (예: 'NVDA', 'AAPL')
+            df = self.get_price_history(ticker, '2024') # 1년치 데이터 확보를 위해 2024년부터 (필요시 조정)
+            
+            # 2024년 데이터가 너무 적으면 2023년부터
+            if len(df) < 20:
+                 utils.count("retry.us_history")
+                 df = self.get_price_history(ticker, '2023')
+
+            if len(df) >= 2:
+                prev_close = df['Close'].iloc[-2]
+                last_close = df['Close'].iloc[-1]
+                change_rate = ((last_close - prev_close) / prev_close) * 100
+                
+                # 전체 기간 DataFrame은 지표 상태 갱신에만 쓰고, 분석용으로는 최근 PRICE_WINDOW개 봉만 보관
+                return price_window.MarketRecord(
+                    price=float(last_close),
+                    prev_close=float(prev_close),
+                    change_rate=round(change_rate, 2),
+                    volume=int(df['Volume'].iloc[-1]),
+                    window=price_window.PriceWindow.from_frame(df),
+                    indicators=self.get_indicator_state(ticker, df)
+                )
+            else:
+                print(f"Insufficient data for {ticker}")
+        except Exception as e:
+            print(f"Error fetching {ticker}: {e}")
+            utils.log_error(f"US Fetch Error ({ticker}): {e}", ticker=ticker)
+        return None
+
+    @utils.timed("collector.fetch_korea_stock")
+    def _fetch_korea_stock(self, code):
+        try:
+            # FinanceDataReader를 사용하여 데이터 조회
+            df = self.get_price_history(code, '2024') # 올해 데이터
+            if len(df) > 0:
+                last_row = df.iloc[-1]
+                
+                # 전일 종가 계산 (데이터가 충분할 때)
+                prev_close = last_row['Close'] # 기본값 (데이터 부족 시)
+                if len(df) >= 2:
+                    prev_close = df['Close'].iloc[-2]
+                
+                # 전일 대비 등락률 계산 (Change 컬럼이 있으면 사용, 없으면 계산)
+                if 'Change' in df.columns:
+                     change_rate = last_row['Change'] * 100
+                else:
+                     if len(df) >= 2:
+                         change_rate = ((last_row['Close'] - prev_close) / prev_close) * 100
+                     else:
+                         change_rate = 0.0
+                
+                return price_window.MarketRecord(
+                    price=int(last_row['Close']),
+                    prev_close=int(prev_close),
+                    change_rate=round(change_rate, 2),
+                    volume=int(last_row['Volume']) if 'Volume' in df.columns else 0,
+                    window=price_window.PriceWindow.from_frame(df), # 차트 분석용 최근 봉 (압축)
+                    indicators=self.get_indicator_state(code, df) # 증분 지표 상태
+                )
+        except Exception as e:
+            print(f"Error fetching KR stock {code}: {e}")
+            utils.log_error(f"KR Fetch Error ({code}): {e}", ticker=code)
+        return None
+
+    @utils.timed("collector.get_news_sentiment")
+    def get_news_sentiment(self, keyword, ticker=None):
         """
         네이버 뉴스에서 특정 키워드(종목명)로 검색하여 뉴스 제목을 크롤링합니다.
+        최신순 검색 결과를 넘기다가 이미 본 기사가 나오면 멈추고, 새 기사만 인덱스(뉴스 아카이브)에 추가합니다.
+        Returns: (titles, links) - 인덱스 기준 최근 NEWS_MAX_TITLES개
         """
+        if self.is_warm(self.news_store.crawled_at(keyword)):
+            # 캐시 예열에서 이미 크롤링한 키워드
+            utils.count("cache.news.warm")
+            return self.news_store.latest(keyword, config.NEWS_MAX_TITLES)
+
         print(f"Crawling News for {keyword}...")
-        url = f"https://search.naver.com/search.naver?where=news&query={keyword}&sm=tab_opt&sort=1&photo=0&field=0&pd=0&ds=&de=&docid=&related=0&mynews=0&office_type=0&office_section_code=0&news_office_checked=&nso=so%3Add%2Cp%3Aall&is_sug_officeid=0"
-        
-        # utils에서 랜덤 헤더 가져오기
-        headers = utils.get_headers()
         
-        titles = []
-        links = []
+        # 처음 검색하는 키워드는 최근 N개만 받고, 이후에는 이미 본 기사가 나올 때까지 받음
+        first_crawl = not self.news_store.latest(keyword, 1)[0]
+        new_articles = []
+        crawled = False
         try:
-            # 랜덤 슬립으로 차단 방지
-            utils.random_sleep()
-            
-            response = requests.get(url, headers=headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            news_items = soup.select('.news_tit')
-            
-            for item in news_items:
-                titles.append(item.get_text())
-                links.append(item['href']) # 링크도 함께 수집
-                if len(titles) >= 10: # 최근 10개만 수집
+            for page in range(config.NEWS_MAX_PAGES):
+                articles = self._crawl_news_page(keyword, page * 10 + 1)
+                if not articles:
                     break
+                seen = self.news_store.seen_links(keyword, [link for title, link, published_at in articles])
+                reached_seen = False
+                for article in articles:
+                    if article[1] in seen:
+                        reached_seen = True
+                        break
+                    new_articles.append(article)
+                if reached_seen or (first_crawl and len(new_articles) >= config.NEWS_MAX_TITLES):
+                    break
+            crawled = True
         except Exception as e:
             print(f"Error crawling news: {e}")
-            utils.log_error(f"News Crawling Error ({keyword}): {e}")
-            
-        return titles, links
+            utils.log_error(f"News Crawling Error ({keyword}): {e}", ticker=ticker)
 
+        if not self.news_store.conn:
+            new_articles = new_articles[:config.NEWS_MAX_TITLES]
+            return [article[0] for article in new_articles], [article[1] for article in new_articles]
+
+        utils.count("news.new_articles", len(new_articles))
+        # 크롤링에 실패해도 이전에 저장된 기사는 사용
+        self.news_store.add_articles(keyword, new_articles, ticker)
+        if crawled:
+            self.news_store.mark_crawled(keyword)
+        return self.news_store.latest(keyword, config.NEWS_MAX_TITLES)
+
+    @utils.timed("http.naver")
+    def _crawl_news_page(self, keyword, start):
+        """
+        검색 결과 한 페이지 (start: 1, 11, 21, ...)
+        Returns: [(title, link, published_at)] 최신순
+        """
+        url = f"https://search.naver.com/search.naver?where=news&query={keyword}&sm=tab_opt&sort=1&photo=0&field=0&pd=0&ds=&de=&docid=&related=0&mynews=0&office_type=0&office_section_code=0&news_office_checked=&nso=so%3Add%2Cp%3Aall&is_sug_officeid=0&start={start}"
+        
+        # utils에서 랜덤 헤더 가져오기
+        headers = utils.get_headers()
+        
+        # 고정 슬립 대신 토큰 버킷으로 요청 속도 제한 (차단 방지)
+        self.news_rate_limiter.acquire()
+        
+        # 공유 세션으로 keep-alive 연결 재사용
+        utils.count("http.naver")
+        response = self.session.get(url, headers=headers, timeout=config.NEWS_TIMEOUT)
+        soup = BeautifulSoup(response.text, 'html.parser')
+        now = datetime.now()
+        articles = []
+        for item in soup.select('.news_tit'):
+            # 기사 시각은 같은 기사 영역의 '3시간 전', '2024.01.02.' 같은 표시에서 추출
+            area = item.find_parent(class_='news_area')
+            published_at = None
+            for info in (area.select('.info') if area else []):
+                published_at = utils.parse_news_time(info.get_text(), now)
+                if published_at:
+                    break
+            articles.append((item.get_text(), item['href'], published_at)) # 링크도 함께 수집
+        return articles
+
+    def get_news_sentiment_batch(self, keywords, tickers=None):
+        """
+        여러 키워드(종목명)의 뉴스를 동시에 크롤링합니다.
+        tickers: {keyword: 종목코드} - 뉴스 아카이브에 종목코드로 저장
+        Returns: {keyword: (titles, links)}
+        """
+        keywords = list(dict.fromkeys(keywords)) # 중복 제거 (순서 유지)
+        tickers = tickers or {}
+        if len(keywords) <= 1:
+            return {keyword: self.get_news_sentiment(keyword, tickers.get(keyword)) for keyword in keywords}
+
+        with ThreadPoolExecutor(max_workers=config.NEWS_MAX_WORKERS) as executor:
+            results = list(executor.map(utils.with_log_context(self.get_news_sentiment), keywords, [tickers.get(keyword) for keyword in keywords]))
+        return dict(zip(keywords, results))
+
+    @utils.timed("collector.get_supply_demand")
     def get_supply_demand(self, ticker):
         """
         pykrx를 사용하여 최근 3일간 외국인/기관 순매수 동향을 파악합니다.
+        load_supply_demand_index로 시장 전체 인덱스를 만들어 두었다면 네트워크 호출 없이 조회합니다.
         """
+        if self.supply_index is not None:
+            utils.count("cache.supply.hit")
+            return self.supply_index.get(ticker, (False, False))
+
         try:
             # pykrx는 티커만 있으면 됨 (한국 주식)
             from pykrx import stock
@@ -126,7 +408,9 @@ class DataCollector:
             start_date = (datetime.now() - timedelta(days=7)).strftime("%Y%m%d") # 넉넉하게 일주일 전부터
             
             # 투자자별 거래실적 추이 (순매수)
-            df = stock.get_market_net_purchases_of_equities_by_ticker(start_date, end_date, ticker)
+            utils.count("http.pykrx")
+            with utils.span("http.pykrx"):
+                df = stock.get_market_net_purchases_of_equities_by_ticker(start_date, end_date, ticker)
             
             # 최근 3일치 데이터 확인 (데이터가 적을 수 있으니 체크)
             if len(df) >= 3:
@@ -142,15 +426,91 @@ class DataCollector:
             
         except Exception as e:
             print(f"Error fetching supply/demand for {ticker}: {e}")
-            utils.log_error(f"Supply/Demand Error ({ticker}): {e}")
-            
-            
-        except Exception as e:
-            print(f"Error fetching supply/demand for {ticker}: {e}")
-            utils.log_error(f"Supply/Demand Error ({ticker}): {e}")
+            utils.log_error(f"Supply/Demand Error ({ticker}): {e}", ticker=ticker)
             
         return False, False
 
+    def get_recent_trading_days(self, count):
+        """
+        최근 count개 거래일(YYYYMMDD, 과거 -> 최근 순)을 반환합니다. (주말/휴일 제외)
+        """
+        from pykrx import stock
+
+        end = datetime.now()
+        start = end - timedelta(days=count * 2 + 10) # 연휴를 고려해 넉넉하게
+        utils.count("http.pykrx")
+        days = stock.get_previous_business_days(fromdate=start.strftime("%Y%m%d"), todate=end.strftime("%Y%m%d"))
+        return [pd.Timestamp(day).strftime("%Y%m%d") for day in days][-count:]
+
+    @utils.timed("collector.load_market_snapshots")
+    def load_market_snapshots(self, days=None):
+        """
+        최근 days 거래일의 KRX 전 종목 시세를 거래일당 한 번의 조회로 받아 날짜 x 종목 패널로 반환합니다.
+        이미 받아둔 거래일은 로컬 저장소에서 읽으므로 보통은 새 거래일 하나만 조회합니다.
+        Returns: {'Open'/'High'/'Low'/'Close'/'Volume': DataFrame(index=날짜, columns=종목코드)}
+        """
+        days = days or config.SNAPSHOT_DAYS
+        if self.market_snapshots is None:
+            self.market_snapshots = market_snapshot.MarketSnapshots(self.price_store)
+        since = None
+        try:
+            trading_days = self.get_recent_trading_days(days)
+            self.market_snapshots.update(trading_days)
+            since = trading_days[0] if trading_days else None
+        except Exception as e:
+            # 조회에 실패해도 이미 받아둔 스냅샷으로 분석
+            print(f"Error updating market snapshots: {e}")
+            utils.log_error(f"Market Snapshot Update Error: {e}")
+        return self.market_snapshots.load_panel(since)
+
+    @utils.timed("collector.load_supply_demand_index")
+    def load_supply_demand_index(self, days=None):
+        """
+        시장 전체 외국인/기관 순매수를 거래일별로 한 번씩만 조회하여
+        종목별 연속 순매수 여부 인덱스를 만듭니다. 이후 get_supply_demand는 딕셔너리 조회만 합니다.
+        Returns: {ticker: (foreigner_streak, institutional_streak)}
+        """
+        days = days or config.SUPPLY_STREAK_DAYS
+        try:
+            from pykrx import stock
+
+            # 최근 거래일부터 거슬러 올라가며 데이터가 있는 날만 사용 (장 마감 전에는 당일 데이터가 비어 있음)
+            trading_days = []
+            daily = {'외국인': [], '기관합계': []}
+            for date in reversed(self.get_recent_trading_days(days + 2)):
+                frames = {}
+                for investor in daily:
+                    utils.count("http.pykrx")
+                    with utils.span("http.pykrx"):
+                        frames[investor] = stock.get_market_net_purchases_of_equities(date, date, "ALL", investor)
+                if any(df is None or df.empty for df in frames.values()):
+                    utils.count("retry.supply_previous_day")
+                    continue
+                for investor, df in frames.items():
+                    daily[investor].append(set(df.index[df['순매수거래대금'] > 0]))
+                trading_days.insert(0, date)
+                if len(trading_days) == days:
+                    break
+            if len(trading_days) < days:
+                return None
+
+            # 투자자별로 "모든 거래일에 순매수였던 종목" 집합을 구함
+            streaks = {investor: set.intersection(*buyers) for investor, buyers in daily.items()}
+
+            foreigners = streaks['외국인']
+            institutions = streaks['기관합계']
+            self.supply_index = {
+                ticker: (ticker in foreigners, ticker in institutions)
+                for ticker in foreigners | institutions
+            }
+            utils.log_info(f"Supply/Demand index built: {len(self.supply_index)} tickers ({trading_days[0]}~{trading_days[-1]})")
+            return self.supply_index
+        except Exception as e:
+            print(f"Error building supply/demand index: {e}")
+            utils.log_error(f"Supply/Demand Index Error: {e}")
+            return None
+
+    @utils.timed("collector.get_market_trend")
     def get_market_trend(self):
         """
         코스피, 코스닥 지수의 20일 이동평균선 위치를 파악합니다.
@@ -160,7 +520,8 @@ class DataCollector:
         try:
             print("Checking Market Trend...")
             for symbol, name in [('KS11', 'KOSPI'), ('KQ11', 'KOSDAQ')]:
-                df = fdr.DataReader(symbol, '2024')
+                # 지수도 가격 저장소를 거쳐 증분 조회 (캐시 예열 대상)
+                df = self.get_price_history(symbol, '2024')
                 if len(df) >= 20:
                     current_price = df['Close'].iloc[-1]
                     ma20 = df['Close'].rolling(window=20).mean().iloc[-1]
@@ -177,16 +538,78 @@ class DataCollector:
             
         return trend
 
+    @utils.timed("collector.load_fundamental_snapshot")
+    def load_fundamental_snapshot(self):
+        """
+        가장 최근 거래일의 시가총액/PER/PBR/DIV를 시장 전체에 대해 한 번에 가져옵니다.
+        같은 날 다시 호출하면 로컬 저장소에 캐시된 스냅샷을 사용합니다. (주말/휴일에도 직전 거래일 기준)
+        Returns: {ticker: {'market_cap', 'per', 'pbr', 'div'}}
+        """
+        if self.fundamentals is not None:
+            return self.fundamentals
+
+        today = datetime.now().strftime("%Y%m%d")
+        try:
+            # 오늘 이미 받아둔 스냅샷이 있으면 재사용
+            if self.price_store.get_meta('fundamentals_fetched_on') == today:
+                as_of = self.price_store.get_meta('fundamentals_as_of')
+                snapshot = self.price_store.load_fundamentals(as_of)
+                if snapshot:
+                    utils.count("cache.fundamentals.hit")
+                    self.fundamentals = snapshot
+                    return snapshot
+            utils.count("cache.fundamentals.miss")
+
+            from pykrx import stock
+
+            # 최근 거래일부터 거슬러 올라가며 데이터가 있는 날을 찾음 (장중에는 당일 데이터가 비어 있을 수 있음)
+            for as_of in reversed(self.get_recent_trading_days(3)):
+                utils.count("http.pykrx")
+                with utils.span("http.pykrx"):
+                    cap_df = stock.get_market_cap(as_of, market="ALL")
+                if cap_df.empty:
+                    utils.count("retry.fundamentals_previous_day")
+                    continue
+                utils.count("http.pykrx")
+                with utils.span("http.pykrx"):
+                    fund_df = stock.get_market_fundamental(as_of, market="ALL")
+
+                snapshot = {}
+                for ticker, market_cap in cap_df['시가총액'].items():
+                    snapshot[ticker] = {'market_cap': int(market_cap), 'per': None, 'pbr': None, 'div': None}
+                for ticker, row in fund_df.iterrows():
+                    item = snapshot.setdefault(ticker, {'market_cap': 0})
+                    item['per'] = float(row['PER'])
+                    item['pbr'] = float(row['PBR'])
+                    item['div'] = float(row['DIV'])
+
+                self.price_store.save_fundamentals(as_of, snapshot)
+                self.price_store.set_meta('fundamentals_as_of', as_of)
+                self.price_store.set_meta('fundamentals_fetched_on', today)
+                utils.log_info(f"Fundamental snapshot loaded: {len(snapshot)} tickers (as of {as_of})")
+                self.fundamentals = snapshot
+                return snapshot
+        except Exception as e:
+            print(f"Error loading fundamental snapshot: {e}")
+            utils.log_error(f"Fundamental Snapshot Error: {e}")
+        return None
+
     def get_fundamental_data(self, ticker):
         """
         pykrx를 사용하여 시가총액, 영업이익 등 펀더멘털 데이터를 가져옵니다.
+        load_fundamental_snapshot으로 스냅샷을 받아두었다면 네트워크 호출 없이 조회합니다.
         """
+        if self.fundamentals is not None:
+            utils.count("cache.fundamentals.hit")
+            return self.fundamentals.get(ticker)
+
         try:
             from pykrx import stock
             # 오늘 날짜 기준
             date = datetime.now().strftime("%Y%m%d")
             
             # 1. 펀더멘털 (PER, PBR, DIV 등)
+            utils.count("http.pykrx", 2)
             df = stock.get_market_fundamental_by_date(date, date, ticker)
             
             # 2. 시가총액
@@ -1,82 +1,344 @@
 import sqlite3
+import hashlib
+import json
+import uuid
 import config
 import utils
 from datetime import datetime
 
+# DB 스키마 버전 (PRAGMA user_version). 스키마를 바꿀 때 올리고 _migrate_vN을 추가
+SCHEMA_VERSION = 3
+
+# 이어서 분석할 수 있는 (중단된) 실행 상태
+RESUMABLE_STATUSES = ('running', 'cancelled', 'failed')
+
+# 분석 점수/추천에 영향을 주는 설정 (이 값이 같으면 중단된 실행의 체크포인트를 이어서 사용)
+# 경로, 로그, 수집 속도, GUI/스케줄러 설정은 결과를 바꾸지 않으므로 제외
+SCORE_CONFIG_KEYS = (
+    'US_TICKERS', 'KOREA_MAPPING', 'NEWS_KEYWORDS', 'NEWS_KEYWORD_WEIGHTS',
+    'MA_SHORT', 'MA_LONG', 'RSI_PERIOD', 'RSI_OVERBOUGHT', 'PRICE_WINDOW',
+    'COUPLING_MODE', 'COUPLING_WINDOW', 'COUPLING_MIN_OBS', 'COUPLING_MIN_CORR', 'COUPLING_PRIOR_WEIGHT',
+    'COUPLING_PRIOR_CORR', 'COUPLING_PRIOR_BETA', 'COUPLING_PCT_PER_POINT', 'COUPLING_MAX_SCORE',
+    'KR_TOP_N', 'KR_UNIVERSE', 'SNAPSHOT_DAYS', 'KR_TOP_K',
+    'STRONG_BUY_SCORE', 'BUY_SCORE', 'SELL_SCORE',
+    'OPENAI_MODEL', 'NEWS_MAX_TITLES', 'SUPPLY_STREAK_DAYS',
+)
+
+def config_hash():
+    """
+    분석 결과에 영향을 주는 설정값(SCORE_CONFIG_KEYS)의 해시
+    """
+    values = {key: getattr(config, key, None) for key in SCORE_CONFIG_KEYS}
+    raw = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+def _json_default(value):
+    # numpy 정수/실수 등은 파이썬 값으로 변환
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
 class DBManager:
-    def __init__(self):
+    def __init__(self, db_path=None):
+        self.db_path = db_path or config.DB_PATH
         self.conn = None
         self.connect()
 
     def connect(self):
         try:
             # check_same_thread=False는 GUI 환경(스레드)에서 사용하기 위해 필요할 수 있음
-            self.conn = sqlite3.connect(config.DB_PATH, check_same_thread=False)
-            utils.log_info(f"SQLite DB Connected: {config.DB_PATH}")
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            # WAL 모드: 쓰는 동안에도 읽기가 막히지 않고, 커밋마다 fsync 하지 않음
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            utils.log_info(f"SQLite DB Connected: {self.db_path}")
             self.create_table()
         except Exception as e:
             utils.log_error(f"DB Connection Error: {e}")
 
     def create_table(self):
+        """
+        스키마 버전(PRAGMA user_version)을 확인하고 필요한 마이그레이션을 순서대로 적용합니다.
+        """
         if not self.conn: return
         try:
             cursor = self.conn.cursor()
-            # 분석 결과 저장 테이블 생성
-            # SQLite에서는 NUMBER 대신 INTEGER/REAL, VARCHAR2 대신 TEXT 사용
-            # AUTOINCREMENT를 위해 INTEGER PRIMARY KEY 사용
-            sql = """
-                CREATE TABLE IF NOT EXISTS STOCK_ANALYSIS (
-                    ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ANALYSIS_DATE TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    TICKER TEXT,
-                    NAME TEXT,
-                    SCORE REAL,
-                    RECOMMENDATION TEXT,
-                    BUY_PRICE INTEGER,
-                    TARGET_PRICE INTEGER,
-                    STOP_LOSS INTEGER,
-                    REASONS TEXT
-                )
-            """
-            cursor.execute(sql)
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                self._migrate_v1(cursor)
+            if version < 2:
+                self._migrate_v2(cursor)
+            if version < 3:
+                self._migrate_v3(cursor)
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             self.conn.commit()
-            utils.log_info("Table STOCK_ANALYSIS checked/created")
+            utils.log_info(f"DB schema checked (version {version} -> {SCHEMA_VERSION})")
         except Exception as e:
             utils.log_error(f"Table Creation Error: {e}")
 
-    def save_result(self, result):
+    def _migrate_v1(self, cursor):
+        # 분석 결과 저장 테이블 생성 (버전 관리 이전의 최초 스키마 그대로, 이후 변경은 다음 버전에서)
+        # SQLite에서는 NUMBER 대신 INTEGER/REAL, VARCHAR2 대신 TEXT 사용
+        # AUTOINCREMENT를 위해 INTEGER PRIMARY KEY 사용
+        sql = """
+            CREATE TABLE IF NOT EXISTS STOCK_ANALYSIS (
+                ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                ANALYSIS_DATE TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                TICKER TEXT,
+                NAME TEXT,
+                SCORE REAL,
+                RECOMMENDATION TEXT,
+                BUY_PRICE INTEGER,
+                TARGET_PRICE INTEGER,
+                STOP_LOSS INTEGER,
+                REASONS TEXT
+            )
+        """
+        cursor.execute(sql)
+
+    def _migrate_v2(self, cursor):
+        # 분석 실행(Run) 메타데이터
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS RUNS (
+                RUN_ID TEXT PRIMARY KEY,
+                STARTED_AT TIMESTAMP,
+                FINISHED_AT TIMESTAMP,
+                MARKET TEXT,
+                CONFIG_HASH TEXT,
+                STATUS TEXT
+            )
+        """)
+        # 실행별 결과 구분 (버전 관리 이전에 RUN_ID만 추가된 DB도 있으므로 컬럼별로 확인)
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(STOCK_ANALYSIS)")]
+        if 'RUN_ID' not in columns:
+            cursor.execute("ALTER TABLE STOCK_ANALYSIS ADD COLUMN RUN_ID TEXT")
+        if 'MARKET' not in columns:
+            cursor.execute("ALTER TABLE STOCK_ANALYSIS ADD COLUMN MARKET TEXT")
+
+        # 종목별 점수 이력 / 실행별 상위 종목 조회용 인덱스
+        cursor.execute("CREATE INDEX IF NOT EXISTS IDX_ANALYSIS_TICKER_DATE ON STOCK_ANALYSIS (TICKER, ANALYSIS_DATE)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS IDX_ANALYSIS_RUN_SCORE ON STOCK_ANALYSIS (RUN_ID, SCORE)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS IDX_RUNS_STARTED ON RUNS (STARTED_AT)")
+
+    def _migrate_v3(self, cursor):
+        # 종목별 중간 결과 (중단된 실행을 이어서 분석할 때 완료된 종목은 건너뜀)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS CHECKPOINTS (
+                RUN_ID TEXT NOT NULL,
+                MARKET TEXT NOT NULL,
+                TICKER TEXT NOT NULL,
+                RESULT TEXT,
+                SAVED_AT TIMESTAMP,
+                PRIMARY KEY (RUN_ID, MARKET, TICKER)
+            )
+        """)
+
+    # --- 실행(Run) 관리 ---
+
+    def begin_run(self, market, config_hash=None):
+        """
+        새 분석 실행을 등록하고 run_id를 반환합니다.
+        """
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6]
+        if not self.conn: return run_id
+        try:
+            with self.conn:
+                self.conn.execute("""
+                    INSERT INTO RUNS (RUN_ID, STARTED_AT, MARKET, CONFIG_HASH, STATUS)
+                    VALUES (?, ?, ?, ?, 'running')
+                """, (run_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), market, config_hash))
+        except Exception as e:
+            utils.log_error(f"DB Run Begin Error: {e}")
+        return run_id
+
+    def finish_run(self, run_id, status='finished'):
         if not self.conn: return
         try:
-            cursor = self.conn.cursor()
-            # Oracle의 :1, :2 대신 ? 사용
-            sql = """
-                INSERT INTO STOCK_ANALYSIS 
-                (TICKER, NAME, SCORE, RECOMMENDATION, BUY_PRICE, TARGET_PRICE, STOP_LOSS, REASONS)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            reasons_str = "\n".join(result['reasons'])
-            
-            # 추천 강도 문자열 변환
-            rec_str = "관망"
-            if result['score'] >= 3: rec_str = "강력 추천"
-            elif result['score'] >= 1: rec_str = "매수 추천"
-            elif result['score'] <= -2: rec_str = "매도 경고"
-
-            cursor.execute(sql, (
-                result['code'],
-                result['name'],
-                result['score'],
-                rec_str,
-                result['buy_price'],
-                result['target_price'],
-                result['stop_loss'],
-                reasons_str
-            ))
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE RUNS SET FINISHED_AT = ?, STATUS = ? WHERE RUN_ID = ?",
+                    (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), status, run_id)
+                )
+        except Exception as e:
+            utils.log_error(f"DB Run Finish Error: {e}")
+
+    def resume_run(self, run_id):
+        """
+        중단된 실행을 다시 'running' 상태로 되돌립니다.
+        """
+        if not self.conn: return
+        try:
+            with self.conn:
+                self.conn.execute("UPDATE RUNS SET FINISHED_AT = NULL, STATUS = 'running' WHERE RUN_ID = ?", (run_id,))
+        except Exception as e:
+            utils.log_error(f"DB Run Resume Error: {e}")
+
+    def get_resumable_run(self, config_hash=None, since=None):
+        """
+        이어서 분석할 수 있는 가장 최근 실행 (중단/실패, 같은 설정, since 이후 시작). 없으면 None
+        since 기본값은 오늘 (어제 시세로 계산한 중간 결과는 재사용하지 않음)
+        """
+        since = since or datetime.now().strftime("%Y-%m-%d")
+        sql = f"""
+            SELECT * FROM RUNS
+            WHERE STATUS IN ({",".join("?" * len(RESUMABLE_STATUSES))}) AND STARTED_AT >= ?
+        """
+        params = list(RESUMABLE_STATUSES) + [since]
+        if config_hash:
+            sql += " AND CONFIG_HASH = ?"
+            params.append(config_hash)
+        sql += " ORDER BY STARTED_AT DESC LIMIT 1"
+        rows = self._fetch_dicts(sql, params)
+        return rows[0] if rows else None
+
+    # --- 체크포인트 ---
+
+    def save_checkpoints(self, run_id, market, results):
+        """
+        완료된 종목 결과를 실행(run_id) 아래에 저장합니다. (묶음마다 한 트랜잭션)
+        """
+        if not self.conn or not results: return
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            rows = [
+                (run_id, market, result['code'], json.dumps(result, ensure_ascii=False, default=_json_default), now)
+                for result in results
+            ]
+            with self.conn:
+                self.conn.executemany("""
+                    INSERT OR REPLACE INTO CHECKPOINTS (RUN_ID, MARKET, TICKER, RESULT, SAVED_AT)
+                    VALUES (?, ?, ?, ?, ?)
+                """, rows)
+        except Exception as e:
+            utils.log_error(f"DB Checkpoint Save Error: {e}")
+
+    def load_checkpoints(self, run_id):
+        """
+        Returns: {market: {ticker: result}}
+        """
+        checkpoints = {}
+        for row in self._fetch_dicts("SELECT MARKET, TICKER, RESULT FROM CHECKPOINTS WHERE RUN_ID = ?", (run_id,)):
+            checkpoints.setdefault(row['MARKET'], {})[row['TICKER']] = json.loads(row['RESULT'])
+        return checkpoints
+
+    def clear_checkpoints(self, run_id):
+        if not self.conn: return
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM CHECKPOINTS WHERE RUN_ID = ?", (run_id,))
+        except Exception as e:
+            utils.log_error(f"DB Checkpoint Clear Error: {e}")
+
+    # --- 저장 ---
+
+    INSERT_SQL = """
+        INSERT INTO STOCK_ANALYSIS
+        (TICKER, NAME, SCORE, RECOMMENDATION, BUY_PRICE, TARGET_PRICE, STOP_LOSS, REASONS, RUN_ID, MARKET)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _to_row(self, result, run_id=None, market=None):
+        # Oracle의 :1, :2 대신 ? 사용
+        return (
+            result['code'],
+            result['name'],
+            result['score'],
+            utils.get_recommendation(result['score']), # 추천 강도 문자열 (GUI와 같은 기준)
+            result['buy_price'],
+            result['target_price'],
+            result['stop_loss'],
+            "\n".join(result['reasons']),
+            run_id,
+            market
+        )
+
+    def save_result(self, result, run_id=None, market=None):
+        if not self.conn: return
+        try:
+            self.conn.execute(self.INSERT_SQL, self._to_row(result, run_id, market))
             self.conn.commit()
-            utils.log_info(f"Saved result for {result['name']}")
+            utils.log_info(f"Saved result for {result['name']}", ticker=result['code'])
         except Exception as e:
             utils.log_error(f"DB Save Error: {e}")
 
+    @utils.timed("db.save_results")
+    def save_results(self, results, run_id=None, market=None):
+        """
+        한 번의 분석 결과 전체를 하나의 트랜잭션(executemany)으로 저장합니다.
+        """
+        if not self.conn or not results: return
+        try:
+            rows = [self._to_row(result, run_id, market) for result in results]
+            with self.conn: # 성공 시 commit, 실패 시 rollback
+                self.conn.executemany(self.INSERT_SQL, rows)
+            utils.log_info(f"Saved {len(rows)} results (run {run_id})")
+        except Exception as e:
+            utils.log_error(f"DB Bulk Save Error: {e}")
+
+    # --- 조회 ---
+
+    def _fetch_dicts(self, sql, params=()):
+        if not self.conn: return []
+        try:
+            cursor = self.conn.execute(sql, params)
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            utils.log_error(f"DB Query Error: {e}")
+            return []
+
+    def get_runs(self, limit=20, market=None):
+        """
+        최근 분석 실행 목록 (최신순)
+        """
+        sql = "SELECT * FROM RUNS"
+        params = []
+        if market:
+            sql += " WHERE MARKET = ?"
+            params.append(market)
+        sql += " ORDER BY STARTED_AT DESC LIMIT ?"
+        params.append(limit)
+        return self._fetch_dicts(sql, params)
+
+    def get_score_history(self, ticker, since=None, limit=None):
+        """
+        종목의 점수 이력 (오래된 순). (TICKER, ANALYSIS_DATE) 인덱스 사용
+        """
+        sql = """
+            SELECT ANALYSIS_DATE, RUN_ID, SCORE, RECOMMENDATION
+            FROM STOCK_ANALYSIS WHERE TICKER = ?
+        """
+        params = [ticker]
+        if since:
+            sql += " AND ANALYSIS_DATE >= ?"
+            params.append(since)
+        if limit:
+            # 최근 limit개를 오래된 순으로
+            sql = f"SELECT * FROM ({sql} ORDER BY ANALYSIS_DATE DESC LIMIT ?) ORDER BY ANALYSIS_DATE"
+            params.append(limit)
+        else:
+            sql += " ORDER BY ANALYSIS_DATE"
+        return self._fetch_dicts(sql, params)
+
+    def get_top_results(self, run_id, n=10, market=None):
+        """
+        실행(run_id)의 점수 상위 n개 결과. (RUN_ID, SCORE) 인덱스 사용
+        """
+        sql = """
+            SELECT TICKER, NAME, SCORE, RECOMMENDATION, BUY_PRICE, TARGET_PRICE, STOP_LOSS, REASONS, MARKET
+            FROM STOCK_ANALYSIS WHERE RUN_ID = ?
+        """
+        params = [run_id]
+        if market:
+            sql += " AND MARKET = ?"
+            params.append(market)
+        sql += " ORDER BY SCORE DESC LIMIT ?"
+        params.append(n)
+        rows = self._fetch_dicts(sql, params)
+        for row in rows:
+            row['REASONS'] = row['REASONS'].split("\n") if row['REASONS'] else []
+        return rows
+
     def close(self):
         if self.conn:
             self.conn.close()
@@ -0,0 +1,217 @@
+import math
+from collections import deque
+import pandas as pd
+import config
+
+# 볼린저 밴드 / 거래량 평균 윈도우 (Analyzer.analyze_chart와 동일)
+BOLLINGER_WINDOW = 20
+VOLUME_WINDOW = 5
+
+# 누적 합의 부동소수점 오차가 쌓이지 않도록 주기적으로 윈도우에서 다시 계산
+RESYNC_INTERVAL = 250
+
+class IndicatorState:
+    """
+    종목별 이동평균/RSI/볼린저밴드 지표를 봉 단위로 갱신하는 증분 계산 상태.
+    윈도우와 누적 합만 들고 있으므로 새 봉 하나를 반영하는 비용은 전체 기간 길이와 무관합니다.
+    값은 analyze_chart의 rolling 계산 결과와 같습니다.
+    """
+    def __init__(self):
+        self.last_date = None
+        self.count = 0
+        self.updates = 0
+
+        self.closes = deque(maxlen=max(config.MA_LONG, config.MA_SHORT, BOLLINGER_WINDOW))
+        self.gains = deque(maxlen=config.RSI_PERIOD)
+        self.losses = deque(maxlen=config.RSI_PERIOD)
+        self.volumes = deque(maxlen=VOLUME_WINDOW + 1) # 직전 5일 평균 + 당일
+
+        self.sum_short = 0.0
+        self.sum_long = 0.0
+        self.sum_bb = 0.0
+        self.sumsq_bb = 0.0
+        self.sum_gain = 0.0
+        self.sum_loss = 0.0
+
+        # 직전 봉 시점의 지표 (골든크로스/RSI 돌파 판단용)
+        self.prev_ma_short = math.nan
+        self.prev_ma_long = math.nan
+        self.prev_rsi = math.nan
+
+        # 같은 날짜 봉이 다시 들어오면(장중 갱신) 되돌리기 위한 직전 상태
+        self._undo = None
+
+    # --- 갱신 ---
+
+    def update(self, date, close, volume):
+        """
+        봉 하나를 반영합니다. 마지막 봉과 같은 날짜면 그 봉을 새 값으로 교체합니다.
+        종가가 없는(NaN) 봉은 거래가 없는 날로 보고 건너뜁니다. (누적 합이 NaN이 되지 않도록)
+        """
+        close = float(close)
+        if math.isnan(close):
+            return
+        volume = float(volume)
+        if math.isnan(volume):
+            volume = 0.0
+
+        date = pd.Timestamp(date).strftime("%Y-%m-%d")
+        if self.last_date is not None and date < self.last_date:
+            return # 이미 반영된 과거 봉
+        if date == self.last_date:
+            if self._undo is None:
+                return # 되돌릴 상태가 없으면 교체할 수 없음
+            self._restore(self._undo)
+
+        self._undo = self.to_dict(include_undo=False)
+
+        prev_close = self.closes[-1] if self.closes else None
+
+        self.prev_ma_short = self.ma_short
+        self.prev_ma_long = self.ma_long
+        self.prev_rsi = self.rsi
+
+        # 윈도우에서 빠지는 값 제거 후 새 값 추가
+        self.sum_short += close - (self.closes[-config.MA_SHORT] if len(self.closes) >= config.MA_SHORT else 0.0)
+        self.sum_long += close - (self.closes[-config.MA_LONG] if len(self.closes) >= config.MA_LONG else 0.0)
+        if len(self.closes) >= BOLLINGER_WINDOW:
+            old = self.closes[-BOLLINGER_WINDOW]
+            self.sum_bb -= old
+            self.sumsq_bb -= old * old
+        self.sum_bb += close
+        self.sumsq_bb += close * close
+        self.closes.append(close)
+
+        # 첫 봉의 변화량은 NaN -> rolling 코드에서는 0으로 취급됨
+        delta = close - prev_close if prev_close is not None else 0.0
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if len(self.gains) == self.gains.maxlen:
+            self.sum_gain -= self.gains[0]
+            self.sum_loss -= self.losses[0]
+        self.gains.append(gain)
+        self.losses.append(loss)
+        self.sum_gain += gain
+        self.sum_loss += loss
+
+        self.volumes.append(volume)
+
+        self.count += 1
+        self.updates += 1
+        self.last_date = date
+        if self.updates % RESYNC_INTERVAL == 0:
+            self._resync()
+
+    def update_from_df(self, df):
+        """
+        DataFrame에서 마지막 반영일 이후(당일 포함) 봉만 반영합니다.
+        """
+        if df is None or len(df) == 0:
+            return
+        if self.last_date is not None:
+            df = df[df.index >= pd.Timestamp(self.last_date)]
+        volumes = df['Volume'] if 'Volume' in df.columns else pd.Series(0, index=df.index)
+        for date, close, volume in zip(df.index, df['Close'], volumes):
+            self.update(date, close, volume)
+
+    def _resync(self):
+        closes = list(self.closes)
+        self.sum_short = math.fsum(closes[-config.MA_SHORT:])
+        self.sum_long = math.fsum(closes[-config.MA_LONG:])
+        self.sum_bb = math.fsum(closes[-BOLLINGER_WINDOW:])
+        self.sumsq_bb = math.fsum(c * c for c in closes[-BOLLINGER_WINDOW:])
+        self.sum_gain = math.fsum(self.gains)
+        self.sum_loss = math.fsum(self.losses)
+
+    # --- 현재 지표 값 ---
+
+    @property
+    def ma_short(self):
+        return self.sum_short / config.MA_SHORT if self.count >= config.MA_SHORT else math.nan
+
+    @property
+    def ma_long(self):
+        return self.sum_long / config.MA_LONG if self.count >= config.MA_LONG else math.nan
+
+    @property
+    def rsi(self):
+        if len(self.gains) < config.RSI_PERIOD:
+            return math.nan
+        gain = self.sum_gain / config.RSI_PERIOD
+        loss = self.sum_loss / config.RSI_PERIOD
+        if loss == 0:
+            return 100.0 if gain > 0 else math.nan
+        return 100 - (100 / (1 + gain / loss))
+
+    @property
+    def std(self):
+        n = BOLLINGER_WINDOW
+        if self.count < n:
+            return math.nan
+        variance = (self.sumsq_bb - self.sum_bb * self.sum_bb / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    @property
+    def close(self):
+        return self.closes[-1] if self.closes else math.nan
+
+    @property
+    def volume(self):
+        return self.volumes[-1] if self.volumes else math.nan
+
+    @property
+    def prev_volume_ma(self):
+        """
+        당일을 제외한 직전 5일 평균 거래량
+        """
+        if len(self.volumes) <= VOLUME_WINDOW:
+            return math.nan
+        return sum(list(self.volumes)[:-1]) / VOLUME_WINDOW
+
+    # --- 저장/복원 ---
+
+    @staticmethod
+    def params():
+        # 설정이 바뀌면 저장된 상태를 버리고 다시 계산하기 위한 식별값
+        return [config.MA_SHORT, config.MA_LONG, config.RSI_PERIOD, BOLLINGER_WINDOW, VOLUME_WINDOW]
+
+    def to_dict(self, include_undo=True):
+        data = {
+            'params': self.params(),
+            'last_date': self.last_date,
+            'count': self.count,
+            'updates': self.updates,
+            'closes': list(self.closes),
+            'gains': list(self.gains),
+            'losses': list(self.losses),
+            'volumes': list(self.volumes),
+            'sums': [self.sum_short, self.sum_long, self.sum_bb, self.sumsq_bb, self.sum_gain, self.sum_loss],
+            'prev': [self.prev_ma_short, self.prev_ma_long, self.prev_rsi],
+        }
+        if include_undo:
+            data['undo'] = self._undo
+        return data
+
+    def _restore(self, data):
+        self.last_date = data['last_date']
+        self.count = data['count']
+        self.updates = data['updates']
+        self.closes = deque(data['closes'], maxlen=self.closes.maxlen)
+        self.gains = deque(data['gains'], maxlen=self.gains.maxlen)
+        self.losses = deque(data['losses'], maxlen=self.losses.maxlen)
+        self.volumes = deque(data['volumes'], maxlen=self.volumes.maxlen)
+        (self.sum_short, self.sum_long, self.sum_bb, self.sumsq_bb,
+         self.sum_gain, self.sum_loss) = data['sums']
+        self.prev_ma_short, self.prev_ma_long, self.prev_rsi = data['prev']
+        self._undo = data.get('undo')
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        저장된 상태를 복원합니다. 지표 설정이 달라졌으면 None을 반환합니다.
+        """
+        if data.get('params') != cls.params():
+            return None
+        state = cls()
+        state._restore(data)
+        return state
@@ -0,0 +1,125 @@
+import hashlib
+from collections import deque
+import config
+
+# 제목 구분자 (키워드/제목에 포함되지 않는 문자)
+TITLE_SEPARATOR = "\x00"
+
+POLARITY_SIGNS = {'positive': 1, 'negative': -1}
+POLARITY_LABELS = {'positive': "호재", 'negative': "악재"}
+
+class KeywordMatcher:
+    """
+    뉴스 키워드 다중 패턴 매칭기 (Aho-Corasick).
+    키워드 설정으로 오토마톤을 한 번 만들어 두고, 제목 묶음 전체를 한 번에 훑어
+    제목 x 키워드 수만큼의 부분 문자열 검사를 피합니다.
+    제목 하나당 극성(호재/악재)별로 한 번만 점수를 매기며, 여러 키워드가 있으면
+    가중치가 가장 큰 키워드를, 가중치가 같으면 설정 순서가 앞선 키워드를 사용합니다.
+    """
+    def __init__(self, keywords=None, weights=None):
+        keywords = config.NEWS_KEYWORDS if keywords is None else keywords
+        weights = config.NEWS_KEYWORD_WEIGHTS if weights is None else weights
+
+        self.patterns = [] # (극성, 키워드, 가중치, 설정 순서)
+        for polarity in POLARITY_SIGNS:
+            for rank, keyword in enumerate(keywords.get(polarity, [])):
+                if not keyword or TITLE_SEPARATOR in keyword:
+                    continue
+                self.patterns.append((polarity, keyword, weights.get(keyword, 1), rank))
+
+        # 키워드/가중치 설정 버전 (저장해 둔 기사별 점수가 현재 설정으로 계산된 것인지 확인)
+        self.version = hashlib.sha1(repr(self.patterns).encode('utf-8')).hexdigest()[:12]
+
+        self.goto = [{}] # 상태별 전이
+        self.fail = [0]
+        self.output = [[]] # 상태에서 끝나는 패턴 번호
+        self._build()
+
+    def _build(self):
+        for index, (polarity, keyword, weight, rank) in enumerate(self.patterns):
+            state = 0
+            for ch in keyword:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state].append(index)
+
+        # BFS로 실패 링크 계산, 출력은 실패 링크를 따라 합쳐 둠
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(ch, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def max_weight(self, polarity):
+        """
+        제목 하나가 얻을 수 있는 극성별 최대 가중치
+        """
+        return max((weight for p, keyword, weight, rank in self.patterns if p == polarity), default=0)
+
+    def match_titles(self, titles):
+        """
+        제목 묶음을 한 번에 훑어 제목별로 극성마다 대표 키워드(패턴 번호)를 고릅니다.
+        Returns: [{polarity: pattern_index}] (titles와 같은 순서)
+        """
+        matches = [{} for _ in titles]
+        if not self.patterns or not titles:
+            return matches
+
+        goto, fail, output, patterns = self.goto, self.fail, self.output, self.patterns
+        title_index = 0
+        state = 0
+        for ch in TITLE_SEPARATOR.join(title.replace(TITLE_SEPARATOR, " ") for title in titles):
+            if ch == TITLE_SEPARATOR:
+                title_index += 1
+                state = 0
+                continue
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in output[state]:
+                polarity, keyword, weight, rank = patterns[index]
+                best = matches[title_index].get(polarity)
+                if best is None or (weight, -rank) > (patterns[best][2], -patterns[best][3]):
+                    matches[title_index][polarity] = index
+        return matches
+
+    def score_each(self, titles):
+        """
+        Returns: [(score, reasons)] 제목별 점수 - 호재 키워드는 +가중치, 악재 키워드는 -가중치
+        """
+        results = []
+        for title_matches in self.match_titles(titles):
+            score = 0
+            reasons = []
+            for polarity in POLARITY_SIGNS:
+                if polarity not in title_matches:
+                    continue
+                index = title_matches[polarity]
+                keyword, weight = self.patterns[index][1], self.patterns[index][2]
+                score += POLARITY_SIGNS[polarity] * weight
+                reason = f"{POLARITY_LABELS[polarity]} 뉴스: {keyword} 포함"
+                if weight != 1:
+                    reason += f" ({POLARITY_SIGNS[polarity] * weight:+g}점)"
+                reasons.append(reason)
+            results.append((score, reasons))
+        return results
+
+    def score_titles(self, titles):
+        """
+        Returns: (score, reasons) 제목 묶음 전체 합계
+        """
+        score = 0
+        reasons = []
+        for title_score, title_reasons in self.score_each(titles):
+            score += title_score
+            reasons.extend(title_reasons)
+        return score, reasons
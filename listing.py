@@ -0,0 +1,111 @@
+from datetime import datetime
+import FinanceDataReader as fdr
+import pandas as pd
+import utils
+
+class KrxListing:
+    """
+    KRX 상장 종목 목록 캐시.
+    fdr.StockListing('KRX')는 하루에 한 번만 받아 로컬 저장소에 보관하고,
+    코드->종목명, 코드->시가총액, 종목명->코드 조회는 미리 만들어 둔 딕셔너리로 처리합니다.
+    """
+    def __init__(self, store):
+        self.store = store
+        self.code_to_name = {}
+        self.code_to_marcap = {}
+        self.code_to_market = {}
+        self.name_to_code = {}
+        self.codes_by_marcap = [] # 시가총액 내림차순
+        self.create_table()
+
+    def create_table(self):
+        if not self.store.conn: return
+        try:
+            with self.store.lock:
+                self.store.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS KRX_LISTING (
+                        CODE TEXT PRIMARY KEY,
+                        NAME TEXT,
+                        MARKET TEXT,
+                        MARCAP REAL
+                    )
+                """)
+                self.store.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Listing Table Creation Error: {e}")
+
+    def load(self, force=False):
+        """
+        오늘 받아둔 목록이 있으면 로컬 캐시를, 없으면 새로 받아 저장한 뒤 인덱스를 만듭니다.
+        새로 받기에 실패하면 이전에 저장된 목록을 그대로 사용합니다.
+        """
+        today = datetime.now().strftime("%Y%m%d")
+        rows = []
+        if not force and self.store.get_meta('listing_fetched_on') == today:
+            rows = self._load_rows()
+            utils.count("cache.listing.hit" if rows else "cache.listing.miss")
+
+        if not rows:
+            try:
+                utils.count("http.fdr")
+                with utils.span("http.fdr.listing"):
+                    df = fdr.StockListing('KRX')
+                markets = df['Market'] if 'Market' in df.columns else [''] * len(df)
+                rows = [
+                    (str(code), str(name), str(market), float(marcap) if pd.notna(marcap) else 0.0)
+                    for code, name, market, marcap in zip(df['Code'], df['Name'], markets, df['Marcap'])
+                ]
+                self._save_rows(rows)
+                self.store.set_meta('listing_fetched_on', today)
+                utils.log_info(f"KRX listing refreshed: {len(rows)} stocks")
+            except Exception as e:
+                print(f"Error fetching KRX listing: {e}")
+                utils.log_error(f"KRX Listing Error: {e}")
+                rows = self._load_rows() # 오래된 캐시라도 사용
+
+        self._build_index(rows)
+        return self
+
+    def _load_rows(self):
+        if not self.store.conn: return []
+        with self.store.lock:
+            return self.store.conn.execute("SELECT CODE, NAME, MARKET, MARCAP FROM KRX_LISTING").fetchall()
+
+    def _save_rows(self, rows):
+        if not self.store.conn or not rows: return
+        with self.store.lock:
+            self.store.conn.execute("DELETE FROM KRX_LISTING")
+            self.store.conn.executemany(
+                "INSERT OR REPLACE INTO KRX_LISTING (CODE, NAME, MARKET, MARCAP) VALUES (?, ?, ?, ?)", rows
+            )
+            self.store.conn.commit()
+
+    def _build_index(self, rows):
+        self.code_to_name = {code: name for code, name, market, marcap in rows}
+        self.code_to_marcap = {code: marcap or 0.0 for code, name, market, marcap in rows}
+        self.code_to_market = {code: market for code, name, market, marcap in rows}
+        self.name_to_code = {name: code for code, name, market, marcap in rows}
+        self.codes_by_marcap = sorted(self.code_to_marcap, key=self.code_to_marcap.get, reverse=True)
+
+    # --- 조회 ---
+
+    def name(self, code, default=None):
+        return self.code_to_name.get(code, default)
+
+    def market_cap(self, code, default=0):
+        return self.code_to_marcap.get(code, default)
+
+    def code(self, name, default=None):
+        return self.name_to_code.get(name, default)
+
+    def top_by_marcap(self, n):
+        """
+        시가총액 상위 n개 종목코드
+        """
+        return self.codes_by_marcap[:n]
+
+    def __contains__(self, code):
+        return code in self.code_to_name
+
+    def __len__(self):
+        return len(self.code_to_name)
@@ -0,0 +1,194 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import config
+import utils
+import price_window
+
+class MarketSnapshots:
+    """
+    KRX 전 종목 일별 시세 스냅샷 캐시.
+    종목별로 일봉을 받는 대신 거래일마다 한 번씩 시장 전체 OHLCV(pykrx get_market_ohlcv_by_ticker)를 받아
+    로컬 저장소에 쌓고, 날짜 x 종목 패널로 읽어 전 종목을 한 번에 분석합니다.
+    이미 받은 거래일은 다시 받지 않으므로 매일 새 거래일 하나만 추가로 받습니다.
+    """
+    FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+    def __init__(self, store):
+        self.store = store
+        self.create_table()
+
+    def create_table(self):
+        if not self.store.conn: return
+        try:
+            with self.store.lock:
+                self.store.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS OHLCV_SNAPSHOT (
+                        DATE TEXT NOT NULL,
+                        TICKER TEXT NOT NULL,
+                        OPEN REAL,
+                        HIGH REAL,
+                        LOW REAL,
+                        CLOSE REAL,
+                        VOLUME INTEGER,
+                        PRIMARY KEY (DATE, TICKER)
+                    )
+                """)
+                # 받아둔 거래일 (FETCHED_AT이 거래일 당일이면 장중 스냅샷이므로 다시 받음)
+                self.store.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS SNAPSHOT_DATES (
+                        DATE TEXT PRIMARY KEY,
+                        TICKERS INTEGER,
+                        FETCHED_AT TIMESTAMP
+                    )
+                """)
+                self.store.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Snapshot Table Creation Error: {e}")
+
+    def stored_dates(self):
+        """
+        Returns: {date('YYYYMMDD'): fetched_at}
+        """
+        if not self.store.conn: return {}
+        with self.store.lock:
+            rows = self.store.conn.execute("SELECT DATE, FETCHED_AT FROM SNAPSHOT_DATES").fetchall()
+        return dict(rows)
+
+    def update(self, trading_days, now=None):
+        """
+        trading_days(YYYYMMDD, 과거 -> 최근) 중 아직 없는 거래일만 받고, 기간 밖의 오래된 스냅샷은 지웁니다.
+        Returns: 새로 받은 거래일 수
+        """
+        now = now or datetime.now()
+        stored = self.stored_dates()
+        fetched = 0
+        for date in trading_days:
+            fetched_at = stored.get(date)
+            # 거래일 당일에 받은 스냅샷은 장중 시세일 수 있으므로 다시 받음
+            if fetched_at and fetched_at[:10].replace("-", "") > date:
+                continue
+            rows = self._fetch_day(date)
+            if rows:
+                self._save_day(date, rows, now)
+                fetched += 1
+        if trading_days:
+            self._prune(trading_days[0])
+        utils.log_info(f"Market snapshots updated: {fetched} new day(s), {len(trading_days)} day window")
+        return fetched
+
+    def _fetch_day(self, date):
+        """
+        하루치 전 종목 시세. 거래가 없는 종목(거래정지 등)은 봉이 없는 것으로 봅니다.
+        Returns: [(ticker, open, high, low, close, volume)]
+        """
+        try:
+            from pykrx import stock
+
+            utils.count("http.pykrx")
+            with utils.span("http.pykrx.ohlcv_snapshot"):
+                df = stock.get_market_ohlcv_by_ticker(date, market="ALL")
+        except Exception as e:
+            print(f"Error fetching market snapshot ({date}): {e}")
+            utils.log_error(f"Market Snapshot Error ({date}): {e}")
+            return []
+        if df is None or df.empty:
+            return []
+        df = df[(df['거래량'] > 0) & (df['종가'] > 0)]
+        return [
+            (str(ticker), float(o), float(h), float(l), float(c), int(v))
+            for ticker, o, h, l, c, v in zip(df.index, df['시가'], df['고가'], df['저가'], df['종가'], df['거래량'])
+        ]
+
+    def _save_day(self, date, rows, now):
+        day = pd.Timestamp(date).strftime("%Y-%m-%d")
+        try:
+            with self.store.lock:
+                self.store.conn.execute("DELETE FROM OHLCV_SNAPSHOT WHERE DATE = ?", (day,))
+                self.store.conn.executemany("""
+                    INSERT INTO OHLCV_SNAPSHOT (DATE, TICKER, OPEN, HIGH, LOW, CLOSE, VOLUME)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [(day,) + row for row in rows])
+                self.store.conn.execute(
+                    "INSERT OR REPLACE INTO SNAPSHOT_DATES (DATE, TICKERS, FETCHED_AT) VALUES (?, ?, ?)",
+                    (date, len(rows), now.strftime("%Y-%m-%d %H:%M:%S"))
+                )
+                self.store.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Market Snapshot Save Error ({date}): {e}")
+
+    def _prune(self, oldest):
+        try:
+            with self.store.lock:
+                self.store.conn.execute("DELETE FROM OHLCV_SNAPSHOT WHERE DATE < ?", (pd.Timestamp(oldest).strftime("%Y-%m-%d"),))
+                self.store.conn.execute("DELETE FROM SNAPSHOT_DATES WHERE DATE < ?", (oldest,))
+                self.store.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Market Snapshot Prune Error: {e}")
+
+    def load_panel(self, since=None):
+        """
+        저장된 스냅샷을 날짜 x 종목 패널로 읽습니다. (봉이 없는 날은 NaN)
+        Returns: {'Open'/'High'/'Low'/'Close'/'Volume': DataFrame(index=날짜, columns=종목코드)}
+        """
+        if not self.store.conn:
+            return {field: pd.DataFrame() for field in self.FIELDS}
+        sql = "SELECT DATE, TICKER, OPEN, HIGH, LOW, CLOSE, VOLUME FROM OHLCV_SNAPSHOT"
+        params = []
+        if since:
+            sql += " WHERE DATE >= ?"
+            params.append(pd.Timestamp(since).strftime("%Y-%m-%d"))
+        with self.store.lock:
+            rows = self.store.conn.execute(sql, params).fetchall()
+        if not rows:
+            return {field: pd.DataFrame() for field in self.FIELDS}
+
+        dates, tickers = zip(*[(row[0], row[1]) for row in rows])
+        date_index = pd.DatetimeIndex(sorted(set(dates)))
+        ticker_index = sorted(set(tickers))
+        date_pos = date_index.get_indexer(pd.to_datetime(dates))
+        ticker_pos = pd.Index(ticker_index).get_indexer(tickers)
+        values = np.array([row[2:] for row in rows], dtype='float64')
+
+        panels = {}
+        for i, field in enumerate(self.FIELDS):
+            arr = np.full((len(date_index), len(ticker_index)), np.nan)
+            arr[date_pos, ticker_pos] = values[:, i]
+            panels[field] = pd.DataFrame(arr, index=date_index, columns=ticker_index)
+        return panels
+
+    @staticmethod
+    def market_data(panels, codes, lookback=None):
+        """
+        패널에서 종목별 시세 레코드(price_window.MarketRecord)를 만듭니다.
+        (DataCollector.get_korea_market_data와 같은 형식, 최근 lookback개 봉만 보관)
+        """
+        close = panels['Close']
+        columns = {code: i for i, code in enumerate(close.columns)}
+        dates = close.index.values
+        arrays = {field: panels[field].to_numpy() for field in price_window.PriceWindow.COLUMNS}
+        lookback = lookback or config.PRICE_WINDOW
+        data = {}
+        for code in codes:
+            j = columns.get(code)
+            if j is None:
+                continue
+            has_bar = ~np.isnan(arrays['Close'][:, j])
+            rows = np.flatnonzero(has_bar)[-lookback:]
+            if len(rows) == 0:
+                continue
+            window = price_window.PriceWindow(
+                dates[rows], arrays['Open'][rows, j].astype('float32'), arrays['Close'][rows, j].astype('float32'),
+                np.nan_to_num(arrays['Volume'][rows, j]).astype('int64')
+            )
+            last_close = float(arrays['Close'][rows[-1], j])
+            prev_close = float(arrays['Close'][rows[-2], j]) if len(rows) >= 2 else last_close
+            change_rate = (last_close - prev_close) / prev_close * 100 if len(rows) >= 2 else 0.0
+            data[code] = price_window.MarketRecord(
+                price=int(last_close),
+                prev_close=int(prev_close),
+                change_rate=round(change_rate, 2),
+                volume=int(window.volume[-1]),
+                window=window
+            )
+        return data
@@ -0,0 +1,289 @@
+import sqlite3
+import json
+import threading
+from datetime import datetime, timedelta
+import config
+import utils
+
+# FTS5 trigram 토크나이저는 3글자 이상 검색어만 색인으로 찾을 수 있음 (짧은 검색어는 LIKE로 검색)
+FTS_MIN_QUERY_LENGTH = 3
+
+class NewsStore:
+    """
+    크롤링한 뉴스 기사 인덱스 (검색 키워드 + 링크 기준).
+    이미 본 기사는 다시 받지 않고, 기사별 키워드/LLM 점수도 함께 저장해 새 기사만 분석합니다.
+    제목은 FTS5 전문 검색 색인에도 넣어 두어, 종목/기간/검색어로 과거 뉴스를 네트워크 없이 조회할 수 있습니다.
+    """
+    def __init__(self, db_path=None):
+        self.db_path = db_path or config.NEWS_DB_PATH
+        self.conn = None
+        # 뉴스 크롤링 스레드들이 같은 커넥션을 쓰므로 직렬화
+        self.lock = threading.Lock()
+        self.fts_enabled = False # SQLite에 FTS5(trigram)가 없으면 LIKE 검색으로 대체
+        self.connect()
+
+    def connect(self):
+        try:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            utils.log_info(f"News Store Connected: {self.db_path}")
+            self.create_table()
+        except Exception as e:
+            utils.log_error(f"News Store Connection Error: {e}")
+
+    def create_table(self):
+        if not self.conn: return
+        try:
+            cursor = self.conn.cursor()
+            # KW_VERSION: 키워드 설정이 바뀌면 키워드 점수를 다시 계산
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS NEWS_ARTICLES (
+                    KEYWORD TEXT NOT NULL,
+                    LINK TEXT NOT NULL,
+                    TITLE TEXT,
+                    FIRST_SEEN TIMESTAMP,
+                    KW_VERSION TEXT,
+                    KW_SCORE REAL,
+                    KW_REASONS TEXT,
+                    LLM_MODEL TEXT,
+                    LLM_SCORE REAL,
+                    LLM_REASON TEXT,
+                    PRIMARY KEY (KEYWORD, LINK)
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS IDX_NEWS_KEYWORD ON NEWS_ARTICLES (KEYWORD, FIRST_SEEN)")
+            # 같은 기사가 여러 종목 검색에 나와도 점수는 링크 단위로 공유
+            cursor.execute("CREATE INDEX IF NOT EXISTS IDX_NEWS_LINK ON NEWS_ARTICLES (LINK)")
+
+            # 이전 버전 DB에는 종목코드/기사 시각 컬럼이 없으므로 추가 (기사 시각은 처음 본 시각으로 채움)
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(NEWS_ARTICLES)")]
+            if 'TICKER' not in columns:
+                cursor.execute("ALTER TABLE NEWS_ARTICLES ADD COLUMN TICKER TEXT")
+            if 'PUBLISHED_AT' not in columns:
+                cursor.execute("ALTER TABLE NEWS_ARTICLES ADD COLUMN PUBLISHED_AT TIMESTAMP")
+                cursor.execute("UPDATE NEWS_ARTICLES SET PUBLISHED_AT = FIRST_SEEN")
+            if 'LLM_SCORED_AT' not in columns:
+                # LLM 점수 분석 시각 (LLM_CACHE_TTL_HOURS가 지난 점수는 다시 분석, 기존 점수는 만료된 것으로 봄)
+                cursor.execute("ALTER TABLE NEWS_ARTICLES ADD COLUMN LLM_SCORED_AT TIMESTAMP")
+            cursor.execute("CREATE INDEX IF NOT EXISTS IDX_NEWS_TICKER_PUBLISHED ON NEWS_ARTICLES (TICKER, PUBLISHED_AT)")
+
+            # 키워드별 마지막 크롤링 시각 (예열된 키워드는 분석 시 다시 크롤링하지 않음)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS NEWS_CRAWLS (
+                    KEYWORD TEXT PRIMARY KEY,
+                    CRAWLED_AT TIMESTAMP
+                )
+            """)
+            self.conn.commit()
+        except Exception as e:
+            utils.log_error(f"News Table Creation Error: {e}")
+        self.create_fts()
+
+    def create_fts(self):
+        """
+        제목 전문 검색 색인 (FTS5, trigram - 조사가 붙은 한국어 제목도 부분 문자열로 검색)
+        기사 테이블에 넣고 지우면 트리거로 색인도 함께 갱신됩니다.
+        """
+        try:
+            cursor = self.conn.cursor()
+            exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'NEWS_FTS'").fetchone()
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS NEWS_FTS
+                USING fts5(TITLE, KEYWORD UNINDEXED, LINK UNINDEXED, tokenize='trigram')
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS NEWS_FTS_INSERT AFTER INSERT ON NEWS_ARTICLES BEGIN
+                    INSERT INTO NEWS_FTS (TITLE, KEYWORD, LINK) VALUES (new.TITLE, new.KEYWORD, new.LINK);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS NEWS_FTS_DELETE AFTER DELETE ON NEWS_ARTICLES BEGIN
+                    DELETE FROM NEWS_FTS WHERE KEYWORD = old.KEYWORD AND LINK = old.LINK;
+                END
+            """)
+            if not exists:
+                # 색인 이전에 저장된 기사도 색인
+                cursor.execute("INSERT INTO NEWS_FTS (TITLE, KEYWORD, LINK) SELECT TITLE, KEYWORD, LINK FROM NEWS_ARTICLES")
+            self.conn.commit()
+            self.fts_enabled = True
+        except Exception as e:
+            print(f"News full-text index unavailable (LIKE search fallback): {e}")
+            utils.log_error(f"News FTS Creation Error: {e}")
+
+    def _in_chunks(self, sql, values, params=()):
+        # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+        rows = []
+        for i in range(0, len(values), 500):
+            chunk = values[i:i + 500]
+            rows.extend(self.conn.execute(sql.format(",".join("?" * len(chunk))), list(params) + chunk).fetchall())
+        return rows
+
+    # --- 기사 ---
+
+    def seen_links(self, keyword, links):
+        """
+        키워드 검색에서 이미 저장된 링크 집합
+        """
+        links = list(links)
+        if not self.conn or not links: return set()
+        with self.lock:
+            return {row[0] for row in self._in_chunks(
+                "SELECT LINK FROM NEWS_ARTICLES WHERE KEYWORD = ? AND LINK IN ({})", links, (keyword,)
+            )}
+
+    def add_articles(self, keyword, articles, ticker=None):
+        """
+        새 기사 저장. articles: [(title, link, published_at)] 최신순 (published_at이 없으면 지금 시각)
+        """
+        if not self.conn or not articles: return
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # 오래된 기사부터 넣어 rowid가 최신일수록 커지도록
+        rows = [(keyword, link, title, now, ticker, published_at or now) for title, link, published_at in reversed(articles)]
+        try:
+            with self.lock:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO NEWS_ARTICLES (KEYWORD, LINK, TITLE, FIRST_SEEN, TICKER, PUBLISHED_AT) VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                self.conn.commit()
+        except Exception as e:
+            utils.log_error(f"News Save Error ({keyword}): {e}")
+
+    def mark_crawled(self, keyword):
+        if not self.conn: return
+        try:
+            with self.lock:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO NEWS_CRAWLS (KEYWORD, CRAWLED_AT) VALUES (?, CURRENT_TIMESTAMP)", (keyword,)
+                )
+                self.conn.commit()
+        except Exception as e:
+            utils.log_error(f"News Crawl Mark Error ({keyword}): {e}")
+
+    def crawled_at(self, keyword):
+        """
+        키워드를 마지막으로 크롤링한 시각 (UTC 'YYYY-MM-DD HH:MM:SS', PriceStore.db_now()와 비교 가능). 없으면 None
+        """
+        if not self.conn: return None
+        with self.lock:
+            row = self.conn.execute("SELECT CRAWLED_AT FROM NEWS_CRAWLS WHERE KEYWORD = ?", (keyword,)).fetchone()
+        return row[0] if row else None
+
+    def latest(self, keyword, n):
+        """
+        키워드의 최근 기사 n개
+        Returns: (titles, links) 최신순
+        """
+        if not self.conn: return [], []
+        with self.lock:
+            rows = self.conn.execute("""
+                SELECT TITLE, LINK FROM NEWS_ARTICLES WHERE KEYWORD = ?
+                ORDER BY FIRST_SEEN DESC, rowid DESC LIMIT ?
+            """, (keyword, n)).fetchall()
+        return [title for title, link in rows], [link for title, link in rows]
+
+    def search(self, query=None, ticker=None, keyword=None, since=None, until=None, limit=None):
+        """
+        저장된 뉴스 검색 (네트워크 없음). 예: search("유상증자", ticker="005930", since="2024-01-01")
+        query: 제목 검색어 (FTS5 색인), since/until: 기사 시각 범위 ('YYYY-MM-DD[ HH:MM:SS]', until은 미포함)
+        Returns: [{'TICKER', 'KEYWORD', 'TITLE', 'LINK', 'PUBLISHED_AT'}] 최신순
+        """
+        if not self.conn: return []
+        sql = "SELECT a.TICKER, a.KEYWORD, a.TITLE, a.LINK, a.PUBLISHED_AT FROM NEWS_ARTICLES a"
+        conditions = []
+        params = []
+        if query:
+            if self.fts_enabled and len(query) >= FTS_MIN_QUERY_LENGTH:
+                sql += " JOIN NEWS_FTS f ON f.KEYWORD = a.KEYWORD AND f.LINK = a.LINK"
+                conditions.append("NEWS_FTS MATCH ?")
+                params.append('"' + query.replace('"', '""') + '"') # 구문(phrase) 검색
+            else:
+                conditions.append("a.TITLE LIKE ? ESCAPE '\\'")
+                params.append("%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if ticker:
+            conditions.append("a.TICKER = ?")
+            params.append(ticker)
+        if keyword:
+            conditions.append("a.KEYWORD = ?")
+            params.append(keyword)
+        if since:
+            conditions.append("a.PUBLISHED_AT >= ?")
+            params.append(str(since))
+        if until:
+            conditions.append("a.PUBLISHED_AT < ?")
+            params.append(str(until))
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY a.PUBLISHED_AT DESC, a.rowid DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        try:
+            with self.lock:
+                cursor = self.conn.execute(sql, params)
+                columns = [desc[0] for desc in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            utils.log_error(f"News Search Error: {e}")
+            return []
+
+    # --- 기사별 점수 ---
+
+    def get_keyword_scores(self, links, version):
+        """
+        Returns: {link: (score, reasons)} - 같은 키워드 설정(version)으로 계산된 점수만
+        """
+        links = list(links)
+        if not self.conn or not links: return {}
+        with self.lock:
+            rows = self._in_chunks(
+                "SELECT LINK, KW_SCORE, KW_REASONS FROM NEWS_ARTICLES WHERE KW_VERSION = ? AND LINK IN ({})", links, (version,)
+            )
+        return {link: (score, json.loads(reasons)) for link, score, reasons in rows}
+
+    def save_keyword_scores(self, version, scores):
+        if not self.conn or not scores: return
+        rows = [(version, score, json.dumps(reasons, ensure_ascii=False), link) for link, (score, reasons) in scores.items()]
+        try:
+            with self.lock:
+                self.conn.executemany("UPDATE NEWS_ARTICLES SET KW_VERSION = ?, KW_SCORE = ?, KW_REASONS = ? WHERE LINK = ?", rows)
+                self.conn.commit()
+        except Exception as e:
+            utils.log_error(f"News Keyword Score Save Error: {e}")
+
+    def get_llm_scores(self, links, model, ttl_hours=None):
+        """
+        Returns: {link: (score, reason)} - 같은 모델로 TTL(LLM_CACHE_TTL_HOURS) 안에 분석된 점수만
+        """
+        links = list(links)
+        if not self.conn or not links: return {}
+        with self.lock:
+            rows = self._in_chunks(
+                "SELECT LINK, LLM_SCORE, LLM_REASON FROM NEWS_ARTICLES WHERE LLM_MODEL = ? AND LLM_SCORED_AT >= ? AND LINK IN ({})",
+                links, (model, self._llm_cutoff(ttl_hours))
+            )
+        return {link: (score, reason) for link, score, reason in rows}
+
+    def save_llm_scores(self, model, scores, now=None):
+        """
+        기사별 LLM 점수 저장. 저장하면서 TTL이 지난 점수는 지웁니다.
+        """
+        if not self.conn or not scores: return
+        now = now or datetime.now()
+        scored_at = now.strftime("%Y-%m-%d %H:%M:%S")
+        rows = [(model, score, reason, scored_at, link) for link, (score, reason) in scores.items()]
+        try:
+            with self.lock:
+                self.conn.executemany(
+                    "UPDATE NEWS_ARTICLES SET LLM_MODEL = ?, LLM_SCORE = ?, LLM_REASON = ?, LLM_SCORED_AT = ? WHERE LINK = ?", rows
+                )
+                self.conn.execute(
+                    "UPDATE NEWS_ARTICLES SET LLM_MODEL = NULL, LLM_SCORE = NULL, LLM_REASON = NULL, LLM_SCORED_AT = NULL "
+                    "WHERE LLM_MODEL IS NOT NULL AND (LLM_SCORED_AT IS NULL OR LLM_SCORED_AT < ?)", (self._llm_cutoff(now=now),)
+                )
+                self.conn.commit()
+        except Exception as e:
+            utils.log_error(f"News LLM Score Save Error: {e}")
+
+    @staticmethod
+    def _llm_cutoff(ttl_hours=None, now=None):
+        ttl_hours = config.LLM_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours
+        return ((now or datetime.now()) - timedelta(hours=ttl_hours)).strftime("%Y-%m-%d %H:%M:%S")
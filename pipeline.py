@@ -0,0 +1,542 @@
+import time
+import heapq
+from contextlib import contextmanager
+import config
+import utils
+import data_collector
+import analyzer
+import db_manager
+import market_snapshot
+import coupling
+
+class AnalysisCancelled(Exception):
+    """
+    cancel_event로 분석 중지를 요청하면 다음 확인 지점(종목/단계 사이)에서 발생
+    """
+
+class AnalysisPipeline:
+    """
+    CLI(main.py)와 GUI(AnalysisThread)가 함께 쓰는 분석 파이프라인. (Qt 없이 실행/벤치마크 가능)
+    단계: universe -> fetch -> features -> scores -> strategy -> persist
+    mode='batch'는 시장 전체 일괄 조회와 패널 연산을, mode='stock'은 종목별 조회를 사용합니다.
+    top_k > 0이면 국내 주식을 단계별로 평가해 상위 K에 들 수 없는 종목의 뉴스/수급 조회를 생략합니다.
+    on_result(market, result)를 주면 종목 결과가 완성되는 대로 전달합니다. (스트리밍, 국내 주식은 묶음 단위로 조회)
+    db가 있으면 완성된 종목 결과를 실행(run_id)별 체크포인트로 저장하고, resume_run_id로 중단된 실행을 이어서 분석합니다.
+    cancel_event(threading.Event)가 설정되면 종목/단계 사이에서 AnalysisCancelled로 중단합니다.
+    universe='full'이면 거래일별 시장 전체 시세 스냅샷으로 KRX 전 종목을 차트/거래량 분석하고,
+    뉴스/수급은 상위 K 평가(top_k가 0이면 kr_top_n)로 필요한 종목만 조회합니다.
+    """
+    STAGES = ('universe', 'fetch', 'features', 'scores', 'strategy', 'persist')
+    MODES = ('batch', 'stock')
+    UNIVERSES = ('top', 'full')
+
+    def __init__(self, collector=None, stock_analyzer=None, db=None, mode='batch', kr_top_n=None, top_k=None, progress=None, on_result=None,
+                 cancel_event=None, resume_run_id=None, universe=None, coupling_engine=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown pipeline mode: {mode}")
+        universe = universe or config.KR_UNIVERSE
+        if universe not in self.UNIVERSES:
+            raise ValueError(f"Unknown pipeline universe: {universe}")
+        self.collector = collector or data_collector.DataCollector()
+        self.analyzer = stock_analyzer or analyzer.Analyzer(news_store=self.collector.news_store)
+        # 미국장 연동 상관/베타 행렬 (기준일별로 가격 저장소에 캐시)
+        self.coupling = coupling_engine or coupling.CouplingEngine(self.collector.price_store)
+        self.db = db # None이면 저장 단계 생략
+        self.mode = mode
+        self.kr_top_n = kr_top_n or config.KR_TOP_N
+        self.top_k = config.KR_TOP_K if top_k is None else top_k
+        self.universe = universe
+        if universe == 'full' and self.top_k <= 0:
+            # 전 종목의 뉴스를 모두 조회할 수는 없으므로 상위 K 평가로 제한
+            self.top_k = self.kr_top_n
+        self.progress = progress # progress(percent, message)
+        self.on_result = on_result # on_result(market, result) - 'KR' / 'US'
+        self.cancel_event = cancel_event
+        self.resume_run_id = resume_run_id
+        self.run_id = None
+        self.checkpoints = {} # 이어서 분석할 때 이미 완료된 결과 {market: {code: result}}
+        self.timings = {stage: 0.0 for stage in self.STAGES}
+
+    @contextmanager
+    def stage(self, name):
+        """
+        단계별 소요 시간 누적 (미국/국내 주식 구간이 같은 단계 이름으로 합산됨)
+        """
+        self.check_cancelled()
+        start = time.perf_counter()
+        previous = utils.set_log_context(stage=name) # 이 단계에서 남기는 로그에 단계 이름 기록
+        try:
+            with utils.span(f"stage.{name}"):
+                yield
+        finally:
+            utils.set_log_context(**previous)
+            self.timings[name] += time.perf_counter() - start
+
+    def report_progress(self, percent, message):
+        if self.progress:
+            self.progress(percent, message)
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise AnalysisCancelled("분석이 중지되었습니다.")
+
+    def complete_results(self, market, results):
+        """
+        매매 전략까지 붙여 완성된 결과를 체크포인트로 저장하고 바로 전달 (최종 결과와 같은 dict)
+        """
+        for result in results:
+            if 'buy_price' not in result:
+                self.apply_strategy(result)
+        if self.db:
+            self.db.save_checkpoints(self.run_id, market, results)
+        self.emit_results(market, results)
+
+    def emit_results(self, market, results):
+        if self.on_result:
+            for result in results:
+                self.on_result(market, result)
+
+    def restored_results(self, market, codes):
+        """
+        이어서 분석: 체크포인트에 있는 종목 결과 (다시 조회/계산하지 않음)
+        """
+        saved = self.checkpoints.get(market, {})
+        return {code: saved[code] for code in codes if code in saved}
+
+    def format_timings(self):
+        lines = [f"{stage:<10} {self.timings[stage]:8.2f}s" for stage in self.STAGES]
+        lines.append(f"{'total':<10} {sum(self.timings.values()):8.2f}s")
+        return "\n".join(lines)
+
+    # --- 실행 ---
+
+    def run(self):
+        """
+        전체 분석을 실행합니다. (계측값은 실행마다 초기화하고 종료 시 파일로 저장)
+        Returns: (kr_results, us_results) - 각각 점수 내림차순
+        """
+        utils.metrics.reset()
+        if self.db and self.resume_run_id:
+            self.run_id = self.resume_run_id
+            self.db.resume_run(self.run_id)
+            self.checkpoints = self.db.load_checkpoints(self.run_id)
+            utils.log_info(f"Resuming run {self.run_id}: {sum(len(v) for v in self.checkpoints.values())} stocks already done")
+        elif self.db:
+            self.run_id = self.db.begin_run('ALL', db_manager.config_hash())
+        previous = utils.set_log_context(run_id=self.run_id)
+        try:
+            # 0. 시장 추세 파악 (국내 주식 전체 적용)
+            self.report_progress(5, "시장 추세(Bull/Bear) 분석 중...")
+            with self.stage('fetch'):
+                market_trend = self.collector.get_market_trend()
+            trend = self.analyzer.analyze_market_trend(market_trend)
+
+            us_data, us_results = self.run_us()
+            kr_results = self.run_korea(us_data, trend)
+
+            with self.stage('persist'):
+                self.persist(kr_results, us_results)
+            self.report_progress(100, "분석 완료!")
+            utils.log_info(f"Pipeline finished ({self.mode})\n{self.format_timings()}\n{utils.metrics.summary()}")
+            return kr_results, us_results
+        except AnalysisCancelled:
+            # 완료된 종목은 체크포인트에 남아 있으므로 이어서 분석 가능
+            utils.log_info(f"Pipeline cancelled ({self.run_id})")
+            if self.db:
+                self.db.finish_run(self.run_id, 'cancelled')
+            raise
+        except Exception:
+            if self.db:
+                self.db.finish_run(self.run_id, 'failed')
+            raise
+        finally:
+            utils.metrics.dump(config.METRICS_JSON_PATH, config.METRICS_PROM_PATH)
+            utils.set_log_context(**previous)
+
+    def coupling_scores(self, us_data, kr_data):
+        """
+        미국장 연동 점수 {code: {'score', 'reason'}} (COUPLING_MODE: 상관/베타 행렬 또는 고정 매핑)
+        """
+        if config.COUPLING_MODE == 'mapping':
+            return self.analyzer.analyze_coupling(us_data, config.KOREA_MAPPING)
+        return self.coupling.scores(us_data, kr_data)
+
+    def chart_scores(self, market_data):
+        """
+        차트 점수 {code: (score, reasons)}.
+        수집 시 갱신된 증분 지표 상태(MarketRecord.indicators)가 있는 종목은 상태로 바로 계산하고,
+        상태가 없는 종목(스냅샷 패널, 테스트 데이터 등)만 윈도우로 다시 계산합니다.
+        """
+        scores = {
+            code: self.analyzer.analyze_chart_state(data.get('indicators'))
+            for code, data in market_data.items() if data.get('indicators') is not None
+        }
+        utils.count("chart.indicator_state", len(scores))
+        rest = {code: data for code, data in market_data.items() if code not in scores}
+        if not rest:
+            return scores
+        if self.mode == 'batch':
+            scores.update(self.analyzer.analyze_chart_batch(rest))
+        else:
+            scores.update({code: self.analyzer.analyze_chart(data['df']) for code, data in rest.items()})
+        return scores
+
+    def run_us(self):
+        self.report_progress(10, "미국 증시 데이터 수집 및 분석 중...")
+        with self.stage('universe'):
+            tickers = list(config.US_TICKERS.keys())
+        with self.stage('fetch'):
+            us_data = self.collector.get_us_market_data(tickers, cancel_event=self.cancel_event)
+            self.check_cancelled() # 수집 도중 중지 요청
+        with self.stage('features'):
+            chart_scores = self.chart_scores(us_data)
+
+        restored = self.restored_results('US', us_data)
+        us_results = []
+        with self.stage('scores'):
+            for ticker, data in us_data.items():
+                if ticker in restored:
+                    continue
+                self.check_cancelled()
+                total_score = 0
+                reasons = []
+
+                # 미국 주식은 국내 시장 추세 페널티 미적용
+
+                # 차트 분석
+                chart_score, chart_reasons = chart_scores[ticker]
+                total_score += chart_score
+                reasons.extend(chart_reasons)
+
+                # 거래량 분석
+                volume_score, volume_reasons = self.analyzer.analyze_volume(data)
+                total_score += volume_score
+                reasons.extend(volume_reasons)
+
+                # 한글 종목명 가져오기
+                kor_name = config.US_TICKER_NAMES.get(ticker, ticker)
+                us_results.append({
+                    'code': ticker,
+                    'name': f"{kor_name} ({ticker})",
+                    'price': data['price'],
+                    'change_rate': data['change_rate'],
+                    'score': total_score,
+                    'reasons': reasons
+                })
+
+        with self.stage('strategy'):
+            self.complete_results('US', us_results)
+        self.emit_results('US', list(restored.values()))
+        us_results.extend(restored.values())
+        us_results.sort(key=lambda x: x['score'], reverse=True)
+        return us_data, us_results
+
+    def run_korea(self, us_data, trend):
+        trend_penalty, trend_reasons = trend
+
+        full = self.universe == 'full'
+        self.report_progress(30, "국내 주식 후보군 선정 중... " + ("(KRX 전 종목)" if full else f"(Top {self.kr_top_n})"))
+        with self.stage('universe'):
+            krx_listing = self.collector.get_krx_listing()
+            # 미국 시세가 있는 섹터의 연동 매핑 종목은 항상 후보에 포함
+            candidate_codes = {
+                code for ticker in us_data for code in config.KOREA_MAPPING.get(config.US_TICKERS.get(ticker), [])
+            }
+            if not full:
+                candidate_codes.update(krx_listing.top_by_marcap(self.kr_top_n))
+
+        panels = None
+        if full:
+            # 종목별 일봉 대신 거래일별 시장 전체 스냅샷 (보통 새 거래일 하나만 조회)
+            self.report_progress(35, "KRX 전 종목 시세 스냅샷 갱신 중...")
+            with self.stage('fetch'):
+                panels = self.collector.load_market_snapshots()
+                candidate_codes.update(panels['Close'].columns)
+                kr_data = market_snapshot.MarketSnapshots.market_data(panels, sorted(candidate_codes))
+
+        self.report_progress(40, f"국내 주식 {len(candidate_codes)}개 종목 상세 분석 중...")
+        with self.stage('fetch'):
+            if not full:
+                kr_data = self.collector.get_korea_market_data(list(candidate_codes), cancel_event=self.cancel_event)
+                self.check_cancelled() # 수집 도중 중지 요청
+            check_fundamentals = True
+            if self.mode == 'batch' or full:
+                # 시장 전체를 한 번에 조회 -> 이후 종목별 조회는 딕셔너리 접근
+                # 스냅샷을 못 받으면 종목별 조회(종목당 2회)로 대체하지 않고 이번 실행은 펀더멘털 필터 생략
+                check_fundamentals = self.collector.load_fundamental_snapshot() is not None
+                self.collector.load_supply_demand_index()
+
+        names = {code: krx_listing.name(code, code) for code in kr_data}
+        with self.stage('features'):
+            coupling_scores = self.coupling_scores(us_data, kr_data)
+            # 1. 펀더멘털 필터링 (자격 요건 심사) - 탈락 종목은 뉴스/수급 조회 생략
+            codes = self.filter_fundamentals(kr_data, names) if check_fundamentals else self.skip_fundamentals(kr_data)
+            if full:
+                # 스냅샷 패널을 그대로 사용 (전 종목 패널 연산 한 번)
+                chart_scores = self.analyzer.analyze_chart_panel(panels['Close'][codes], panels['Volume'][codes])
+            else:
+                chart_scores = self.chart_scores({code: kr_data[code] for code in codes})
+
+        if self.top_k > 0:
+            kr_results = self.score_korea_tiered(codes, names, kr_data, chart_scores, coupling_scores, trend)
+        elif self.on_result or self.db:
+            kr_results = self.score_korea_chunked(codes, names, kr_data, chart_scores, coupling_scores, trend)
+        else:
+            with self.stage('features'):
+                features = self.collect_korea_features(codes, names)
+
+            kr_results = []
+            with self.stage('scores'):
+                for code in codes:
+                    result = self.score_korea_stock(
+                        code, names[code], kr_data[code], chart_scores[code], features[code],
+                        coupling_scores, trend_penalty, trend_reasons
+                    )
+                    kr_results.append(result)
+
+        with self.stage('strategy'):
+            for result in kr_results:
+                if 'buy_price' not in result: # 묶음 단위로 이미 완성된 결과는 제외
+                    self.apply_strategy(result)
+        kr_results.sort(key=lambda x: x['score'], reverse=True)
+        return kr_results
+
+    def filter_fundamentals(self, kr_data, names):
+        passed = []
+        unknown = []
+        for code in kr_data:
+            self.check_cancelled()
+            fundamental_data = self.collector.get_fundamental_data(code)
+            is_valid, fund_reason = self.analyzer.analyze_fundamentals(fundamental_data)
+            if is_valid is None:
+                # 데이터가 없는 종목은 합격 처리하지 않고 미확인으로 따로 집계 (분석 대상에는 남김)
+                unknown.append(code)
+            elif not is_valid:
+                # 자격 미달 종목은 과감히 스킵
+                print(f"Skipping {names[code]}: {fund_reason}")
+                continue
+            passed.append(code)
+        if unknown:
+            utils.count("fundamentals.unknown", len(unknown))
+            utils.log_warning(f"Fundamentals unknown for {len(unknown)}/{len(kr_data)} stocks (not filtered): {', '.join(unknown[:10])}")
+        return passed
+
+    def skip_fundamentals(self, kr_data):
+        """
+        펀더멘털 스냅샷을 받지 못한 실행: 필터 없이 모든 종목을 분석 대상으로 둡니다.
+        """
+        print("Fundamental snapshot unavailable - skipping the fundamental filter for this run")
+        utils.count("fundamentals.filter_skipped")
+        utils.log_warning(f"Fundamental snapshot unavailable; filter skipped for {len(kr_data)} stocks")
+        return list(kr_data)
+
+    def collect_korea_features(self, codes, names):
+        """
+        네트워크가 필요한 종목별 특징(뉴스, 수급)을 모읍니다.
+        Returns: {code: {'news': (titles, links), 'supply': (foreigner_streak, institutional_streak)}}
+        """
+        features = {}
+        if self.mode == 'batch':
+            self.report_progress(60, f"뉴스/수급 {len(codes)}개 종목 일괄 수집 중...")
+            news = self.collector.get_news_sentiment_batch([names[code] for code in codes], {names[code]: code for code in codes})
+            for code in codes:
+                features[code] = {
+                    'news': news.get(names[code], ([], [])),
+                    'supply': self.collector.get_supply_demand(code)
+                }
+            # LLM 감성 분석도 캐시에 없는 종목만 묶어서 몇 번의 호출로 처리
+            llm_results = self.analyzer.analyze_news_llm_batch(
+                {code: features[code]['news'][0] for code in codes}, {code: features[code]['news'][1] for code in codes}
+            )
+            for code in codes:
+                features[code]['llm'] = llm_results.get(code, (None, None))
+            return features
+
+        for i, code in enumerate(codes, 1):
+            self.check_cancelled()
+            self.report_progress(40 + int((i / len(codes)) * 50), f"{names[code]} 분석 중...")
+            features[code] = {
+                'news': self.collector.get_news_sentiment(names[code], code),
+                'supply': self.collector.get_supply_demand(code)
+            }
+        return features
+
+    def score_korea_chunked(self, codes, names, kr_data, chart_scores, coupling_scores, trend):
+        """
+        뉴스/수급/LLM을 STREAM_CHUNK_SIZE 종목씩 조회하고, 묶음마다 결과를 체크포인트로 저장/전달합니다.
+        (전체 결과는 일괄 조회와 같음 - LLM 배치가 묶음 단위로 나뉠 뿐)
+        이어서 분석할 때는 체크포인트에 있는 종목을 건너뜁니다.
+        """
+        restored = self.restored_results('KR', codes)
+        self.emit_results('KR', list(restored.values()))
+        kr_results = list(restored.values())
+        remaining = [code for code in codes if code not in restored]
+
+        chunk_size = max(1, config.STREAM_CHUNK_SIZE)
+        for start in range(0, len(remaining), chunk_size):
+            chunk = remaining[start:start + chunk_size]
+            with self.stage('features'):
+                features = self.collect_korea_features(chunk, names)
+            done = len(restored) + start + len(chunk)
+            self.report_progress(60 + int(done / len(codes) * 30), f"국내 주식 분석 중... ({done}/{len(codes)})")
+            with self.stage('scores'):
+                results = [
+                    self.score_korea_stock(
+                        code, names[code], kr_data[code], chart_scores[code], features[code], coupling_scores, *trend
+                    )
+                    for code in chunk
+                ]
+                self.complete_results('KR', results)
+            kr_results.extend(results)
+        return kr_results
+
+    def score_korea_tiered(self, codes, names, kr_data, chart_scores, coupling_scores, trend):
+        """
+        단계별(Tiered) 상위 K 평가.
+        1) 로컬 점수(추세, 미국장 연동, 차트, 거래량)를 전 종목에 대해 계산
+        2) 로컬 점수 + 뉴스/수급 최대 점수 = 종목별 점수 상한
+        3) 상한이 높은 순으로 뉴스/수급을 조회하고, 힙으로 현재 상위 K를 유지
+        4) 남은 종목의 상한이 현재 K위 점수 이하이면 중단 (상위 K는 전체 평가와 동일)
+        생략된 종목은 로컬 점수만으로 결과에 남깁니다.
+        """
+        # 시장 전체 수급 인덱스가 있으면 수급도 로컬 조회이므로 1단계에서 함께 계산
+        supply_known = self.collector.supply_index is not None
+
+        partial = {}
+        bounds = {}
+        with self.stage('scores'):
+            max_remaining = self.analyzer.max_news_score()
+            if not supply_known:
+                max_remaining += self.analyzer.max_supply_score()
+            for code in codes:
+                cheap_features = {'supply': self.collector.get_supply_demand(code)} if supply_known else {}
+                partial[code] = self.score_korea_stock(
+                    code, names[code], kr_data[code], chart_scores[code], cheap_features, coupling_scores, *trend
+                )
+                bounds[code] = partial[code]['score'] + max_remaining
+
+        heap = [] # (점수, 순번) 최소 힙 - heap[0]이 현재 K위
+        evaluated = {}
+        # 이어서 분석: 이미 뉴스/수급까지 평가한 종목은 힙에 바로 넣고 건너뜀
+        for code, result in self.restored_results('KR', codes).items():
+            if result.get('evaluated', True):
+                evaluated[code] = result
+                self.push_top_k(heap, (result['score'], len(evaluated)))
+        self.emit_results('KR', list(evaluated.values()))
+
+        order = sorted((code for code in codes if code not in evaluated), key=bounds.get, reverse=True)
+        chunk_size = config.NEWS_MAX_WORKERS if self.mode == 'batch' else 1
+        i = 0
+        while i < len(order):
+            threshold = heap[0][0] if len(heap) >= self.top_k else None
+            chunk = []
+            while i < len(order) and len(chunk) < chunk_size:
+                if threshold is not None and bounds[order[i]] <= threshold:
+                    break # 상한 내림차순이므로 이후 종목도 모두 탈락
+                chunk.append(order[i])
+                i += 1
+            if not chunk:
+                break
+
+            with self.stage('features'):
+                features = self.collect_korea_features(chunk, names)
+            with self.stage('scores'):
+                results = []
+                for code in chunk:
+                    result = self.score_korea_stock(
+                        code, names[code], kr_data[code], chart_scores[code], features[code], coupling_scores, *trend
+                    )
+                    evaluated[code] = result
+                    results.append(result)
+                    self.push_top_k(heap, (result['score'], len(evaluated)))
+                self.complete_results('KR', results)
+
+        skipped_stage = "뉴스" if supply_known else "뉴스/수급"
+        kr_results = []
+        skipped = []
+        for code in codes:
+            if code in evaluated:
+                kr_results.append(evaluated[code])
+                continue
+            result = partial[code]
+            result['reasons'].append(f"상위 {self.top_k}위 진입 불가 (최대 {round(bounds[code], 1)}점) - {skipped_stage} 분석 생략")
+            result['evaluated'] = False
+            kr_results.append(result)
+            skipped.append(result)
+        self.complete_results('KR', skipped)
+
+        utils.log_info(f"Tiered top-{self.top_k}: evaluated {len(evaluated)}/{len(codes)} stocks")
+        return kr_results
+
+    def push_top_k(self, heap, entry):
+        if len(heap) < self.top_k:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heappushpop(heap, entry)
+
+    def score_korea_stock(self, code, name, data, chart, features, coupling_scores, trend_penalty, trend_reasons):
+        total_score = 0
+        reasons = []
+
+        # 시장 추세 페널티 적용
+        if trend_penalty != 0:
+            total_score += trend_penalty
+            reasons.extend(trend_reasons)
+
+        # 2. 미국장 연동
+        if code in coupling_scores:
+            total_score += coupling_scores[code]['score']
+            reasons.extend(coupling_scores[code]['reason'])
+
+        # 3. 차트 분석
+        chart_score, chart_reasons = chart
+        total_score += chart_score
+        reasons.extend(chart_reasons)
+
+        # 4. 뉴스 분석 (LLM + Keyword) - 단계별 평가의 1단계에서는 생략
+        if 'news' in features:
+            news_titles, news_links = features['news']
+            news_score, news_reasons = self.analyzer.score_news(news_titles, news_links, features.get('llm'))
+            total_score += news_score
+            reasons.extend(news_reasons)
+
+        # 5. 수급 분석
+        if 'supply' in features:
+            supply_score, supply_reasons = self.analyzer.analyze_supply_demand(*features['supply'])
+            total_score += supply_score
+            reasons.extend(supply_reasons)
+
+        # 6. 거래량 분석 (골든크로스와 결합된 거래량은 차트에서 처리, 여기서는 '거래량 폭발+양봉' 단독 이벤트)
+        volume_score, volume_reasons = self.analyzer.analyze_volume(data, require_bullish=True)
+        total_score += volume_score
+        reasons.extend(volume_reasons)
+
+        # 어제 샀다면?
+        prev_close = data.get('prev_close', data['price'])
+        return {
+            'code': code,
+            'name': name,
+            'price': data['price'],
+            'change_rate': data['change_rate'],
+            'prev_close': prev_close,
+            'diff': data['price'] - prev_close,
+            'yesterday_profit': data['change_rate'],
+            'score': total_score,
+            'reasons': reasons
+        }
+
+    def apply_strategy(self, result):
+        buy_price, target_price, stop_loss = self.analyzer.calculate_trading_strategy(result['price'], result['score'])
+        result['buy_price'] = buy_price
+        result['target_price'] = target_price
+        result['stop_loss'] = stop_loss
+
+    def persist(self, kr_results, us_results):
+        if not self.db:
+            return
+        # 시장별로 한 번의 트랜잭션으로 일괄 저장
+        self.db.save_results(us_results, self.run_id, 'US')
+        self.db.save_results(kr_results, self.run_id, 'KR')
+        self.db.finish_run(self.run_id)
+        # 완료된 실행의 중간 결과는 더 이상 필요 없음
+        self.db.clear_checkpoints(self.run_id)
@@ -0,0 +1,278 @@
+import sqlite3
+import json
+import threading
+import pandas as pd
+import config
+import utils
+import indicators
+
+class PriceStore:
+    """
+    종목별 일봉(OHLCV)을 로컬 SQLite에 저장해두는 가격 저장소.
+    (TICKER, DATE) 기준으로 저장하며, 마지막 저장일 이후 데이터만 받아 병합합니다.
+    """
+    def __init__(self, db_path=None):
+        self.db_path = db_path or config.PRICE_DB_PATH
+        self.conn = None
+        # 여러 스레드에서 같은 커넥션을 쓰므로 쓰기/읽기를 직렬화
+        self.lock = threading.Lock()
+        self.connect()
+
+    def connect(self):
+        try:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            utils.log_info(f"Price Store Connected: {self.db_path}")
+            self.create_table()
+        except Exception as e:
+            utils.log_error(f"Price Store Connection Error: {e}")
+
+    def create_table(self):
+        if not self.conn: return
+        try:
+            cursor = self.conn.cursor()
+            # 일봉 데이터 (등락률 Change는 저장하지 않고 로드 시 종가로 다시 계산)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS OHLCV (
+                    TICKER TEXT NOT NULL,
+                    DATE TEXT NOT NULL,
+                    OPEN REAL,
+                    HIGH REAL,
+                    LOW REAL,
+                    CLOSE REAL,
+                    VOLUME INTEGER,
+                    PRIMARY KEY (TICKER, DATE)
+                )
+            """)
+            # 종목별 수집 범위 (어느 시점부터 받아두었는지)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS PRICE_META (
+                    TICKER TEXT PRIMARY KEY,
+                    COVERED_FROM TEXT,
+                    UPDATED_AT TIMESTAMP
+                )
+            """)
+            # 종목별 증분 지표 상태 (JSON)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS INDICATOR_STATE (
+                    TICKER TEXT PRIMARY KEY,
+                    LAST_DATE TEXT,
+                    STATE TEXT
+                )
+            """)
+            # 시장 전체 펀더멘털 스냅샷 (거래일 기준)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS FUNDAMENTALS (
+                    AS_OF TEXT NOT NULL,
+                    TICKER TEXT NOT NULL,
+                    MARKET_CAP INTEGER,
+                    PER REAL,
+                    PBR REAL,
+                    DIV REAL,
+                    PRIMARY KEY (AS_OF, TICKER)
+                )
+            """)
+            # 캐시 갱신 일자 등 기타 정보 (KEY-VALUE)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS STORE_META (
+                    KEY TEXT PRIMARY KEY,
+                    VALUE TEXT
+                )
+            """)
+            self.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Price Table Creation Error: {e}")
+
+    def get_coverage(self, ticker):
+        """
+        (수집 시작일, 마지막 저장일)을 반환합니다. 저장된 데이터가 없으면 (None, None).
+        """
+        if not self.conn: return None, None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COVERED_FROM FROM PRICE_META WHERE TICKER = ?", (ticker,)
+            ).fetchone()
+            last = self.conn.execute(
+                "SELECT MAX(DATE) FROM OHLCV WHERE TICKER = ?", (ticker,)
+            ).fetchone()
+        covered_from = row[0] if row else None
+        last_date = last[0] if last else None
+        if covered_from is None or last_date is None:
+            return None, None
+        return covered_from, last_date
+
+    def overlap_start(self, ticker, n):
+        """
+        저장된 마지막 n개 봉의 첫 날짜 (증분 수집 시 다시 받아 비교할 구간의 시작일). 없으면 None
+        """
+        if not self.conn: return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MIN(DATE) FROM (SELECT DATE FROM OHLCV WHERE TICKER = ? ORDER BY DATE DESC LIMIT ?)", (ticker, n)
+            ).fetchone()
+        return row[0] if row else None
+
+    def reset(self, ticker):
+        """
+        종목의 저장된 일봉/수집 구간/지표 상태를 지웁니다. (수정주가가 바뀌어 전체를 다시 받을 때)
+        """
+        if not self.conn: return
+        try:
+            with self.lock:
+                for table in ('OHLCV', 'PRICE_META', 'INDICATOR_STATE'):
+                    self.conn.execute(f"DELETE FROM {table} WHERE TICKER = ?", (ticker,))
+                self.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Price Store Reset Error ({ticker}): {e}")
+
+    def upsert(self, ticker, df, covered_from=None):
+        """
+        DataFrame(Date 인덱스, Open/High/Low/Close/Volume)을 저장합니다.
+        같은 날짜가 이미 있으면 덮어씁니다. (장중에 받은 당일 봉 갱신)
+        """
+        if not self.conn or df is None: return
+        rows = []
+        for date, row in df.iterrows():
+            rows.append((
+                ticker,
+                pd.Timestamp(date).strftime("%Y-%m-%d"),
+                float(row['Open']) if 'Open' in row and pd.notna(row['Open']) else None,
+                float(row['High']) if 'High' in row and pd.notna(row['High']) else None,
+                float(row['Low']) if 'Low' in row and pd.notna(row['Low']) else None,
+                float(row['Close']),
+                int(row['Volume']) if 'Volume' in row and pd.notna(row['Volume']) else 0,
+            ))
+        try:
+            with self.lock:
+                self.conn.executemany("""
+                    INSERT OR REPLACE INTO OHLCV (TICKER, DATE, OPEN, HIGH, LOW, CLOSE, VOLUME)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                if covered_from:
+                    # 더 과거부터 받은 경우에만 수집 시작일을 앞당김
+                    self.conn.execute("""
+                        INSERT INTO PRICE_META (TICKER, COVERED_FROM, UPDATED_AT)
+                        VALUES (?, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT(TICKER) DO UPDATE SET
+                            COVERED_FROM = MIN(COVERED_FROM, excluded.COVERED_FROM),
+                            UPDATED_AT = CURRENT_TIMESTAMP
+                    """, (ticker, covered_from))
+                else:
+                    self.conn.execute(
+                        "UPDATE PRICE_META SET UPDATED_AT = CURRENT_TIMESTAMP WHERE TICKER = ?", (ticker,)
+                    )
+                self.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Price Store Save Error ({ticker}): {e}")
+
+    def load(self, ticker, start=None):
+        """
+        저장된 일봉을 DataFrame으로 반환합니다. (fdr.DataReader와 같은 컬럼 구성)
+        """
+        if not self.conn: return pd.DataFrame()
+        sql = "SELECT DATE, OPEN, HIGH, LOW, CLOSE, VOLUME FROM OHLCV WHERE TICKER = ?"
+        params = [ticker]
+        if start:
+            sql += " AND DATE >= ?"
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        sql += " ORDER BY DATE"
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        df = pd.DataFrame(rows, columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+        df['Date'] = pd.to_datetime(df['Date'])
+        df = df.set_index('Date')
+        df['Change'] = df['Close'].pct_change()
+        return df
+
+    def load_indicator_state(self, ticker):
+        """
+        저장된 증분 지표 상태를 반환합니다. 없거나 설정이 바뀌었으면 None.
+        """
+        if not self.conn: return None
+        try:
+            with self.lock:
+                row = self.conn.execute(
+                    "SELECT STATE FROM INDICATOR_STATE WHERE TICKER = ?", (ticker,)
+                ).fetchone()
+            if not row:
+                return None
+            return indicators.IndicatorState.from_dict(json.loads(row[0]))
+        except Exception as e:
+            utils.log_error(f"Indicator State Load Error ({ticker}): {e}")
+            return None
+
+    def save_indicator_state(self, ticker, state):
+        if not self.conn or state is None: return
+        try:
+            with self.lock:
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO INDICATOR_STATE (TICKER, LAST_DATE, STATE)
+                    VALUES (?, ?, ?)
+                """, (ticker, state.last_date, json.dumps(state.to_dict())))
+                self.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Indicator State Save Error ({ticker}): {e}")
+
+    def get_updated_at(self, ticker):
+        """
+        종목 일봉을 마지막으로 받은 시각 (SQLite CURRENT_TIMESTAMP, UTC 'YYYY-MM-DD HH:MM:SS'). 없으면 None
+        """
+        if not self.conn: return None
+        with self.lock:
+            row = self.conn.execute("SELECT UPDATED_AT FROM PRICE_META WHERE TICKER = ?", (ticker,)).fetchone()
+        return row[0] if row else None
+
+    def db_now(self):
+        """
+        UPDATED_AT과 비교할 수 있는 현재 시각 (UTC)
+        """
+        if not self.conn: return None
+        with self.lock:
+            return self.conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+
+    def get_meta(self, key, default=None):
+        if not self.conn: return default
+        with self.lock:
+            row = self.conn.execute("SELECT VALUE FROM STORE_META WHERE KEY = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        if not self.conn: return
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO STORE_META (KEY, VALUE) VALUES (?, ?)", (key, str(value)))
+            self.conn.commit()
+
+    def save_fundamentals(self, as_of, snapshot):
+        """
+        {ticker: {'market_cap', 'per', 'pbr', 'div'}} 스냅샷을 거래일(as_of) 기준으로 저장합니다.
+        """
+        if not self.conn: return
+        rows = [
+            (as_of, ticker, item.get('market_cap'), item.get('per'), item.get('pbr'), item.get('div'))
+            for ticker, item in snapshot.items()
+        ]
+        try:
+            with self.lock:
+                self.conn.execute("DELETE FROM FUNDAMENTALS WHERE AS_OF = ?", (as_of,))
+                self.conn.executemany("""
+                    INSERT INTO FUNDAMENTALS (AS_OF, TICKER, MARKET_CAP, PER, PBR, DIV)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, rows)
+                self.conn.commit()
+        except Exception as e:
+            utils.log_error(f"Fundamentals Save Error ({as_of}): {e}")
+
+    def load_fundamentals(self, as_of):
+        if not self.conn: return {}
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT TICKER, MARKET_CAP, PER, PBR, DIV FROM FUNDAMENTALS WHERE AS_OF = ?", (as_of,)
+            ).fetchall()
+        return {
+            ticker: {'market_cap': market_cap, 'per': per, 'pbr': pbr, 'div': div}
+            for ticker, market_cap, per, pbr, div in rows
+        }
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
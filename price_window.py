@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import config
+
+class PriceWindow:
+    """
+    종목별 최근 PRICE_WINDOW개 봉만 담는 압축 시세 윈도우.
+    분석에 필요한 시가/종가/거래량만 NumPy 배열로 보관합니다. (가격 float32, 거래량 int64)
+    거래량은 int32로 줄이지 않음: 인버스/레버리지 ETF와 동전주는 하루 거래량이 2^31(약 21억)주를 넘을 수 있고,
+    int32로 변환하면 오류 없이 음수로 넘칩니다. (윈도우 40봉 기준 종목당 160바이트 차이)
+    종목 수가 수천 개로 늘어도 종목당 메모리는 기간 길이가 아니라 윈도우 크기로 고정됩니다.
+    """
+    __slots__ = ('dates', 'open', 'close', 'volume')
+
+    # 패널/DataFrame 컬럼명 -> 속성
+    COLUMNS = {'Open': 'open', 'Close': 'close', 'Volume': 'volume'}
+
+    def __init__(self, dates, open, close, volume):
+        self.dates = dates
+        self.open = open
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_frame(cls, df, lookback=None):
+        """
+        일봉 DataFrame의 최근 lookback개 봉으로 윈도우를 만듭니다. (Open/Volume이 없으면 종가/0으로 채움)
+        """
+        lookback = lookback or config.PRICE_WINDOW
+        df = df.iloc[-lookback:]
+        close = df['Close'].to_numpy(dtype='float32')
+        open_ = df['Open'].to_numpy(dtype='float32') if 'Open' in df.columns else close.copy()
+        if 'Volume' in df.columns:
+            volume = np.nan_to_num(df['Volume'].to_numpy(dtype='float64')).astype('int64')
+        else:
+            volume = np.zeros(len(df), dtype='int64')
+        return cls(df.index.values.astype('datetime64[ns]'), open_, close, volume)
+
+    def __len__(self):
+        return len(self.close)
+
+    def column(self, name):
+        return getattr(self, self.COLUMNS[name])
+
+    def frame(self):
+        """
+        종목별 분석(analyze_chart)용 DataFrame (필요할 때만 만듦)
+        """
+        return pd.DataFrame(
+            {name: getattr(self, attr) for name, attr in self.COLUMNS.items()}, index=pd.DatetimeIndex(self.dates)
+        )
+
+class MarketRecord:
+    """
+    종목별 시세 레코드 (get_korea_market_data / get_us_market_data 결과).
+    dict 대신 __slots__로 필드를 고정해 종목당 메모리를 줄입니다.
+    기존 코드와 같이 record['price'], record.get('prev_close') 형태로도 읽을 수 있고,
+    record['df']는 윈도우로 DataFrame을 만들어 반환합니다.
+    """
+    __slots__ = ('price', 'prev_close', 'change_rate', 'volume', 'window', 'indicators')
+
+    def __init__(self, price, prev_close, change_rate, volume, window, indicators=None):
+        self.price = price
+        self.prev_close = prev_close
+        self.change_rate = change_rate
+        self.volume = volume
+        self.window = window
+        self.indicators = indicators
+
+    def __getitem__(self, key):
+        if key == 'df':
+            return self.window.frame()
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key == 'df' or key in self.__slots__
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+def window_of(data):
+    """
+    시세 데이터의 PriceWindow (MarketRecord면 그대로, {'df': df} dict면 변환)
+    """
+    if isinstance(data, MarketRecord):
+        return data.window
+    return PriceWindow.from_frame(data['df'], len(data['df']) or None)
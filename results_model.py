@@ -0,0 +1,175 @@
+import bisect
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt6.QtGui import QColor, QFont
+
+import config
+import utils
+
+COLUMNS = ["순위", "종목명", "현재가", "어제 샀다면?", "추천강도", "매수가", "목표가", "손절가"]
+PRICE_COLUMNS = {2: 'price', 5: 'buy_price', 6: 'target_price', 7: 'stop_loss'}
+
+# 정렬용 원본 값 (표시 문자열 "1,234원"이 아니라 숫자로 정렬)
+SORT_ROLE = Qt.ItemDataRole.UserRole
+
+UP_COLOR = QColor("#fa5252")
+DOWN_COLOR = QColor("#4c6ef5")
+BUY_COLOR = QColor("#fd7e14")
+NEUTRAL_COLOR = QColor("#868e96")
+
+def recommendation_color(score):
+    if score >= config.STRONG_BUY_SCORE:
+        return UP_COLOR
+    if score >= config.BUY_SCORE:
+        return BUY_COLOR
+    if score <= config.SELL_SCORE:
+        return DOWN_COLOR
+    return NEUTRAL_COLOR
+
+def build_detail_html(result, table_name):
+    """
+    상세 분석 패널 HTML
+    """
+    score_color = "#fa5252" if result['score'] >= 0 else "#4c6ef5"
+    diff = result.get('diff', 0)
+    diff_str = f"{diff:+,}" if isinstance(diff, int) else f"{diff:+.2f}"
+    diff_color = "red" if diff > 0 else "blue" if diff < 0 else "black"
+
+    html = f"""
+    <h2 style='color: #343a40; margin-bottom: 5px;'>{result['name']} <span style='font-size: 14px; color: #868e96;'>({table_name})</span></h2>
+    <div style='font-size: 16px; margin-bottom: 10px;'>
+        <b>종합 점수:</b> <span style='color: {score_color}; font-size: 18px;'>{result['score']}점</span>
+    </div>
+
+    <div style='background-color: #f8f9fa; padding: 10px; border-radius: 8px; margin-bottom: 10px;'>
+        <p style='margin: 5px 0;'><b>💰 현재가:</b> {result['price']:,} <span style='color: {diff_color};'>({diff_str} / {result['change_rate']}%)</span></p>
+        <p style='margin: 5px 0;'><b>🔥 목표가:</b> <span style='color: #e03131;'>{result['target_price']:,}</span></p>
+        <p style='margin: 5px 0;'><b>🛡️ 손절가:</b> <span style='color: #1971c2;'>{result['stop_loss']:,}</span> (칼손절 권장)</p>
+        <p style='margin: 5px 0;'><b>📉 트레일링 스탑:</b> {int(result['price'] * 0.98):,} (수익 보전)</p>
+    </div>
+
+    <h3 style='color: #495057;'>📋 분석 상세 사유</h3>
+    <ul style='line-height: 1.6;'>
+    """
+    html += "".join(f"<li>{reason}</li>" for reason in result['reasons'])
+    html += "</ul>"
+    return html
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    분석 결과 테이블 모델.
+    행마다 QTableWidgetItem을 만들지 않고, 뷰가 화면에 보이는 셀을 그릴 때만 data()에서 문자열/색을 만듭니다.
+    상세 HTML은 종목별로 한 번만 만들어 캐시합니다.
+    """
+    def __init__(self, is_kr=True, parent=None):
+        super().__init__(parent)
+        self.is_kr = is_kr
+        self.table_name = "국내 주식" if is_kr else "미국 주식"
+        self.results = []
+        self.detail_cache = {} # code -> HTML
+        self.bold_font = QFont("Malgun Gothic", 10, QFont.Weight.Bold)
+
+    def set_results(self, results):
+        self.beginResetModel()
+        self.results = list(results)
+        self.detail_cache = {}
+        self.endResetModel()
+
+    def add_results(self, results):
+        """
+        스트리밍 결과를 점수 내림차순 위치에 끼워 넣습니다. (같은 점수는 먼저 온 종목이 위)
+        끼워 넣은 위치 아래 행은 순위만 바뀌므로 순위 열만 갱신합니다.
+        """
+        if not results:
+            return
+        keys = [-r['score'] for r in self.results]
+        first = len(self.results)
+        for result in results:
+            row = bisect.bisect_right(keys, -result['score'])
+            self.beginInsertRows(QModelIndex(), row, row)
+            keys.insert(row, -result['score'])
+            self.results.insert(row, result)
+            self.endInsertRows()
+            first = min(first, row)
+        last = len(self.results) - 1
+        if first < last:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, 0))
+
+    def clear(self):
+        self.set_results([])
+
+    def result(self, row):
+        return self.results[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.results)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def format_price(self, value):
+        return f"{value:,}원" if self.is_kr else f"${value:,.2f}"
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        result = self.results[row]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == 0:
+                return str(row + 1)
+            if col == 1:
+                return f"{result['name']} ({result['code']})"
+            if col in PRICE_COLUMNS:
+                return self.format_price(result[PRICE_COLUMNS[col]])
+            if col == 3:
+                return f"{result.get('yesterday_profit', 0):+.2f}%"
+            if col == 4:
+                return utils.get_recommendation(result['score'])
+        elif role == SORT_ROLE:
+            if col == 0:
+                return row
+            if col == 1:
+                return f"{result['name']} ({result['code']})"
+            if col in PRICE_COLUMNS:
+                return float(result[PRICE_COLUMNS[col]])
+            if col == 3:
+                return float(result.get('yesterday_profit', 0))
+            if col == 4:
+                return float(result['score'])
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if col == 3:
+                change_rate = result.get('yesterday_profit', 0)
+                if change_rate > 0:
+                    return UP_COLOR
+                if change_rate < 0:
+                    return DOWN_COLOR
+            elif col == 4:
+                return recommendation_color(result['score'])
+        elif role == Qt.ItemDataRole.FontRole:
+            if col == 4:
+                return self.bold_font
+        return None
+
+    def detail_html(self, row):
+        result = self.results[row]
+        html = self.detail_cache.get(result['code'])
+        if html is None:
+            html = build_detail_html(result, self.table_name)
+            self.detail_cache[result['code']] = html
+        return html
+
+class ResultsFilterProxy(QSortFilterProxyModel):
+    """
+    헤더 클릭 정렬(숫자 기준) + 종목명/코드 검색 필터
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SORT_ROLE)
+        self.setFilterKeyColumn(1)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
@@ -0,0 +1,199 @@
+import argparse
+import time
+import threading
+from datetime import datetime, timedelta
+import config
+import utils
+import data_collector
+
+class SystemClock:
+    def now(self):
+        return datetime.now()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class SimulatedClock:
+    """
+    테스트/드라이런용 시계. sleep()은 기다리지 않고 시각만 앞으로 옮깁니다.
+    """
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        self.current += timedelta(seconds=seconds)
+
+class TradingCalendar:
+    """
+    KRX 거래일 (주말 + MARKET_HOLIDAYS 제외)
+    pykrx 거래일 조회는 지나간 날만 알려주므로 앞으로의 예열 일정은 휴장일 목록으로 판단합니다.
+    목록에 없는 해는 공휴일에도 예열이 돌 수 있으므로 경고를 남깁니다.
+    """
+    def __init__(self, holidays=None):
+        self.holidays = set(config.MARKET_HOLIDAYS if holidays is None else holidays)
+        self.years = {holiday[:4] for holiday in self.holidays}
+        self.warned_years = set()
+
+    def is_trading_day(self, day):
+        self.check_year(day.year)
+        return day.weekday() < 5 and day.strftime("%Y-%m-%d") not in self.holidays
+
+    def check_year(self, year):
+        """
+        해당 연도의 휴장일이 목록에 없으면 한 번만 경고합니다. (MARKET_HOLIDAYS 갱신 필요)
+        """
+        year = str(year)
+        if year in self.years or year in self.warned_years:
+            return False
+        self.warned_years.add(year)
+        print(f"Warning: no KRX holidays configured for {year} (update config.MARKET_HOLIDAYS)")
+        utils.log_warning(f"No KRX holidays configured for {year}; weekdays are treated as trading days")
+        return True
+
+    def next_run(self, now, times, max_days=60):
+        """
+        now 이후 가장 가까운 거래일의 예열 시각 (times: ["HH:MM", ...])
+        """
+        slots = sorted(datetime.strptime(t, "%H:%M").time() for t in times)
+        for offset in range(max_days):
+            day = now.date() + timedelta(days=offset)
+            if not self.is_trading_day(day):
+                continue
+            for slot in slots:
+                run_at = datetime.combine(day, slot)
+                if run_at > now:
+                    return run_at
+        raise ValueError(f"No trading day within {max_days} days after {now}")
+
+class WarmupScheduler:
+    """
+    장 시작 전/마감 전 캐시 예열 데몬.
+    거래일 WARMUP_TIMES마다 KRX 종목 목록, 펀더멘털 스냅샷, 지수/미국/국내 시세, 뉴스를 로컬 저장소에 미리 받아 둡니다.
+    예열이 끝나면 시작 시각을 기록하고, 이후 분석(DataCollector)은 그 뒤에 갱신된 시세/뉴스를 다시 받지 않습니다.
+    """
+    TASKS = ('listing', 'fundamentals', 'indices', 'us_prices', 'kr_prices', 'news', 'snapshots')
+
+    def __init__(self, collector=None, clock=None, calendar=None, times=None, tasks=None):
+        self.collector = collector or data_collector.DataCollector()
+        self.clock = clock or SystemClock()
+        self.calendar = calendar or TradingCalendar()
+        self.times = list(times or config.WARMUP_TIMES)
+        self.tasks = tuple(tasks or config.WARMUP_TASKS)
+        unknown = set(self.tasks) - set(self.TASKS)
+        if unknown:
+            raise ValueError(f"Unknown warm-up tasks: {sorted(unknown)}")
+
+    # --- 실행 ---
+
+    def run(self, max_runs=None, stop_event=None):
+        """
+        다음 예열 시각까지 기다렸다가 예열을 반복합니다. (max_runs회 또는 stop_event가 설정될 때까지)
+        Returns: 실행한 예열 횟수
+        """
+        runs = 0
+        while max_runs is None or runs < max_runs:
+            run_at = self.calendar.next_run(self.clock.now(), self.times)
+            print(f"Next cache warm-up at {run_at:%Y-%m-%d %H:%M}")
+            utils.log_info(f"Next cache warm-up at {run_at:%Y-%m-%d %H:%M}")
+            if not self.wait_until(run_at, stop_event):
+                break
+            self.warm_up()
+            runs += 1
+        return runs
+
+    def wait_until(self, run_at, stop_event=None):
+        # 긴 대기도 1분 단위로 나눠서 중지 요청을 확인
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return False
+            remaining = (run_at - self.clock.now()).total_seconds()
+            if remaining <= 0:
+                return True
+            self.clock.sleep(min(remaining, 60))
+
+    def warm_up(self):
+        """
+        예열 작업을 순서대로 한 번 실행합니다. 한 작업이 실패해도 나머지는 계속합니다.
+        Returns: {task: 받은 항목 수 (실패 시 None)}
+        """
+        store = self.collector.price_store
+        store.set_meta('warmup_started_at', store.db_now())
+        self.collector.warm_since = None # 예열은 항상 새로 받음
+        previous = utils.set_log_context(stage='warmup')
+        summary = {}
+        try:
+            for task in self.tasks:
+                try:
+                    with utils.span(f"warmup.{task}"):
+                        summary[task] = getattr(self, f"warm_{task}")()
+                except Exception as e:
+                    print(f"Warm-up task failed ({task}): {e}")
+                    utils.log_error(f"Warm-up Error ({task}): {e}")
+                    summary[task] = None
+        finally:
+            utils.set_log_context(**previous)
+        store.set_meta('warmup_finished_at', store.db_now())
+        utils.log_info(f"Cache warm-up finished at {self.clock.now():%Y-%m-%d %H:%M}: {summary}")
+        return summary
+
+    # --- 예열 작업 ---
+
+    def korea_universe(self):
+        """
+        파이프라인과 같은 국내 후보군 (미국장 연동 종목 + 시가총액 상위 KR_TOP_N)
+        """
+        codes = dict.fromkeys(code for sector_codes in config.KOREA_MAPPING.values() for code in sector_codes)
+        codes.update(dict.fromkeys(self.collector.get_krx_listing().top_by_marcap(config.KR_TOP_N)))
+        return list(codes)
+
+    def warm_listing(self):
+        # 프로세스가 오래 떠 있으므로 메모리 목록을 버리고 하루 단위 캐시를 다시 확인
+        self.collector.krx_listing = None
+        return len(self.collector.get_krx_listing())
+
+    def warm_fundamentals(self):
+        self.collector.fundamentals = None
+        return len(self.collector.load_fundamental_snapshot() or {})
+
+    def warm_indices(self):
+        return len(self.collector.get_market_trend())
+
+    def warm_us_prices(self):
+        return len(self.collector.get_us_market_data(list(config.US_TICKERS.keys())))
+
+    def warm_kr_prices(self):
+        return len(self.collector.get_korea_market_data(self.korea_universe()))
+
+    def warm_news(self):
+        listing = self.collector.get_krx_listing()
+        tickers = {listing.name(code, code): code for code in self.korea_universe()}
+        return len(self.collector.get_news_sentiment_batch(list(tickers), tickers))
+
+    def warm_snapshots(self):
+        # KRX 전 종목 분석(KR_UNIVERSE='full')용 일별 시세 스냅샷
+        return len(self.collector.load_market_snapshots()['Close'].columns)
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 주식 투자 비서 - 캐시 예열 스케줄러")
+    parser.add_argument('--once', action='store_true', help="지금 한 번만 예열하고 종료")
+    parser.add_argument('--times', nargs='+', default=config.WARMUP_TIMES, help="거래일 예열 시각 (HH:MM)")
+    args = parser.parse_args()
+    utils.setup_logging()
+
+    scheduler = WarmupScheduler(times=args.times)
+    if args.once:
+        print(scheduler.warm_up())
+        return
+
+    stop_event = threading.Event()
+    try:
+        scheduler.run(stop_event=stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+        print("Warm-up scheduler stopped.")
+
+if __name__ == "__main__":
+    main()
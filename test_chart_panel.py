@@ -0,0 +1,136 @@
+import json
+import math
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import analyzer
+import config
+import indicators
+import pipeline
+import price_window
+
+def make_market_data(n_tickers=200, n_days=120, seed=0):
+    """
+    랜덤 워크 시세로 종목별 {'df': df} 데이터를 만듭니다.
+    상장일/거래정지(마지막 봉 없음)/가격 고정 종목 등을 섞어 패널 정렬을 검증합니다.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2024-01-02', periods=n_days)
+    data = {}
+    for i in range(n_tickers):
+        close = np.round(10000 * np.exp(np.cumsum(rng.normal(0, 0.03, n_days))))
+        volume = rng.integers(1000, 100000, n_days).astype(float)
+        df = pd.DataFrame({'Close': close, 'Volume': volume}, index=dates)
+
+        if i % 7 == 0:
+            df = df.iloc[rng.integers(0, n_days - 10):] # 신규 상장 (짧은 데이터 포함)
+        if i % 11 == 0:
+            df = df.iloc[:-rng.integers(1, 5)] # 최근 며칠 거래 없음
+        if i % 13 == 0:
+            df = df.drop(df.index[len(df) // 2]) # 중간 거래정지
+        if i % 17 == 0:
+            df['Close'] = 5000.0 # 가격 고정 (RSI 0/0)
+        data[f"{i:06d}"] = {'df': df}
+    return data
+
+def test_chart_panel_matches_per_ticker():
+    print("Testing panel chart scoring...")
+    stock_analyzer = analyzer.Analyzer()
+    market_data = make_market_data()
+
+    batch = stock_analyzer.analyze_chart_batch(market_data)
+    assert set(batch) == set(market_data)
+
+    signal_count = 0
+    for code, data in market_data.items():
+        expected = stock_analyzer.analyze_chart(data['df'])
+        assert batch[code] == expected, (code, batch[code], expected)
+        if expected[1] and expected[1] != ["데이터 부족"]:
+            signal_count += 1
+
+    print(f"Compared {len(market_data)} tickers, {signal_count} with signals.")
+    assert signal_count > 0
+
+def test_indicator_state_matches_rolling():
+    print("Testing incremental indicator state...")
+    stock_analyzer = analyzer.Analyzer()
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range('2024-01-02', periods=300)
+    close = pd.Series(np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates)))), 2), index=dates)
+    close.iloc[100:130] = close.iloc[100] # 가격 고정 구간 (RSI 0/0)
+    df = pd.DataFrame({'Close': close, 'Volume': rng.integers(1000, 100000, len(dates))}, index=dates)
+
+    ma_short = close.rolling(window=config.MA_SHORT).mean()
+    ma_long = close.rolling(window=config.MA_LONG).mean()
+    std = close.rolling(window=20).std()
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=config.RSI_PERIOD).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=config.RSI_PERIOD).mean()
+    rsi = 100 - (100 / (1 + gain / loss))
+
+    def same(a, b):
+        return (math.isnan(a) and math.isnan(b)) or math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+    state = indicators.IndicatorState()
+    for i, date in enumerate(dates):
+        state.update(date, close.iloc[i], df['Volume'].iloc[i])
+        assert same(state.ma_short, ma_short.iloc[i]), i
+        assert same(state.ma_long, ma_long.iloc[i]), i
+        assert same(state.std, std.iloc[i]), i
+        assert same(state.rsi, rsi.iloc[i]), i
+        if i >= 19:
+            assert stock_analyzer.analyze_chart_state(state) == stock_analyzer.analyze_chart(df.iloc[:i + 1]), i
+
+    # 장중 갱신: 같은 날짜 봉이 다시 들어오면 교체 (저장/복원 후에도 동일)
+    restored = indicators.IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    intraday = df.copy()
+    intraday.iloc[-1, 0] = intraday['Close'].iloc[-1] * 0.9
+    restored.update_from_df(intraday)
+    assert same(restored.ma_long, intraday['Close'].rolling(window=config.MA_LONG).mean().iloc[-1])
+    assert restored.count == len(dates)
+    print("Incremental state matches rolling indicators.")
+
+def test_indicator_state_skips_missing_bars():
+    print("Testing indicator state with missing closes...")
+    rng = np.random.default_rng(2)
+    dates = pd.bdate_range('2024-01-02', periods=60)
+    df = pd.DataFrame({'Close': np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 60))), 2),
+                       'Volume': rng.integers(1000, 100000, 60).astype(float)}, index=dates)
+    gappy = df.copy()
+    gappy.iloc[[10, 30, 45], 0] = np.nan # 종가 없는 봉 (거래정지 등)
+
+    state, expected = indicators.IndicatorState(), indicators.IndicatorState()
+    state.update_from_df(gappy)
+    expected.update_from_df(gappy.dropna())
+    assert state.to_dict() == expected.to_dict()
+    assert not math.isnan(state.ma_long) and not math.isnan(state.std)
+    print("NaN closes are skipped.")
+
+def test_pipeline_scores_from_indicator_state():
+    print("Testing pipeline chart scores from indicator state...")
+    market_data = make_market_data(n_tickers=60, seed=3)
+    records = {}
+    for code, data in market_data.items():
+        state = indicators.IndicatorState()
+        state.update_from_df(data['df'])
+        # 절반만 증분 상태를 가진 레코드 (나머지는 윈도우로 계산)
+        records[code] = price_window.MarketRecord(
+            price=0, prev_close=0, change_rate=0.0, volume=0,
+            window=price_window.PriceWindow.from_frame(data['df']),
+            indicators=state if int(code) % 2 else None
+        )
+
+    collector = SimpleNamespace(news_store=None, price_store=None)
+    stock_analyzer = analyzer.Analyzer()
+    expected = stock_analyzer.analyze_chart_batch(market_data)
+    for mode in ('batch', 'stock'):
+        scores = pipeline.AnalysisPipeline(collector=collector, stock_analyzer=stock_analyzer, mode=mode).chart_scores(records)
+        mismatched = [code for code in market_data if scores[code] != expected[code]]
+        assert not mismatched, (mode, mismatched)
+    print(f"Scored {len(records)} tickers, half from indicator state.")
+
+if __name__ == "__main__":
+    test_chart_panel_matches_per_ticker()
+    test_indicator_state_matches_rolling()
+    test_indicator_state_skips_missing_bars()
+    test_pipeline_scores_from_indicator_state()
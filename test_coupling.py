@@ -0,0 +1,107 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import config
+import coupling
+import price_store
+import price_window
+import utils
+
+def make_record(close, dates):
+    close = np.asarray(close, dtype='float64')
+    window = price_window.PriceWindow.from_frame(
+        pd.DataFrame({'Close': close, 'Volume': 1000}, index=dates), len(close)
+    )
+    return price_window.MarketRecord(
+        price=float(close[-1]), prev_close=float(close[-2]), change_rate=round((close[-1] / close[-2] - 1) * 100, 2),
+        volume=1000, window=window
+    )
+
+def make_markets(seed=0, n_days=40):
+    """
+    미국 3종목, 국내 4종목: 000001은 NVDA 전일 수익률을 따라가고(베타 0.8), 000002는 반대로(-0.6), 나머지는 무관
+    """
+    rng = np.random.default_rng(seed)
+    us_dates = pd.bdate_range('2024-03-01', periods=n_days)
+    kr_dates = us_dates + pd.offsets.BDay(1) # 미국 t일 마감 -> 국내 t+1일
+    us_returns = rng.normal(0, 0.02, (n_days, 3))
+    us_returns[-1] = [0.04, 0.0, 0.0] # 지난 밤 NVDA +4%
+    us_data = {
+        ticker: make_record(100 * np.cumprod(1 + us_returns[:, i]), us_dates)
+        for i, ticker in enumerate(['NVDA', 'KO', 'SPY'])
+    }
+
+    noise = rng.normal(0, 0.004, (n_days, 4))
+    lagged = us_returns[:, 0] # 국내 kr_dates[t] <- 미국 us_dates[t] (하루 전 미국 장)
+    kr_returns = np.column_stack([0.8 * lagged, -0.6 * lagged, np.zeros(n_days), np.zeros(n_days)]) + noise
+    kr_returns[-1] = 0.0 # 오늘(예측 대상)은 행렬에 쓰지 않음
+    kr_data = {
+        f"{j + 1:06d}": make_record(10000 * np.cumprod(1 + kr_returns[:, j]), kr_dates)
+        for j in range(4)
+    }
+    # 거래정지일 (pairwise complete)
+    kr_data['000004'].window.close[30] = np.nan
+    return us_data, kr_data, us_returns, kr_returns
+
+def test_lagged_correlation_matrix():
+    print("Testing lagged coupling matrix...")
+    us_data, kr_data, us_returns, kr_returns = make_markets()
+    engine = coupling.CouplingEngine()
+    matrix = engine.matrix(us_data, kr_data)
+
+    # pandas로 쌍별 계산한 값과 비교 (미국 t-1 -> 국내 t, 마지막 국내 봉 제외, 최근 COUPLING_WINDOW일)
+    us_close = engine.close_panel(us_data)
+    kr_close = engine.close_panel(kr_data)
+    us_ret = us_close.pct_change(fill_method=None)
+    kr_ret = kr_close.pct_change(fill_method=None).iloc[1:-1].tail(config.COUPLING_WINDOW)
+    for i, ticker in enumerate(matrix.us_tickers):
+        for j, code in enumerate(matrix.kr_codes):
+            pair = pd.concat([us_ret[ticker].set_axis(us_ret.index + pd.offsets.BDay(1)).reindex(kr_ret.index), kr_ret[code]], axis=1).dropna()
+            assert matrix.obs[i, j] == len(pair), (ticker, code)
+            assert abs(matrix.corr[i, j] - pair.iloc[:, 0].corr(pair.iloc[:, 1])) < 1e-5, (ticker, code)
+            beta = pair.iloc[:, 0].cov(pair.iloc[:, 1]) / pair.iloc[:, 0].var()
+            assert abs(matrix.beta[i, j] - beta) < 1e-5, (ticker, code)
+
+    assert matrix.corr[0, 0] > 0.9 and abs(matrix.beta[0, 0] - 0.8) < 0.1
+    assert matrix.corr[0, 1] < -0.9 and abs(matrix.beta[0, 1] + 0.6) < 0.1
+    assert matrix.obs[0, 3] == config.COUPLING_WINDOW - 2 # 거래정지 전후 수익률 제외
+
+    # 지난 밤 NVDA +4% -> 따라가는 종목 +, 반대로 움직이는 종목 -, 무관한 종목 0
+    scores = engine.scores(us_data, kr_data, sector_mapping={})
+    assert scores['000001']['score'] == 2 and scores['000002']['score'] == -2
+    assert '000003' not in scores and '000004' not in scores
+    assert scores['000001']['reason'][0].startswith("미국 NVDA +4.00% 등락 영향")
+
+    # 매핑(prior): 이력이 없는 신규 종목은 사전 상관/베타로 반영, 이력상 무관한 종목은 데이터가 우선
+    kr_data['000005'] = make_record([10000, 10100, 10200, 10100, 10300], kr_close.index[-5:])
+    prior = engine.scores(us_data, kr_data, sector_mapping={'Semiconductor': ['000003', '000005']})
+    assert prior['000005']['score'] == round(config.COUPLING_PRIOR_BETA * 4.0 / config.COUPLING_PCT_PER_POINT)
+    assert '000003' not in prior
+
+def test_coupling_matrix_cached_per_trading_day():
+    print("Testing coupling matrix cache...")
+    us_data, kr_data, _, _ = make_markets(seed=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = price_store.PriceStore(os.path.join(tmp, "price.db"))
+        try:
+            utils.metrics.reset()
+            first = coupling.CouplingEngine(store).matrix(us_data, kr_data)
+            # 같은 기준일 + 일부 종목만 요청 -> 저장된 행렬에서 잘라 사용
+            subset = {code: kr_data[code] for code in ['000002', '000001']}
+            cached = coupling.CouplingEngine(store).matrix(us_data, subset)
+            assert utils.metrics.counters.get('cache.coupling.miss') == 1
+            assert utils.metrics.counters.get('cache.coupling.hit') == 1
+            assert cached.kr_codes == ['000002', '000001']
+            assert np.allclose(cached.corr, first.corr[:, [1, 0]]) and np.allclose(cached.beta, first.beta[:, [1, 0]])
+
+            # 저장되지 않은 종목이 있으면 다시 계산
+            extra = dict(kr_data, **{'000009': kr_data['000001']})
+            coupling.CouplingEngine(store).matrix(us_data, extra)
+            assert utils.metrics.counters.get('cache.coupling.miss') == 2
+        finally:
+            store.conn.close()
+
+if __name__ == "__main__":
+    test_lagged_correlation_matrix()
+    test_coupling_matrix_cached_per_trading_day()
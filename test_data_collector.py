@@ -0,0 +1,179 @@
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import config
+import data_collector
+import utils
+
+@contextmanager
+def temp_collector(**kwargs):
+    """
+    임시 가격/뉴스 저장소를 쓰는 DataCollector
+    """
+    saved = (config.PRICE_DB_PATH, config.NEWS_DB_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        config.PRICE_DB_PATH = os.path.join(tmp, "price.db")
+        config.NEWS_DB_PATH = os.path.join(tmp, "news.db")
+        collector = data_collector.DataCollector(**kwargs)
+        try:
+            yield collector
+        finally:
+            collector.price_store.conn.close()
+            collector.news_store.conn.close()
+            config.PRICE_DB_PATH, config.NEWS_DB_PATH = saved
+
+def test_parallel_fetch_stops_on_cancel():
+    print("Testing cancellation during parallel fetch...")
+    with temp_collector(parallel=True, max_workers=2) as collector:
+        cancel_event = threading.Event()
+        fetched = []
+
+        def fetch_one(code):
+            time.sleep(0.01)
+            fetched.append(code)
+            if len(fetched) == 4:
+                cancel_event.set()
+            return {'code': code}
+
+        codes = [f"{i:06d}" for i in range(100)]
+        data = collector._collect(codes, fetch_one, cancel_event=cancel_event)
+        # 중지 요청 후 대기 중인 종목은 받지 않음 (진행 중이던 요청만 마무리)
+        assert len(fetched) < 10, len(fetched)
+        assert list(data) == codes[:len(data)] and len(data) <= len(fetched)
+
+        # 순차 수집도 종목 사이에서 확인
+        cancel_event.clear()
+        fetched.clear()
+        assert len(collector._collect(codes, fetch_one, parallel=False, cancel_event=cancel_event)) == 4
+    print(f"Stopped after {len(fetched)} of {len(codes)} tickers.")
+
+class FakeClock:
+    """
+    RateLimiter용 가짜 시계. sleep()은 기다리지 않고 시각만 앞으로 옮깁니다.
+    """
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def test_rate_limiter_with_fake_clock():
+    print("Testing token bucket rate limiter...")
+    clock = FakeClock()
+    limiter = utils.RateLimiter(5, burst=2, clock=clock.time, sleep=clock.sleep)
+
+    # 처음 burst(2)개는 바로, 이후는 초당 5개 (0.2초 간격)
+    times = []
+    for _ in range(10):
+        limiter.acquire()
+        times.append(round(clock.now, 6))
+    assert times == [0.0, 0.0, 0.2, 0.4, 0.6, 0.8, 1.0, 1.2, 1.4, 1.6], times
+
+    # 쉬는 동안 토큰이 쌓이지만 burst를 넘지 않음
+    clock.now += 10
+    start = clock.now
+    for _ in range(3):
+        limiter.acquire()
+    assert round(clock.now - start, 6) == 0.2
+
+    # rate 0이면 제한 없음
+    unlimited = utils.RateLimiter(0, clock=clock.time, sleep=clock.sleep)
+    sleeps = len(clock.sleeps)
+    for _ in range(100):
+        unlimited.acquire()
+    assert len(clock.sleeps) == sleeps
+    print("Rate limiter spacing OK.")
+
+def test_rate_limits_are_per_host():
+    print("Testing per-host fetch limits...")
+    assert data_collector.fdr_host("005930") == 'fchart.stock.naver.com'
+    assert data_collector.fdr_host("0088M0") == 'fchart.stock.naver.com' # 영문이 섞인 신규 종목코드
+    assert data_collector.fdr_host("KS11") == 'raw.githubusercontent.com'
+    assert data_collector.fdr_host("NVDA") == 'query2.finance.yahoo.com'
+
+    with temp_collector(parallel=True, max_workers=4) as collector:
+        clocks = {}
+        for host, limiter in collector.rate_limiters.items():
+            clocks[host] = FakeClock()
+            limiter.clock, limiter.sleep = clocks[host].time, clocks[host].sleep
+            limiter.tokens, limiter.updated = limiter.capacity, 0.0
+
+        # 스레드 풀에서 받은 결과도 입력 순서대로, 실패(None) 종목만 빠짐
+        codes = [f"{i:06d}" for i in range(12)] + ["NVDA", "AAPL", "KS11"]
+
+        def fetch_one(code):
+            collector._wait_rate_limit(code)
+            time.sleep(0.001 * (len(codes) - codes.index(code))) # 앞 종목일수록 늦게 끝남
+            return None if code == "000003" else {'code': code}
+
+        data = collector._collect(codes, fetch_one)
+        assert list(data) == [code for code in codes if code != "000003"]
+
+        # 국내 12건은 네이버 제한(10/초)만, 미국 2건은 야후 제한만 소모
+        assert clocks['fchart.stock.naver.com'].now > 0
+        assert clocks['query2.finance.yahoo.com'].now == 0 and clocks['raw.githubusercontent.com'].now == 0
+    print("Limits are keyed by upstream host.")
+
+class FakeSource:
+    """
+    fdr.DataReader 대역. 요청한 시작일을 기록하고 현재 시세(self.df)에서 잘라 반환합니다.
+    """
+    def __init__(self, n=30):
+        dates = pd.bdate_range('2026-09-01', periods=n)
+        close = np.linspace(10000, 12900, n)
+        self.df = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000}, index=dates)
+        self.requests = []
+
+    def __call__(self, code, start):
+        self.requests.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+        return self.df[self.df.index >= pd.Timestamp(start)].copy()
+
+    def add_bar(self):
+        last = self.df.iloc[[-1]].copy()
+        last.index = [self.df.index[-1] + pd.offsets.BDay()]
+        self.df = pd.concat([self.df, last])
+
+def test_incremental_merge_with_overlap_check():
+    print("Testing incremental price merge...")
+    source = FakeSource()
+    saved = data_collector.fdr.DataReader
+    data_collector.fdr.DataReader = source
+    try:
+        with temp_collector(parallel=False) as collector:
+            # 1. 처음에는 전체 수집
+            df = collector.get_price_history("005930", '2026-09-01')
+            assert source.requests == ['2026-09-01'] and len(df) == 30
+
+            # 2. 새 봉 하나: 최근 PRICE_OVERLAP_DAYS개 봉부터 다시 받아 병합
+            source.add_bar()
+            source.df.iloc[-2, source.df.columns.get_loc('Close')] += 50 # 마지막 저장일(장중 봉)은 값이 바뀌어도 정상
+            df = collector.get_price_history("005930", '2026-09-01')
+            overlap_from = source.df.index[-1 - config.PRICE_OVERLAP_DAYS].strftime("%Y-%m-%d")
+            assert source.requests[-1] == overlap_from
+            assert len(df) == 31 and df['Close'].tolist() == source.df['Close'].tolist()
+
+            # 3. 액면분할: 과거 수정주가가 모두 바뀜 -> 겹치는 구간이 달라 전체를 다시 받음
+            source.add_bar()
+            source.df[['Open', 'High', 'Low', 'Close']] /= 5
+            df = collector.get_price_history("005930", '2026-09-01')
+            assert source.requests[-2:] == [source.df.index[-1 - config.PRICE_OVERLAP_DAYS].strftime("%Y-%m-%d"), '2026-09-01']
+            assert len(df) == 32 and np.allclose(df['Close'], source.df['Close'])
+            assert collector.price_store.get_coverage("005930") == ('2026-09-01', source.df.index[-1].strftime("%Y-%m-%d"))
+    finally:
+        data_collector.fdr.DataReader = saved
+    print(f"{len(source.requests)} requests, split detected and reloaded.")
+
+if __name__ == "__main__":
+    test_rate_limiter_with_fake_clock()
+    test_rate_limits_are_per_host()
+    test_parallel_fetch_stops_on_cancel()
+    test_incremental_merge_with_overlap_check()
@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import tempfile
+import config
+import db_manager
+
+def make_result(i, **overrides):
+    result = {
+        'code': f"{i:06d}", 'name': f"종목{i}", 'score': i % 7 - 2,
+        'buy_price': 10000 + i, 'target_price': 11000 + i, 'stop_loss': 9500 + i,
+        'reasons': [f"사유 {i}", "차트 정배열"],
+    }
+    result.update(overrides)
+    return result
+
+def count_rows(db):
+    return db.conn.execute("SELECT COUNT(*) FROM STOCK_ANALYSIS").fetchone()[0]
+
+def test_bulk_save_in_one_transaction():
+    print("Testing bulk result save...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = db_manager.DBManager(os.path.join(tmp, "results.db"))
+        try:
+            assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+            # 실행 결과 전체를 BEGIN ... COMMIT 한 번으로 저장
+            statements = []
+            db.conn.set_trace_callback(statements.append)
+            db.save_results([make_result(i) for i in range(50)], run_id="run1", market='KR')
+            db.conn.set_trace_callback(None)
+            assert [s for s in statements if s.strip() in ('BEGIN', 'COMMIT')] == ['BEGIN ', 'COMMIT']
+            assert count_rows(db) == 50
+
+            top = db.get_top_results("run1", n=1, market='KR')[0]
+            assert top['SCORE'] == 4 and top['RECOMMENDATION'] == "매수 추천"
+            assert top['REASONS'] == [f"사유 {int(top['TICKER'])}", "차트 정배열"]
+
+            # 빈 결과는 아무것도 하지 않음
+            db.save_results([], run_id="run2")
+            assert count_rows(db) == 50
+        finally:
+            db.close()
+    print("50 results saved in one transaction.")
+
+def test_bulk_save_rolls_back_on_error():
+    print("Testing bulk save rollback...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = db_manager.DBManager(os.path.join(tmp, "results.db"))
+        try:
+            db.save_results([make_result(i) for i in range(5)], run_id="run1", market='KR')
+
+            # 중간 행에서 바인딩 실패 -> 앞서 넣은 행까지 모두 되돌림 (예외는 로그만 남김)
+            results = [make_result(i) for i in range(10)]
+            results[6]['buy_price'] = object()
+            db.save_results(results, run_id="run2", market='KR')
+            assert count_rows(db) == 5
+            assert db.get_top_results("run2") == []
+            assert not db.conn.in_transaction
+
+            # 실패 뒤에도 같은 커넥션으로 계속 저장
+            db.save_results([make_result(i) for i in range(3)], run_id="run3", market='KR')
+            assert count_rows(db) == 8
+        finally:
+            db.close()
+    print("Failed batch rolled back.")
+
+# 버전 관리 이전(user_version 0) 최초 스키마
+BASELINE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS STOCK_ANALYSIS (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        ANALYSIS_DATE TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        TICKER TEXT,
+        NAME TEXT,
+        SCORE REAL,
+        RECOMMENDATION TEXT,
+        BUY_PRICE INTEGER,
+        TARGET_PRICE INTEGER,
+        STOP_LOSS INTEGER,
+        REASONS TEXT
+    )
+"""
+
+def make_baseline_db(path, with_run_id=False):
+    conn = sqlite3.connect(path)
+    conn.execute(BASELINE_SCHEMA)
+    if with_run_id:
+        # 스키마 버전 도입 직전(RUN_ID만 추가, user_version 0)의 DB
+        conn.execute("ALTER TABLE STOCK_ANALYSIS ADD COLUMN RUN_ID TEXT")
+    conn.executemany(
+        "INSERT INTO STOCK_ANALYSIS (ANALYSIS_DATE, TICKER, NAME, SCORE, RECOMMENDATION, BUY_PRICE, TARGET_PRICE, STOP_LOSS, REASONS) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [("2024-01-02 09:00:00", "005930", "삼성전자", 3, "강력 추천", 70000, 77000, 66500, "차트 정배열\n수급 양호"),
+         ("2024-01-03 09:00:00", "005930", "삼성전자", -2, "매도 경고", 69000, 75900, 65550, "유상증자")]
+    )
+    conn.commit()
+    conn.close()
+
+def test_migrate_from_baseline_schema():
+    print("Testing schema migration...")
+    for with_run_id in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.db")
+            make_baseline_db(path, with_run_id)
+            db = db_manager.DBManager(path)
+            try:
+                assert db.conn.execute("PRAGMA user_version").fetchone()[0] == db_manager.SCHEMA_VERSION
+                columns = [row[1] for row in db.conn.execute("PRAGMA table_info(STOCK_ANALYSIS)")]
+                assert columns[-2:] == ['RUN_ID', 'MARKET']
+                tables = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')")}
+                assert {'RUNS', 'CHECKPOINTS', 'IDX_ANALYSIS_TICKER_DATE', 'IDX_ANALYSIS_RUN_SCORE'} <= tables
+
+                # 기존 행은 그대로 (새 컬럼은 NULL), 이력 조회에도 포함
+                history = db.get_score_history("005930")
+                assert [(row['SCORE'], row['RUN_ID']) for row in history] == [(3, None), (-2, None)]
+                assert db.conn.execute("SELECT REASONS FROM STOCK_ANALYSIS WHERE ID = 1").fetchone()[0] == "차트 정배열\n수급 양호"
+
+                # 새 실행 저장 후 다시 열어도 마이그레이션은 한 번만 (데이터 유지)
+                run_id = db.begin_run('KR', db_manager.config_hash())
+                db.save_results([make_result(1)], run_id=run_id, market='KR')
+            finally:
+                db.close()
+            db = db_manager.DBManager(path)
+            try:
+                assert count_rows(db) == 3
+                assert [row['TICKER'] for row in db.get_top_results(run_id)] == ["000001"]
+            finally:
+                db.close()
+    print("Baseline databases migrated.")
+
+def test_config_hash_covers_scoring_settings_only():
+    print("Testing config hash...")
+    saved = {key: getattr(config, key) for key in ('DB_PATH', 'LOG_PATH', 'METRICS_JSON_PATH', 'STREAM_INTERVAL', 'FETCH_MAX_WORKERS', 'MA_SHORT', 'BUY_SCORE')}
+    try:
+        base = db_manager.config_hash()
+        # 경로/로그/GUI/수집 설정이 바뀌어도 같은 실행을 이어서 분석
+        config.DB_PATH = "elsewhere.db"
+        config.LOG_PATH = None
+        config.METRICS_JSON_PATH = None
+        config.STREAM_INTERVAL = 1.0
+        config.FETCH_MAX_WORKERS = 1
+        assert db_manager.config_hash() == base
+
+        # 점수/추천 기준이 바뀌면 다른 설정
+        config.MA_SHORT = saved['MA_SHORT'] + 1
+        assert db_manager.config_hash() != base
+        config.MA_SHORT = saved['MA_SHORT']
+        config.BUY_SCORE = saved['BUY_SCORE'] + 1
+        assert db_manager.config_hash() != base
+    finally:
+        for key, value in saved.items():
+            setattr(config, key, value)
+    assert all(hasattr(config, key) for key in db_manager.SCORE_CONFIG_KEYS)
+    print("Hash ignores paths and GUI settings.")
+
+if __name__ == "__main__":
+    test_bulk_save_in_one_transaction()
+    test_bulk_save_rolls_back_on_error()
+    test_migrate_from_baseline_schema()
+    test_config_hash_covers_scoring_settings_only()
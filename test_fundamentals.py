@@ -0,0 +1,111 @@
+import os
+import tempfile
+import pandas as pd
+from pykrx import stock
+import analyzer
+import config
+import data_collector
+from test_pipeline_topk import FakeCollector, run_pipeline
+
+TRADING_DAYS = ['20261014', '20261015', '20261016']
+
+class FakeKrx:
+    """
+    pykrx 시장 전체 시가총액/펀더멘털 조회 대역. 마지막 거래일은 장중이라 데이터가 비어 있음.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def get_market_cap(self, date, market="ALL"):
+        self.calls.append(('cap', date))
+        if date == TRADING_DAYS[-1]:
+            return pd.DataFrame(columns=['시가총액'])
+        return pd.DataFrame({'시가총액': [500000000000, 50000000000]}, index=["005930", "000001"])
+
+    def get_market_fundamental(self, date, market="ALL"):
+        self.calls.append(('fundamental', date))
+        return pd.DataFrame({'PER': [12.5, 3.0, 8.0], 'PBR': [1.1, 0.4, 0.9], 'DIV': [2.0, 0.0, 1.5]},
+                            index=["005930", "000001", "000002"])
+
+def test_snapshot_walks_back_and_caches():
+    print("Testing fundamental snapshot loader...")
+    fake = FakeKrx()
+    saved = (config.PRICE_DB_PATH, config.NEWS_DB_PATH, stock.get_market_cap, stock.get_market_fundamental)
+    collectors = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config.PRICE_DB_PATH = os.path.join(tmp, "price.db")
+        config.NEWS_DB_PATH = os.path.join(tmp, "news.db")
+        stock.get_market_cap = fake.get_market_cap
+        stock.get_market_fundamental = fake.get_market_fundamental
+        try:
+            def make_collector():
+                collector = data_collector.DataCollector(parallel=False)
+                collector.get_recent_trading_days = lambda count: TRADING_DAYS[-count:]
+                collectors.append(collector)
+                return collector
+
+            # 1. 당일(빈 데이터)을 건너뛰고 직전 거래일 스냅샷을 한 번에 받음
+            collector = make_collector()
+            snapshot = collector.load_fundamental_snapshot()
+            assert fake.calls == [('cap', '20261016'), ('cap', '20261015'), ('fundamental', '20261015')]
+            assert snapshot["005930"] == {'market_cap': 500000000000, 'per': 12.5, 'pbr': 1.1, 'div': 2.0}
+            assert snapshot["000002"]['market_cap'] == 0 # 시가총액 없이 펀더멘털만 있는 종목
+            assert collector.price_store.get_meta('fundamentals_as_of') == '20261015'
+
+            # 종목별 조회는 스냅샷 딕셔너리 조회 (네트워크 없음)
+            assert collector.get_fundamental_data("000001")['per'] == 3.0
+            assert collector.get_fundamental_data("999999") is None
+
+            # 2. 같은 날 새 수집기는 저장소(FUNDAMENTALS + fundamentals_fetched_on)에서 읽음
+            fake.calls.clear()
+            assert make_collector().load_fundamental_snapshot() == snapshot
+            assert fake.calls == []
+
+            # 3. 다른 날 받은 스냅샷이면 다시 조회
+            collector = make_collector()
+            collector.price_store.set_meta('fundamentals_fetched_on', '20000101')
+            collector.load_fundamental_snapshot()
+            assert ('fundamental', '20261015') in fake.calls
+        finally:
+            for collector in collectors:
+                collector.price_store.conn.close()
+                collector.news_store.conn.close()
+            config.PRICE_DB_PATH, config.NEWS_DB_PATH, stock.get_market_cap, stock.get_market_fundamental = saved
+    print("Fundamental snapshot cached for the day.")
+
+def test_missing_fundamentals_are_unknown():
+    print("Testing missing fundamentals...")
+    stock_analyzer = analyzer.Analyzer()
+    assert stock_analyzer.analyze_fundamentals(None) == (None, "펀더멘털 데이터 없음 (미확인)")
+    assert stock_analyzer.analyze_fundamentals({'market_cap': None})[0] is None
+    assert stock_analyzer.analyze_fundamentals({'market_cap': 50000000000})[0] is False
+    assert stock_analyzer.analyze_fundamentals({'market_cap': 500000000000})[0] is True
+
+class SnapshotFailureCollector(FakeCollector):
+    """
+    펀더멘털 스냅샷 조회가 실패하는 수집기 (종목별 조회 횟수를 셈)
+    """
+    def __init__(self):
+        super().__init__(n_tickers=30)
+        self.fundamental_calls = 0
+
+    def load_fundamental_snapshot(self):
+        return None
+
+    def get_fundamental_data(self, ticker):
+        self.fundamental_calls += 1
+        return {'market_cap': 0} # 호출되면 모든 종목이 탈락
+
+def test_snapshot_failure_skips_filter():
+    print("Testing fail-soft fundamental filter...")
+    collector = SnapshotFailureCollector()
+    kr_results, news_calls = run_pipeline(top_k=0, collector=collector)
+    # 종목별 pykrx 조회로 대체하지 않고 이번 실행은 필터 없이 분석
+    assert collector.fundamental_calls == 0
+    assert len(kr_results) == len(collector.market_data)
+    print("Filter skipped without per-ticker lookups.")
+
+if __name__ == "__main__":
+    test_snapshot_walks_back_and_caches()
+    test_missing_fundamentals_are_unknown()
+    test_snapshot_failure_skips_filter()
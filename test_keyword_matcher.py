@@ -0,0 +1,67 @@
+import random
+import time
+import config
+import keyword_matcher
+
+def naive_score(titles, keywords, weights):
+    """
+    기존 Analyzer.analyze_news 방식 (제목 x 키워드 이중 루프)에 가중치 규칙을 더한 기준 구현
+    """
+    score = 0
+    reasons = []
+    for title in titles:
+        for polarity, sign, label in (('positive', 1, "호재"), ('negative', -1, "악재")):
+            found = [(weights.get(k, 1), -rank, k) for rank, k in enumerate(keywords[polarity]) if k in title]
+            if found:
+                weight, _, keyword = max(found)
+                score += sign * weight
+                reasons.append(f"{label} 뉴스: {keyword} 포함" + (f" ({sign * weight:+g}점)" if weight != 1 else ""))
+    return score, reasons
+
+def random_titles(rng, keywords, n):
+    words = keywords['positive'] + keywords['negative'] + ["삼성전자", "실적", "발표", "전망", "증시", "AB", "C", " "]
+    return ["".join(rng.choice(words) for _ in range(rng.randint(0, 6))) for _ in range(n)]
+
+def test_matches_naive_keyword_loop():
+    print("Testing Aho-Corasick keyword matcher...")
+    rng = random.Random(0)
+
+    # 현재 설정 (가중치 없음): 기존 결과와 완전히 동일
+    matcher = keyword_matcher.KeywordMatcher(config.NEWS_KEYWORDS, {})
+    titles = random_titles(rng, config.NEWS_KEYWORDS, 500)
+    assert matcher.score_titles(titles) == naive_score(titles, config.NEWS_KEYWORDS, {})
+
+    # 겹치는 키워드 + 가중치 + 동점
+    keywords = {'positive': ['he', 'she', 'hers', 'his', '승인', 'FDA 승인'], 'negative': ['her', 'rs', 'is', '하락']}
+    weights = {'hers': 2, 'FDA 승인': 3, 'rs': 2, 'her': 2}
+    matcher = keyword_matcher.KeywordMatcher(keywords, weights)
+    titles = random_titles(rng, keywords, 500) + ["ushers", "FDA 승인 후 하락", "", "his\x00hers"]
+    assert matcher.score_titles(titles) == naive_score(titles, keywords, weights)
+    assert matcher.max_weight('positive') == 3
+
+def test_large_dictionary():
+    rng = random.Random(1)
+    syllables = [chr(0xAC00 + i) for i in range(0, 11172, 37)]
+    keywords = {
+        'positive': list(dict.fromkeys("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(3000))),
+        'negative': list(dict.fromkeys("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(3000))),
+    }
+    weights = {keyword: rng.randint(1, 3) for keyword in keywords['positive'][::5]}
+    titles = ["".join(rng.choice(syllables) for _ in range(30)) + rng.choice(keywords['positive']) for _ in range(2000)]
+
+    start = time.perf_counter()
+    matcher = keyword_matcher.KeywordMatcher(keywords, weights)
+    result = matcher.score_titles(titles)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = naive_score(titles, keywords, weights)
+    naive_elapsed = time.perf_counter() - start
+
+    assert result == expected
+    print(f"{len(keywords['positive']) + len(keywords['negative'])} keywords x {len(titles)} titles: "
+          f"matcher {elapsed:.3f}s (incl. build) / naive {naive_elapsed:.3f}s")
+
+if __name__ == "__main__":
+    test_matches_naive_keyword_loop()
+    test_large_dictionary()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import pandas as pd
+import listing
+import price_store
+
+class FakeStockListing:
+    """
+    fdr.StockListing('KRX') 대역. 호출 횟수를 세고, fail=True면 예외를 냅니다.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+        self.df = pd.DataFrame({
+            'Code': ["005930", "000660", "035720", "900110"],
+            'Name': ["삼성전자", "SK하이닉스", "카카오", "이스트아시아홀딩스"],
+            'Market': ["KOSPI", "KOSPI", "KOSPI", "KOSDAQ"],
+            'Marcap': [400e12, 100e12, 20e12, None],
+        })
+
+    def __call__(self, market):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("KRX listing unavailable")
+        return self.df.copy()
+
+def test_listing_cached_for_the_day():
+    print("Testing KRX listing cache...")
+    fake = FakeStockListing()
+    saved = listing.fdr.StockListing
+    listing.fdr.StockListing = fake
+    with tempfile.TemporaryDirectory() as tmp:
+        store = price_store.PriceStore(os.path.join(tmp, "price.db"))
+        try:
+            # 1. 처음에는 새로 받아 KRX_LISTING 테이블에 저장
+            krx = listing.KrxListing(store).load()
+            assert fake.calls == 1 and len(krx) == 4
+            assert store.conn.execute("SELECT COUNT(*) FROM KRX_LISTING").fetchone()[0] == 4
+            today = store.get_meta('listing_fetched_on')
+
+            # 코드/종목명 조회와 시가총액 순위 (시가총액이 없으면 0)
+            assert krx.name("000660") == "SK하이닉스" and krx.name("999999", "999999") == "999999"
+            assert krx.code("카카오") == "035720" and krx.code("없는종목") is None
+            assert krx.market_cap("900110") == 0.0
+            assert krx.top_by_marcap(2) == ["005930", "000660"]
+            assert "005930" in krx and "999999" not in krx
+
+            # 2. 같은 날에는 저장소에서 읽음
+            assert len(listing.KrxListing(store).load()) == 4
+            assert fake.calls == 1
+
+            # 3. 날짜가 바뀌면 다시 받음 (상장 종목 변경 반영)
+            store.set_meta('listing_fetched_on', '20000101')
+            fake.df = fake.df[fake.df['Code'] != "035720"]
+            krx = listing.KrxListing(store).load()
+            assert fake.calls == 2 and krx.code("카카오") is None
+            assert store.conn.execute("SELECT COUNT(*) FROM KRX_LISTING").fetchone()[0] == 3
+            assert store.get_meta('listing_fetched_on') == today
+
+            # 4. 새로 받기에 실패하면 지난 목록을 그대로 사용
+            store.set_meta('listing_fetched_on', '20000101')
+            fake.fail = True
+            krx = listing.KrxListing(store).load()
+            assert fake.calls == 3 and krx.name("005930") == "삼성전자" and len(krx) == 3
+            assert store.get_meta('listing_fetched_on') == '20000101'
+        finally:
+            store.conn.close()
+            listing.fdr.StockListing = saved
+    print(f"{fake.calls} listing downloads.")
+
+if __name__ == "__main__":
+    test_listing_cached_for_the_day()
@@ -0,0 +1,175 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import analyzer
+import config
+import news_store
+import pipeline
+from test_pipeline_topk import FakeCollector
+
+class MockChatHandler(BaseHTTPRequestHandler):
+    """
+    OpenAI chat.completions 형식을 흉내 내는 로컬 Mock 서버.
+    프롬프트의 [번호] 블록마다 '호재'가 있으면 0.8, 없으면 -0.4점을 돌려줍니다.
+    """
+    requests_seen = []
+    max_tokens_seen = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body['messages'][0]['content']
+        self.requests_seen.append(prompt)
+        self.max_tokens_seen.append(body['max_tokens'])
+
+        news = prompt.split("[뉴스 제목들]")[1]
+        blocks = re.split(r"\[(\d+)\]", news)[1:]
+        results = [
+            {"id": int(number), "score": 0.8 if "호재" in text else -0.4, "reason": f"mock {number}"}
+            for number, text in zip(blocks[::2], blocks[1::2])
+        ]
+        content = "```json\n" + json.dumps({"results": results}, ensure_ascii=False) + "\n```"
+        payload = json.dumps({
+            "id": "mock", "object": "chat.completion", "created": 0, "model": body['model'],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        }).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+@contextmanager
+def mock_llm_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    saved = (config.OPENAI_API_KEY, config.OPENAI_BASE_URL)
+    config.OPENAI_API_KEY = "test-key"
+    config.OPENAI_BASE_URL = f"http://127.0.0.1:{server.server_port}/v1"
+    MockChatHandler.requests_seen.clear()
+    MockChatHandler.max_tokens_seen.clear()
+    try:
+        yield MockChatHandler
+    finally:
+        server.shutdown()
+        config.OPENAI_API_KEY, config.OPENAI_BASE_URL = saved
+
+def test_article_batches_fit_output_budget():
+    print("Testing article batch size against the output token limit...")
+    with mock_llm_server() as handler, tempfile.TemporaryDirectory() as tmp:
+        store = news_store.NewsStore(os.path.join(tmp, "news.db"))
+        try:
+            # 종목 10개 x 기사 10개 = 새 기사 100개
+            news, links = {}, {}
+            for i in range(10):
+                articles = [(f"종목{i} {'호재' if j % 2 else '공시'} {j}", f"https://news/{i}/{j}", None) for j in range(10)]
+                store.add_articles(f"종목{i}", articles)
+                news[i] = [title for title, link, published_at in articles]
+                links[i] = [link for title, link, published_at in articles]
+
+            results = analyzer.Analyzer(news_store=store).analyze_news_llm_batch(news, links)
+            assert len(results) == 10 and results[0][0] == (0.8 * 5 - 0.4 * 5) / 10
+            batches = -(-100 // config.LLM_ARTICLE_BATCH_SIZE)
+            assert len(handler.requests_seen) == batches
+            assert max(handler.max_tokens_seen) <= config.LLM_MAX_OUTPUT_TOKENS
+
+            # 인덱스에 저장된 기사는 다시 요청하지 않음 (새 Analyzer, 같은 저장소)
+            assert analyzer.Analyzer(news_store=store).analyze_news_llm_batch(news, links) == results
+            assert len(handler.requests_seen) == batches
+        finally:
+            store.conn.close()
+    print(f"100 articles analyzed in {batches} requests.")
+
+def test_titles_without_index():
+    print("Testing LLM analysis without a news index...")
+    with mock_llm_server() as handler:
+        news = {f"{i:06d}": [f"종목{i} {'호재' if i % 2 else '악재'} 뉴스", "시장 공통 뉴스"] for i in range(25)}
+        news["000100"] = [] # 뉴스 없음 -> 분석 대상 아님
+        results = analyzer.Analyzer().analyze_news_llm_batch(news)
+        # 같은 제목은 한 번만 (고유 제목 26개)
+        assert len(handler.requests_seen) == 1 and handler.requests_seen[0].count("시장 공통 뉴스") == 1
+        assert len(results) == 25 and "000100" not in results
+        assert results["000001"] == ((0.8 - 0.4) / 2, "mock 3") # 점수가 가장 극단적인 기사의 요약
+        assert analyzer.Analyzer().analyze_news_llm(news["000002"]) == (-0.4, "mock 1")
+
+def test_indexed_scores_expire():
+    print("Testing LLM score expiry in the news index...")
+    with mock_llm_server() as handler, tempfile.TemporaryDirectory() as tmp:
+        store = news_store.NewsStore(os.path.join(tmp, "news.db"))
+        try:
+            articles = [("종목 호재 기사", "https://news/a", None), ("종목 공시 기사", "https://news/b", None)]
+            store.add_articles("종목", articles)
+            links = [link for title, link, published_at in articles]
+            model = config.OPENAI_MODEL
+
+            # TTL이 지난 점수는 조회되지 않음
+            stale = datetime.now() - timedelta(hours=config.LLM_CACHE_TTL_HOURS + 1)
+            store.save_llm_scores(model, {links[0]: (0.5, "old")}, now=stale)
+            assert store.get_llm_scores(links, model) == {}
+
+            # 만료된 기사는 다시 분석 (프롬프트 번호 하나당 기사 하나)
+            result = analyzer.Analyzer(news_store=store).analyze_news_llm([title for title, link, published_at in articles], links)
+            assert result == ((0.8 - 0.4) / 2, "mock 1")
+            assert len(handler.requests_seen) == 1 and "[1] 종목 호재 기사" in handler.requests_seen[0]
+            assert store.get_llm_scores(links, model) == {links[0]: (0.8, "mock 1"), links[1]: (-0.4, "mock 2")}
+
+            # 새 점수를 저장할 때 TTL이 지난 점수는 지워짐
+            store.save_llm_scores(model, {links[1]: (0.1, "new")}, now=datetime.now() + timedelta(hours=config.LLM_CACHE_TTL_HOURS + 1))
+            assert store.conn.execute("SELECT COUNT(*) FROM NEWS_ARTICLES WHERE LLM_MODEL IS NOT NULL").fetchone()[0] == 1
+        finally:
+            store.conn.close()
+    print("Expired LLM scores are re-analyzed.")
+
+class IndexedNewsCollector(FakeCollector):
+    """
+    기사마다 링크가 있고 크롤링한 기사가 뉴스 인덱스에 들어 있는 수집기 (DataCollector와 같은 구성)
+    """
+    def __init__(self, store):
+        super().__init__(n_tickers=40, seed=4)
+        self.news_store = store
+        for keyword, (titles, links) in self.news.items():
+            links = [f"https://news.example.com/{keyword}/{i}" for i in range(len(titles))]
+            store.add_articles(keyword, [(title, link, None) for title, link in zip(titles, links)])
+            self.news[keyword] = (titles, links)
+
+def test_pipeline_reuses_indexed_llm_scores():
+    print("Testing pipeline LLM scoring through the news index...")
+    saved = (config.METRICS_JSON_PATH, config.METRICS_PROM_PATH)
+    config.METRICS_JSON_PATH = config.METRICS_PROM_PATH = None
+    with mock_llm_server() as handler, tempfile.TemporaryDirectory() as tmp:
+        store = news_store.NewsStore(os.path.join(tmp, "news.db"))
+        try:
+            collector = IndexedNewsCollector(store)
+            articles = sum(len(links) for titles, links in collector.news.values())
+            runs = []
+            for _ in range(2):
+                # 파이프라인 기본 구성의 Analyzer(news_store=collector.news_store) 사용
+                analysis = pipeline.AnalysisPipeline(collector=collector, kr_top_n=len(collector.market_data), top_k=0)
+                runs.append(analysis.run()[0])
+                if len(runs) == 1:
+                    requests = len(handler.requests_seen)
+                    assert 0 < requests <= -(-articles // config.LLM_ARTICLE_BATCH_SIZE) + 4 # 묶음(STREAM_CHUNK_SIZE)마다 나머지 한 번
+
+            # 두 번째 실행은 인덱스의 기사 점수만 사용
+            assert len(handler.requests_seen) == requests
+            with_news = [r for r in runs[0] if collector.news[r['name']][0]]
+            assert with_news and all(any(reason.startswith("[AI 뉴스 분석]") for reason in r['reasons']) for r in with_news)
+            assert [(r['code'], r['score']) for r in runs[1]] == [(r['code'], r['score']) for r in runs[0]]
+        finally:
+            store.conn.close()
+            config.METRICS_JSON_PATH, config.METRICS_PROM_PATH = saved
+    print(f"{articles} articles: {requests} LLM requests on the first run, none on the second.")
+
+if __name__ == "__main__":
+    test_article_batches_fit_output_budget()
+    test_titles_without_index()
+    test_indexed_scores_expire()
+    test_pipeline_reuses_indexed_llm_scores()
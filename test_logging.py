@@ -0,0 +1,87 @@
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
+import utils
+
+class SlowHandler(logging.Handler):
+    """
+    디스크가 느린 상황을 흉내 내는 핸들러 (레코드마다 10ms)
+    """
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        time.sleep(0.01)
+        self.records.append(self.format(record))
+
+def test_queue_logging_does_not_block_workers():
+    print("Testing queue-based logging...")
+    # 작업 디렉터리에 로그 파일을 남기지 않도록 임시 경로로 설정
+    listener = utils.setup_logging(os.path.join(tempfile.gettempdir(), "stock_assistant_test.log"))
+    slow = SlowHandler()
+    slow.setFormatter(logging.Formatter(utils.LOG_FORMAT))
+    saved_handlers = listener.handlers
+    listener.handlers = (slow,)
+    try:
+        previous = utils.set_log_context(run_id="run_test", stage="fetch")
+
+        def worker(n):
+            for i in range(25):
+                utils.log_info(f"worker {n} record {i}", ticker=f"{n:06d}")
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=utils.with_log_context(worker), args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        utils.set_log_context(**previous)
+
+        # 100개 x 10ms = 1초 이상 걸릴 쓰기를 작업 스레드는 기다리지 않음
+        assert elapsed < 0.5, elapsed
+
+        deadline = time.time() + 10
+        while len([r for r in slow.records if "worker" in r]) < 100 and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        listener.handlers = saved_handlers
+
+    records = [r for r in slow.records if "worker" in r]
+    assert len(records) == 100
+    assert "[run=run_test stage=fetch ticker=000002] worker 2 record 0" in "\n".join(records)
+    print(f"Logged 100 records in {elapsed * 1000:.1f}ms (handler needed ~1s).")
+
+def test_log_context_is_per_thread():
+    print("Testing per-thread log context...")
+    barrier = threading.Barrier(2)
+    seen = {}
+
+    def run(run_id):
+        # 두 실행이 번갈아 문맥을 바꿔도 서로의 값이 섞이지 않아야 함
+        utils.set_log_context(run_id=run_id, stage='fetch')
+        barrier.wait()
+        utils.set_log_context(stage=f"scores-{run_id}")
+        barrier.wait()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # 스레드 풀 작업은 with_log_context로 호출한 스레드의 값을 이어받음
+            seen[run_id] = list(executor.map(utils.with_log_context(lambda n: dict(utils._log_context.get())), range(2)))
+
+    threads = [threading.Thread(target=run, args=(run_id,)) for run_id in ("run_a", "run_b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for run_id in ("run_a", "run_b"):
+        assert all(context['run_id'] == run_id and context['stage'] == f"scores-{run_id}" for context in seen[run_id]), seen
+    assert utils._log_context.get()['run_id'] == '-' # 다른 스레드의 설정은 이 스레드에 영향 없음
+    print("Log context stays per thread.")
+
+if __name__ == "__main__":
+    test_queue_logging_does_not_block_workers()
+    test_log_context_is_per_thread()
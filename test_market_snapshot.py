@@ -0,0 +1,105 @@
+import os
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import analyzer
+import market_snapshot
+import pipeline
+import price_store
+from test_chart_panel import make_market_data
+from test_pipeline_topk import FakeCollector, run_pipeline
+
+class FakeSnapshots(market_snapshot.MarketSnapshots):
+    """
+    pykrx 대신 make_market_data 시세에서 하루치 전 종목 시세를 만들어 주는 스냅샷 캐시
+    """
+    def __init__(self, store, market_data):
+        super().__init__(store)
+        self.market_data = market_data
+        self.requests = []
+
+    def _fetch_day(self, date):
+        self.requests.append(date)
+        day = pd.Timestamp(date)
+        rows = []
+        for code, data in self.market_data.items():
+            df = data['df']
+            if day in df.index: # 봉이 없는 날(상장 전/거래정지)은 스냅샷에도 없음
+                close, volume = df.at[day, 'Close'], df.at[day, 'Volume']
+                rows.append((code, close, close, close, close, int(volume)))
+        return rows
+
+def trading_days(market_data):
+    dates = sorted({day for data in market_data.values() for day in data['df'].index})
+    return [day.strftime("%Y%m%d") for day in dates]
+
+def test_snapshots_update_one_day_at_a_time():
+    print("Testing incremental market snapshots...")
+    market_data = make_market_data(n_tickers=300, n_days=60, seed=3)
+    days = trading_days(market_data)
+    stock_analyzer = analyzer.Analyzer()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = price_store.PriceStore(os.path.join(tmp, "price.db"))
+        try:
+            snapshots = FakeSnapshots(store, market_data)
+
+            # 1. 처음에는 기간 전체를 거래일당 한 번씩 조회
+            assert snapshots.update(days[:30], now=datetime(2024, 12, 31)) == 30
+            assert snapshots.requests == days[:30]
+
+            # 2. 다음 거래일에는 새 거래일 하나만 조회하고, 기간 밖의 날은 삭제
+            snapshots.requests.clear()
+            assert snapshots.update(days[1:31], now=datetime(2024, 12, 31)) == 1
+            assert snapshots.requests == [days[30]]
+            assert min(snapshots.stored_dates()) == days[1]
+
+            # 3. 거래일 당일에 받은 스냅샷(장중 시세)은 다시 조회
+            today = datetime.strptime(days[31], "%Y%m%d").replace(hour=10)
+            snapshots.update(days[2:32], now=today)
+            snapshots.requests.clear()
+            assert snapshots.update(days[2:32], now=today.replace(hour=16)) == 1
+            assert snapshots.requests == [days[31]]
+
+            # 패널 차트 점수 == 종목별 일봉 차트 점수
+            panels = snapshots.load_panel(days[2])
+            data = market_snapshot.MarketSnapshots.market_data(panels, list(market_data))
+            window = pd.Timestamp(days[2]), pd.Timestamp(days[31])
+            expected = {}
+            for code, item in market_data.items():
+                df = item['df'].loc[window[0]:window[1]]
+                if len(df):
+                    expected[code] = stock_analyzer.analyze_chart(df)
+            assert set(data) == set(expected)
+            assert all(np.array_equal(data[code]['df']['Close'], market_data[code]['df']['Close'].loc[window[0]:window[1]]) for code in data)
+            chart_scores = stock_analyzer.analyze_chart_panel(panels['Close'], panels['Volume'])
+            mismatched = [code for code in expected if chart_scores[code] != expected[code]]
+            assert not mismatched, mismatched[:5]
+        finally:
+            store.conn.close()
+    print(f"Snapshots OK: {len(expected)} tickers from {len(days[2:32])} daily requests.")
+
+class SnapshotCollector(FakeCollector):
+    """
+    종목별 일봉 조회 없이 전 종목 스냅샷 패널만 제공하는 수집기
+    """
+    def load_market_snapshots(self):
+        return analyzer.Analyzer().build_panel(self.market_data, fields=('Open', 'Close', 'Volume'))
+
+    def get_korea_market_data(self, codes, cancel_event=None):
+        raise AssertionError("full universe must not fetch per-stock prices")
+
+def test_full_universe_pipeline_matches_top_universe():
+    print("Testing full-universe pipeline...")
+    full_results, full_calls = run_pipeline(top_k=0)
+    top_k = 5
+    for mode in pipeline.AnalysisPipeline.MODES:
+        kr_results, calls = run_pipeline(top_k=top_k, mode=mode, collector=SnapshotCollector(), universe='full')
+        assert len(kr_results) == len(full_results)
+        assert [r['score'] for r in kr_results[:top_k]] == [r['score'] for r in full_results[:top_k]], mode
+        assert calls < full_calls
+        print(f"{mode}: news crawled for {calls}/{full_calls} stocks")
+
+if __name__ == "__main__":
+    test_snapshots_update_one_day_at_a_time()
+    test_full_universe_pipeline_matches_top_universe()
@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import threading
+import utils
+
+def test_metrics_spans_counters_and_dump():
+    print("Testing instrumentation...")
+    metrics = utils.Metrics()
+
+    @metrics.timed("collector.fake_fetch")
+    def fake_fetch(i):
+        metrics.count("http.fake")
+        if i % 10 == 0:
+            metrics.count("cache.fake.hit")
+        return i
+
+    threads = [threading.Thread(target=lambda: [fake_fetch(i) for i in range(100)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        with metrics.span("stage.fail"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'http.fake': 400, 'cache.fake.hit': 40, 'stage.fail.errors': 1}
+    hist = snapshot['histograms']['collector.fake_fetch']
+    assert hist['count'] == 400 and sum(hist['buckets'].values()) == 400
+    assert hist['min'] <= hist['p50'] <= hist['p95'] <= hist['max']
+    assert snapshot['histograms']['stage.fail']['count'] == 1
+    assert metrics.rate('http.') > 0
+
+    summary = metrics.summary()
+    assert "collector.fake_fetch" in summary and "cache.fake.hit" in summary
+    print(summary)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "metrics.json")
+        prom_path = os.path.join(tmp, "metrics.prom")
+        metrics.dump(json_path, prom_path)
+        with open(json_path, encoding='utf-8') as f:
+            assert json.load(f)['counters']['http.fake'] == 400
+        with open(prom_path, encoding='utf-8') as f:
+            prom = f.read()
+    assert 'stock_assistant_events_total{name="http.fake"} 400' in prom
+    assert 'stock_assistant_latency_seconds_bucket{name="collector.fake_fetch",le="+Inf"} 400' in prom
+    assert 'stock_assistant_latency_seconds_count{name="stage.fail"} 1' in prom
+
+    metrics.reset()
+    assert metrics.snapshot()['counters'] == {}
+
+if __name__ == "__main__":
+    test_metrics_spans_counters_and_dump()
@@ -0,0 +1,190 @@
+import os
+import tempfile
+import threading
+import time
+import pandas as pd
+from urllib.parse import parse_qs, urlparse
+import analyzer
+import config
+import data_collector
+import news_store
+import utils
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeNaverSession:
+    """
+    최신순 네이버 뉴스 검색 결과를 흉내 냅니다. (페이지당 10개, start 파라미터)
+    """
+    def __init__(self):
+        self.articles = {} # keyword -> [(title, link)] 최신순
+        self.requests = 0
+
+    def publish(self, keyword, titles):
+        start = len(self.articles.get(keyword, []))
+        new = [(title, f"https://news.example.com/{keyword}/{start + i}") for i, title in enumerate(titles)]
+        self.articles[keyword] = list(reversed(new)) + self.articles.get(keyword, [])
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests += 1
+        query = parse_qs(urlparse(url).query)
+        keyword, start = query['query'][0], int(query['start'][0])
+        page = self.articles.get(keyword, [])[start - 1:start + 9]
+        items = "".join(f'<a class="news_tit" href="{link}">{title}</a>' for title, link in page)
+        return FakeResponse(f"<html><body>{items}</body></html>")
+
+def test_incremental_news_crawl_and_scoring():
+    print("Testing seen-article news index...")
+    saved = (config.PRICE_DB_PATH, config.NEWS_DB_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        config.PRICE_DB_PATH = os.path.join(tmp, "price.db")
+        config.NEWS_DB_PATH = os.path.join(tmp, "news.db")
+        collector = data_collector.DataCollector()
+        try:
+            session = FakeNaverSession()
+            collector.session = session
+            collector.news_rate_limiter = utils.RateLimiter(0)
+
+            # 1. 처음 검색: 최근 10개만 (1페이지)
+            session.publish("삼성전자", [f"삼성전자 기사 {i}" for i in range(30)])
+            titles, links = collector.get_news_sentiment("삼성전자")
+            assert session.requests == 1
+            assert titles == [f"삼성전자 기사 {i}" for i in range(29, 19, -1)]
+
+            # 2. 새 기사 3개: 1페이지에서 이미 본 기사를 만나면 중단
+            session.publish("삼성전자", ["삼성전자 공급계약 체결", "삼성전자 횡령 의혹", "삼성전자 신고가"])
+            titles, links = collector.get_news_sentiment("삼성전자")
+            assert session.requests == 2
+            assert titles[:4] == ["삼성전자 신고가", "삼성전자 횡령 의혹", "삼성전자 공급계약 체결", "삼성전자 기사 29"]
+            assert len(titles) == config.NEWS_MAX_TITLES
+
+            # 3. 새 기사 15개: 이미 본 기사가 나올 때까지 2페이지까지 넘김
+            breaking = [f"삼성전자 속보 {i}" for i in range(12)] + ["삼성전자 횡령 의혹", "삼성전자 공급계약 체결", "삼성전자 신고가"]
+            session.publish("삼성전자", breaking)
+            titles, links = collector.get_news_sentiment("삼성전자")
+            assert session.requests == 4
+            assert len(collector.news_store.seen_links("삼성전자", [link for title, link in session.articles["삼성전자"]])) == 28
+
+            # 4. 기사별 점수: 새 기사만 키워드/LLM 분석
+            stock_analyzer = analyzer.Analyzer(news_store=collector.news_store)
+            scored = []
+            score_each = stock_analyzer.keyword_matcher.score_each
+            stock_analyzer.keyword_matcher.score_each = lambda titles: scored.extend(titles) or score_each(titles)
+            requested = []
+            stock_analyzer.get_llm_client = lambda: object()
+            stock_analyzer._request_news_llm = lambda client, model, items: (
+                requested.extend(items) or {link: (0.5 if "신고가" in title else -0.1, title) for link, title in items}
+            )
+
+            assert sorted(stock_analyzer.analyze_news(titles, links)[1]) == sorted(analyzer.Analyzer().analyze_news(titles)[1])
+            assert len(scored) == 10
+            assert stock_analyzer.analyze_news(titles, links)[0] == 1 # 공급계약(+1), 횡령(-1), 신고가(+1)
+            assert len(scored) == 10
+
+            llm_score, llm_reason = stock_analyzer.analyze_news_llm(titles, links)
+            assert len(requested) == 10
+            assert llm_reason == "삼성전자 신고가" and abs(llm_score - (0.5 - 0.9) / 10) < 1e-9
+
+            # 새 기사 1개 -> 그 기사만 분석
+            session.publish("삼성전자", ["삼성전자 유상증자 결정"])
+            titles, links = collector.get_news_sentiment("삼성전자")
+            stock_analyzer.analyze_news(titles, links)
+            stock_analyzer.analyze_news_llm(titles, links)
+            assert len(scored) == 11 and len(requested) == 11
+        finally:
+            collector.price_store.conn.close()
+            collector.news_store.conn.close()
+            config.PRICE_DB_PATH, config.NEWS_DB_PATH = saved
+    print("Incremental news crawl and scoring OK.")
+
+def test_news_batch_crawl_keeps_order():
+    print("Testing concurrent news crawl...")
+    saved = (config.PRICE_DB_PATH, config.NEWS_DB_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        config.PRICE_DB_PATH = os.path.join(tmp, "price.db")
+        config.NEWS_DB_PATH = os.path.join(tmp, "news.db")
+        collector = data_collector.DataCollector()
+        try:
+            fake = FakeNaverSession()
+            keywords = ["삼성전자", "SK하이닉스", "카카오", "NAVER", "현대차", "LG에너지솔루션"]
+            for keyword in keywords:
+                fake.publish(keyword, [f"{keyword} 기사 {i}" for i in range(3)])
+
+            # 공유 세션의 get만 대체 (앞 키워드일수록 응답이 늦음), 동시에 진행 중인 요청 수를 기록
+            lock = threading.Lock()
+            in_flight = [0, 0] # 현재, 최대
+            def slow_get(url, headers=None, timeout=None):
+                with lock:
+                    in_flight[0] += 1
+                    in_flight[1] = max(in_flight)
+                    response = fake.get(url, headers=headers, timeout=timeout)
+                keyword = parse_qs(urlparse(url).query)['query'][0]
+                time.sleep(0.01 * (len(keywords) - keywords.index(keyword)))
+                with lock:
+                    in_flight[0] -= 1
+                return response
+            collector.session.get = slow_get
+            collector.news_rate_limiter = utils.RateLimiter(0)
+
+            # 중복 키워드는 한 번만 크롤링, 결과는 입력 순서대로
+            tickers = {keyword: f"{i:06d}" for i, keyword in enumerate(keywords)}
+            results = collector.get_news_sentiment_batch(keywords + ["삼성전자"], tickers)
+            assert list(results) == keywords
+            for keyword in keywords:
+                titles, links = results[keyword]
+                assert titles == [f"{keyword} 기사 {i}" for i in range(2, -1, -1)]
+            assert fake.requests == 2 * len(keywords) # 키워드당 기사 페이지 + 빈 다음 페이지
+
+            # 스레드 풀 크기(NEWS_MAX_WORKERS)만큼 동시에 요청하고, 세션 커넥션 풀도 같은 크기
+            assert 1 < in_flight[1] <= config.NEWS_MAX_WORKERS, in_flight
+            assert collector.session.get_adapter("https://search.naver.com")._pool_maxsize == config.NEWS_MAX_WORKERS
+
+            # 종목코드와 함께 뉴스 아카이브에 저장
+            assert [row['TICKER'] for row in collector.news_store.search(ticker="000002")] == ["000002"] * 3
+        finally:
+            collector.price_store.conn.close()
+            collector.news_store.conn.close()
+            config.PRICE_DB_PATH, config.NEWS_DB_PATH = saved
+    print(f"{len(keywords)} keywords crawled, up to {in_flight[1]} requests in flight.")
+
+def test_news_archive_search_and_history():
+    print("Testing full-text news archive...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = news_store.NewsStore(os.path.join(tmp, "news.db"))
+        try:
+            assert store.fts_enabled
+            store.add_articles("삼성전자", [
+                ("삼성전자, 대규모 유상증자를 결정", "l1", "2024-03-04 09:00:00"),
+                ("삼성전자 공급계약 체결", "l2", "2024-02-01 10:00:00"),
+                ("삼성전자 50% 급등", "l3", "2024-01-02 15:00:00"),
+                ("삼성전자 유상증자 철회", "l4", "2023-12-01 08:00:00"),
+            ], ticker="005930")
+            store.add_articles("카카오", [("카카오 유상증자 검토", "k1", "2024-02-10 11:00:00")], ticker="035720")
+
+            # 종목 + 기간 + 검색어 (조사가 붙은 제목도 검색)
+            rows = store.search("유상증자", ticker="005930", since="2024-01-01")
+            assert [row['LINK'] for row in rows] == ["l1"]
+            assert {row['LINK'] for row in store.search("유상증자")} == {"l1", "l4", "k1"}
+            assert [row['LINK'] for row in store.search("급등")] == ["l3"] # 짧은 검색어는 LIKE
+            assert [row['LINK'] for row in store.search("50%")] == ["l3"]
+            assert [row['LINK'] for row in store.search(ticker="005930", until="2024-02-01")] == ["l3", "l4"]
+
+            # 기간별 뉴스 점수 재계산 (네트워크 없음)
+            stock_analyzer = analyzer.Analyzer(news_store=store)
+            history = stock_analyzer.news_factor_history("005930", "2024-01-01", "2024-03-05", days=7)
+            assert history[pd.Timestamp("2024-01-03")] == 1 # 급등
+            assert history[pd.Timestamp("2024-01-02")] == 0 # 당일 기사는 다음 날부터 반영
+            assert history[pd.Timestamp("2024-02-02")] == 1 # 공급계약 체결
+            assert history[pd.Timestamp("2024-03-05")] == -1 # 유상증자
+            assert history[pd.Timestamp("2024-02-20")] == 0
+            assert stock_analyzer.analyze_news_window("005930", "2024-03-05")[0] == -1
+        finally:
+            store.conn.close()
+    print("News archive search OK.")
+
+if __name__ == "__main__":
+    test_incremental_news_crawl_and_scoring()
+    test_news_batch_crawl_keeps_order()
+    test_news_archive_search_and_history()
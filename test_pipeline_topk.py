@@ -0,0 +1,192 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+import analyzer
+import config
+import db_manager
+import pipeline
+from test_chart_panel import make_market_data
+
+class FakeListing:
+    def __init__(self, codes):
+        self.codes = codes
+
+    def top_by_marcap(self, n):
+        return self.codes[:n]
+
+    def name(self, code, default=None):
+        return f"종목{code}"
+
+class FakeCollector:
+    """
+    네트워크 없이 파이프라인을 돌리기 위한 수집기. 뉴스/수급 조회 횟수를 셉니다.
+    """
+    def __init__(self, n_tickers=120, seed=0):
+        rng = np.random.default_rng(seed)
+        self.market_data = make_market_data(n_tickers, 80, seed)
+        keywords = config.NEWS_KEYWORDS['positive'] + config.NEWS_KEYWORDS['negative']
+        self.news = {}
+        self.supply = {}
+        for code, data in self.market_data.items():
+            df = data['df']
+            df['Open'] = df['Close'] * rng.choice([0.98, 1.02], len(df))
+            data['price'] = int(df['Close'].iloc[-1])
+            data['prev_close'] = int(df['Close'].iloc[-2])
+            data['change_rate'] = round(rng.normal(0, 2), 2)
+            data['volume'] = int(df['Volume'].iloc[-1])
+            titles = [f"뉴스 {keyword}" for keyword in rng.choice(keywords, rng.integers(0, 4))]
+            if rng.random() < 0.05: # 호재가 쏟아지는 소수 종목
+                titles = [f"뉴스 {config.NEWS_KEYWORDS['positive'][0]}"] * config.NEWS_MAX_TITLES
+            self.news[f"종목{code}"] = (titles, ["http://news/" + code] if titles else [])
+            self.supply[code] = (bool(rng.random() < 0.3), bool(rng.random() < 0.3))
+        self.supply_index = None
+        self.news_calls = 0
+        self.price_store = None # 연동 행렬 캐시 없음
+
+    def get_market_trend(self):
+        return {'KOSPI': 'bull', 'KOSDAQ': 'bull'}
+
+    def get_us_market_data(self, tickers, cancel_event=None):
+        return {}
+
+    def get_krx_listing(self):
+        return FakeListing(list(self.market_data))
+
+    def get_korea_market_data(self, codes, cancel_event=None):
+        return {code: self.market_data[code] for code in codes}
+
+    def load_fundamental_snapshot(self):
+        pass
+
+    def load_supply_demand_index(self):
+        self.supply_index = self.supply
+
+    def get_fundamental_data(self, ticker):
+        return None
+
+    def get_news_sentiment(self, keyword, ticker=None):
+        self.news_calls += 1
+        return self.news[keyword]
+
+    def get_news_sentiment_batch(self, keywords, tickers=None):
+        return {keyword: self.get_news_sentiment(keyword) for keyword in keywords}
+
+    def get_supply_demand(self, ticker):
+        if self.supply_index is not None:
+            return self.supply_index[ticker]
+        return self.supply[ticker]
+
+@contextmanager
+def metrics_files_disabled():
+    saved = (config.METRICS_JSON_PATH, config.METRICS_PROM_PATH)
+    config.METRICS_JSON_PATH = config.METRICS_PROM_PATH = None # 계측 파일 저장 생략
+    try:
+        yield
+    finally:
+        config.METRICS_JSON_PATH, config.METRICS_PROM_PATH = saved
+
+def run_pipeline(top_k, mode='batch', on_result=None, collector=None, **kwargs):
+    with metrics_files_disabled():
+        collector = collector or FakeCollector()
+        stock_analyzer = analyzer.Analyzer()
+        stock_analyzer.analyze_news_llm = lambda *args: (None, None) # 키워드 분석만 사용
+        stock_analyzer.analyze_news_llm_batch = lambda *args: {}
+        analysis = pipeline.AnalysisPipeline(
+            collector=collector, stock_analyzer=stock_analyzer, mode=mode, kr_top_n=len(collector.market_data), top_k=top_k,
+            on_result=on_result, **kwargs
+        )
+        kr_results, us_results = analysis.run()
+    return kr_results, collector.news_calls
+
+def test_tiered_top_k_matches_full_evaluation():
+    print("Testing tiered top-K evaluation...")
+    full_results, full_calls = run_pipeline(top_k=0)
+    for mode in ('batch', 'stock'):
+        for k in (1, 5, 10):
+            tiered_results, tiered_calls = run_pipeline(top_k=k, mode=mode)
+            assert [r['score'] for r in tiered_results[:k]] == [r['score'] for r in full_results[:k]], (mode, k)
+            assert all(r.get('evaluated', True) for r in tiered_results[:k])
+            assert len(tiered_results) == len(full_results)
+            assert tiered_calls <= full_calls, (mode, k, tiered_calls, full_calls)
+            if mode == 'batch': # 수급 인덱스가 있으면 상한이 뉴스만큼만 남아 생략 효과가 큼
+                assert tiered_calls < full_calls, (k, tiered_calls, full_calls)
+            print(f"{mode} top-{k}: news crawled for {tiered_calls}/{full_calls} stocks")
+
+def test_streamed_results_match_final_results():
+    print("Testing streamed pipeline results...")
+    full_results, full_calls = run_pipeline(top_k=0)
+    for top_k in (0, 5):
+        collector = FakeCollector()
+        streamed = []
+        calls_at_first = []
+
+        def on_result(market, result):
+            if not streamed:
+                calls_at_first.append(collector.news_calls)
+            streamed.append((market, result))
+
+        kr_results, calls = run_pipeline(top_k=top_k, on_result=on_result, collector=collector)
+        # 모든 종목이 한 번씩, 매매 전략까지 붙은 최종 결과와 같은 dict로 전달됨
+        assert len(streamed) == len(kr_results)
+        assert all(market == 'KR' for market, result in streamed)
+        assert {id(result) for market, result in streamed} == {id(result) for result in kr_results}
+        assert all('buy_price' in result for market, result in streamed)
+        # 첫 결과는 뉴스를 한 묶음만 조회한 뒤에 나옴
+        assert calls_at_first[0] <= config.STREAM_CHUNK_SIZE < calls
+        if top_k == 0:
+            assert [r['score'] for r in kr_results] == [r['score'] for r in full_results]
+        print(f"top-{top_k}: first result after {calls_at_first[0]}/{calls} news lookups")
+
+def test_cancel_and_resume_from_checkpoints():
+    print("Testing cancellation and checkpoint resume...")
+    full_results, full_calls = run_pipeline(top_k=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = db_manager.DBManager(os.path.join(tmp, "stock.db"))
+        try:
+            for top_k in (0, 5):
+                # 1. 결과가 몇 개 나온 뒤 중지 요청 -> 다음 확인 지점에서 중단
+                cancel_event = threading.Event()
+                cancel_after = 30 if top_k == 0 else 6
+                done = []
+
+                def on_result(market, result):
+                    done.append(result)
+                    if len(done) == cancel_after:
+                        cancel_event.set()
+
+                try:
+                    run_pipeline(top_k=top_k, on_result=on_result, db=db, cancel_event=cancel_event)
+                    assert False, "expected AnalysisCancelled"
+                except pipeline.AnalysisCancelled:
+                    pass
+                run = db.get_resumable_run(db_manager.config_hash())
+                assert run['STATUS'] == 'cancelled'
+                saved = db.load_checkpoints(run['RUN_ID'])['KR']
+                assert cancel_after <= len(saved) < len(full_results)
+
+                # 2. 이어서 분석: 체크포인트에 있는 종목은 뉴스를 다시 조회하지 않음
+                collector = FakeCollector()
+                resumed = []
+                kr_results, calls = run_pipeline(
+                    top_k=top_k, collector=collector, db=db, resume_run_id=run['RUN_ID'],
+                    on_result=lambda market, result: resumed.append(result)
+                )
+                assert len(resumed) == len(kr_results)
+                if top_k == 0:
+                    assert calls == full_calls - len(saved)
+                    assert [r['score'] for r in kr_results] == [r['score'] for r in full_results]
+                else:
+                    assert [r['score'] for r in kr_results[:top_k]] == [r['score'] for r in full_results[:top_k]]
+                assert db.get_resumable_run(db_manager.config_hash()) is None
+                assert db.load_checkpoints(run['RUN_ID']) == {}
+                assert len(db.get_top_results(run['RUN_ID'], n=1000, market='KR')) == len(kr_results)
+                print(f"top-{top_k}: resumed with {len(saved)} checkpointed stocks, {calls} news lookups")
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    test_tiered_top_k_matches_full_evaluation()
+    test_streamed_results_match_final_results()
+    test_cancel_and_resume_from_checkpoints()
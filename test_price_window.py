@@ -0,0 +1,65 @@
+import sys
+import pandas as pd
+import analyzer
+import config
+import price_window
+from test_chart_panel import make_market_data
+
+def make_records(market_data):
+    records = {}
+    for code, data in market_data.items():
+        df = data['df']
+        records[code] = price_window.MarketRecord(
+            price=int(df['Close'].iloc[-1]), prev_close=int(df['Close'].iloc[-2]), change_rate=0.0,
+            volume=int(df['Volume'].iloc[-1]), window=price_window.PriceWindow.from_frame(df)
+        )
+    return records
+
+def record_bytes(record):
+    window = record.window
+    arrays = sum(getattr(window, name).nbytes for name in window.__slots__)
+    return sys.getsizeof(record) + sys.getsizeof(window) + arrays
+
+def test_compact_records_match_full_history():
+    print("Testing compact price windows...")
+    stock_analyzer = analyzer.Analyzer()
+    market_data = make_market_data(n_tickers=200, n_days=250, seed=5)
+    for data in market_data.values():
+        data['df']['Open'] = data['df']['Close'].shift(1).fillna(data['df']['Close'])
+    records = make_records(market_data)
+
+    # 최근 PRICE_WINDOW개 봉만 보관해도 차트/거래량 점수는 전체 기간과 같음
+    assert all(len(record.window) == min(config.PRICE_WINDOW, len(market_data[code]['df'])) for code, record in records.items())
+    assert stock_analyzer.analyze_chart_batch(records) == stock_analyzer.analyze_chart_batch(market_data)
+    for code, record in records.items():
+        full = market_data[code]
+        assert stock_analyzer.analyze_chart(record['df']) == stock_analyzer.analyze_chart(full['df']), code
+        full_data = {'df': full['df'], 'price': record.price, 'volume': record.volume}
+        assert stock_analyzer.analyze_volume(record, True) == stock_analyzer.analyze_volume(full_data, True), code
+
+    # 기존 dict와 같은 방식으로 읽기
+    record = next(iter(records.values()))
+    assert record['price'] == record.price and record.get('prev_close') == record.prev_close
+    assert 'df' in record and record.get('missing', 0) == 0
+    assert list(record['df'].columns) == ['Open', 'Close', 'Volume']
+
+    # 종목당 메모리는 기간 길이와 무관
+    long_history = make_records(make_market_data(n_tickers=20, n_days=1000, seed=6))
+    short_history = make_records(make_market_data(n_tickers=20, n_days=60, seed=6))
+    assert max(map(record_bytes, long_history.values())) == max(map(record_bytes, short_history.values()))
+    df_bytes = next(iter(market_data.values()))['df'].memory_usage(index=True).sum()
+    print(f"Record: {record_bytes(record)} bytes (full DataFrame: {df_bytes} bytes)")
+
+def test_large_volume_round_trips():
+    print("Testing large daily volumes...")
+    # int32 범위(약 21억주)를 넘는 거래량도 그대로 보관
+    volumes = [2**31 + 5, 3_500_000_000, float('nan'), 1200]
+    df = pd.DataFrame({'Close': [100.0, 101.0, 99.0, 98.0], 'Volume': volumes}, index=pd.bdate_range('2026-10-12', periods=4))
+    window = price_window.PriceWindow.from_frame(df)
+    assert window.volume.tolist() == [2**31 + 5, 3_500_000_000, 0, 1200]
+    assert window.frame()['Volume'].iloc[1] == 3_500_000_000
+    print("Volumes above 2^31 kept.")
+
+if __name__ == "__main__":
+    test_compact_records_match_full_history()
+    test_large_volume_round_trips()
@@ -0,0 +1,101 @@
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+import results_model
+import utils
+
+def make_results(n, seed=0):
+    rng = random.Random(seed)
+    results = []
+    for i in range(n):
+        price = rng.randint(1000, 500000)
+        results.append({
+            'code': f"{i:06d}",
+            'name': f"종목{i}" if i % 100 else f"삼성{i}",
+            'price': price,
+            'change_rate': round(rng.uniform(-10, 10), 2),
+            'diff': rng.randint(-1000, 1000),
+            'yesterday_profit': round(rng.uniform(-10, 10), 2),
+            'score': rng.randint(-5, 10),
+            'reasons': [f"사유 {i}"],
+            'buy_price': price,
+            'target_price': int(price * 1.05),
+            'stop_loss': int(price * 0.97),
+        })
+    results.sort(key=lambda x: x['score'], reverse=True)
+    return results
+
+def test_results_model_sort_filter_and_detail_cache():
+    print("Testing results table model...")
+    QApplication.instance() or QApplication(sys.argv)
+    model = results_model.ResultsTableModel(is_kr=True)
+    proxy = results_model.ResultsFilterProxy()
+    proxy.setSourceModel(model)
+
+    results = make_results(3000)
+    start = time.perf_counter()
+    model.set_results(results)
+    elapsed = time.perf_counter() - start
+    assert proxy.rowCount() == 3000
+
+    # 표시 문자열은 data()에서 만들어짐
+    first = results[0]
+    assert proxy.index(0, 1).data() == f"{first['name']} ({first['code']})"
+    assert proxy.index(0, 2).data() == f"{first['price']:,}원"
+    assert proxy.index(0, 4).data(Qt.ItemDataRole.ForegroundRole) == results_model.recommendation_color(first['score'])
+
+    # 현재가 정렬은 문자열이 아니라 숫자 기준
+    proxy.sort(2, Qt.SortOrder.DescendingOrder)
+    prices = [proxy.index(i, 2).data(results_model.SORT_ROLE) for i in range(proxy.rowCount())]
+    assert prices == sorted((float(r['price']) for r in results), reverse=True)
+
+    # 종목명 검색 (순위는 전체 기준 유지)
+    proxy.sort(0, Qt.SortOrder.AscendingOrder)
+    proxy.setFilterFixedString("삼성")
+    assert proxy.rowCount() == 30
+    row = proxy.mapToSource(proxy.index(0, 0)).row()
+    assert proxy.index(0, 0).data() == str(row + 1)
+
+    # 상세 HTML은 종목별로 한 번만 생성
+    html = model.detail_html(row)
+    assert "사유" in html and model.detail_html(row) is html
+    assert len(model.detail_cache) == 1
+
+    model.set_results(results[:10])
+    assert proxy.rowCount() == 0 and model.detail_cache == {}
+    print(f"Loaded {len(results)} rows in {elapsed * 1000:.1f}ms.")
+
+def test_streamed_rows_are_inserted_by_rank():
+    print("Testing incremental result streaming...")
+    QApplication.instance() or QApplication(sys.argv)
+    model = results_model.ResultsTableModel(is_kr=True)
+    proxy = results_model.ResultsFilterProxy()
+    proxy.setSourceModel(model)
+    proxy.sort(0, Qt.SortOrder.AscendingOrder)
+
+    results = make_results(500, seed=2)
+    streamed = results[::-1] # 점수 낮은 종목부터 도착해도 순위대로 표시
+    flushes = []
+    buffer = utils.BatchBuffer(lambda items: flushes.append(len(items)) or model.add_results(items), 20, 60)
+    for result in streamed:
+        buffer.add(result)
+    buffer.flush()
+    assert flushes == [20] * 25
+
+    ranked = [proxy.index(i, 4).data(results_model.SORT_ROLE) for i in range(proxy.rowCount())]
+    assert ranked == sorted((float(r['score']) for r in results), reverse=True)
+    assert [proxy.index(i, 0).data() for i in range(proxy.rowCount())] == [str(i + 1) for i in range(500)]
+
+    # 같은 점수는 먼저 도착한 종목이 위
+    top = [r for r in streamed if r['score'] == results[0]['score']]
+    assert [model.result(i)['code'] for i in range(len(top))] == [r['code'] for r in top]
+
+if __name__ == "__main__":
+    test_results_model_sort_filter_and_detail_cache()
+    test_streamed_rows_are_inserted_by_rank()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import config
+import data_collector
+import scheduler
+import utils
+from test_news_store import FakeNaverSession
+
+class RecordingCollector:
+    """
+    예열 작업이 언제, 어떤 순서로 호출되는지 기록하는 수집기
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = []
+        self.price_store = type("Store", (), {"set_meta": lambda *args: None, "db_now": lambda self: None})()
+        self.krx_listing = None
+        self.fundamentals = None
+        self.warm_since = None
+
+    def record(self, name, result):
+        self.calls.append((self.clock.now().strftime("%m-%d %H:%M"), name))
+        return result
+
+    def get_krx_listing(self):
+        return FakeListing(["005930", "000660"])
+
+    def load_fundamental_snapshot(self):
+        return self.record("fundamentals", {"005930": {}})
+
+    def get_market_trend(self):
+        return self.record("indices", {"KOSPI": "bull", "KOSDAQ": "bull"})
+
+    def get_us_market_data(self, tickers, cancel_event=None):
+        return self.record("us_prices", dict.fromkeys(tickers))
+
+    def get_korea_market_data(self, codes, cancel_event=None):
+        raise RuntimeError("network down") # 실패해도 나머지 작업은 계속
+
+    def get_news_sentiment_batch(self, keywords, tickers=None):
+        return self.record("news", dict.fromkeys(keywords))
+
+class FakeListing:
+    def __init__(self, codes):
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def top_by_marcap(self, n):
+        return self.codes[:n]
+
+    def name(self, code, default=None):
+        return f"종목{code}"
+
+def test_schedule_follows_trading_calendar():
+    print("Testing warm-up schedule with a simulated clock...")
+    # 금요일 밤 -> 주말과 월요일 휴장일을 건너뛰고 화요일 08:30부터
+    clock = scheduler.SimulatedClock(datetime(2026, 10, 16, 20, 0))
+    calendar = scheduler.TradingCalendar(holidays=["2026-10-19"])
+    collector = RecordingCollector(clock)
+    warmup = scheduler.WarmupScheduler(collector, clock=clock, calendar=calendar, times=["15:00", "08:30"])
+
+    assert calendar.next_run(datetime(2026, 10, 20, 8, 30), warmup.times) == datetime(2026, 10, 20, 15, 0)
+    assert warmup.run(max_runs=3) == 3
+    runs = sorted({when for when, name in collector.calls})
+    assert runs == ["10-20 08:30", "10-20 15:00", "10-21 08:30"], runs
+    assert [name for when, name in collector.calls if when == runs[0]] == ["fundamentals", "indices", "us_prices", "news"]
+
+    # 휴장일 목록에 없는 해는 한 번만 경고 (주말이 아니면 거래일로 봄)
+    assert calendar.check_year(2026) is False
+    assert calendar.is_trading_day(datetime(2027, 1, 1)) and calendar.warned_years == {"2027"}
+    assert calendar.check_year(2027) is False
+
+    summary = warmup.warm_up()
+    assert summary['kr_prices'] is None and summary['listing'] == 2 and summary['news'] == len(warmup.korea_universe())
+
+def make_ohlcv(start, n=30):
+    dates = pd.bdate_range(start, periods=n)
+    close = np.linspace(100, 130, n)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000}, index=dates)
+
+def test_analysis_after_warm_up_skips_network():
+    print("Testing warm caches...")
+    saved = (config.PRICE_DB_PATH, config.NEWS_DB_PATH, data_collector.fdr.DataReader)
+    fdr_calls = []
+
+    def fake_reader(code, start):
+        fdr_calls.append(code)
+        return make_ohlcv("2024-01-02")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.PRICE_DB_PATH = os.path.join(tmp, "price.db")
+        config.NEWS_DB_PATH = os.path.join(tmp, "news.db")
+        data_collector.fdr.DataReader = fake_reader
+        collectors = []
+        try:
+            def make_collector():
+                collector = data_collector.DataCollector(parallel=False)
+                collector.session = session
+                collector.news_rate_limiter = utils.RateLimiter(0)
+                collector.krx_listing = FakeListing(["005930", "000660"])
+                collectors.append(collector)
+                return collector
+
+            session = FakeNaverSession()
+            for code in ("005930", "000660"):
+                session.publish(f"종목{code}", [f"종목{code} 기사 {i}" for i in range(5)])
+
+            # 1. 예열 (국내 시세 + 뉴스)
+            warmup = scheduler.WarmupScheduler(make_collector(), tasks=('kr_prices', 'news'))
+            universe = warmup.korea_universe() # 미국장 연동 종목 + 시가총액 상위
+            assert warmup.warm_up() == {'kr_prices': len(universe), 'news': len(universe)}
+            assert len(fdr_calls) == len(universe)
+            assert all(warmup.collector.news_store.crawled_at(f"종목{code}") for code in universe)
+
+            # 2. 예열 직후 분석: 예열한 종목/키워드는 네트워크 조회 없음
+            collector = make_collector()
+            assert collector.warm_since is not None
+            fdr_calls.clear()
+            requests_before = session.requests
+            data = collector.get_korea_market_data(["005930", "000660"])
+            titles, links = collector.get_news_sentiment("종목005930", "005930")
+            assert fdr_calls == [] and session.requests == requests_before
+            assert data["005930"]['price'] == 130 and titles[0] == "종목005930 기사 4"
+
+            # 예열하지 않은 종목은 평소처럼 조회
+            collector.get_korea_market_data(["999999"])
+            assert fdr_calls == ["999999"]
+
+            # 3. 예열이 오래되면(WARMUP_VALID_MINUTES 초과) 다시 조회
+            collector.price_store.set_meta('warmup_started_at', "2000-01-01 00:00:00")
+            assert make_collector().warm_since is None
+        finally:
+            for collector in collectors:
+                collector.price_store.conn.close()
+                collector.news_store.conn.close()
+            config.PRICE_DB_PATH, config.NEWS_DB_PATH, data_collector.fdr.DataReader = saved
+    print("Warm caches OK.")
+
+if __name__ == "__main__":
+    test_schedule_follows_trading_calendar()
+    test_analysis_after_warm_up_skips_network()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import pandas as pd
+from pykrx import stock
+import config
+import data_collector
+
+# 거래일별 순매수 종목 (마지막 거래일은 장 마감 전이라 데이터 없음)
+NET_BUYERS = {
+    '20260909': {'외국인': ["005930", "000660"], '기관합계': ["005930"]},
+    '20260910': {'외국인': ["005930", "000660"], '기관합계': ["005930", "035420"]},
+    '20260911': {'외국인': ["005930", "000660"], '기관합계': ["005930"]},
+    '20260914': {'외국인': ["000660"], '기관합계': ["005930"]},
+    '20260915': None,
+}
+
+def fake_net_purchases(fromdate, todate, market, investor):
+    day = NET_BUYERS.get(fromdate)
+    if day is None:
+        return pd.DataFrame(columns=['순매수거래대금'])
+    buyers = day[investor]
+    tickers = ["005930", "000660", "035420"]
+    return pd.DataFrame({'순매수거래대금': [100 if t in buyers else -100 for t in tickers]}, index=tickers)
+
+def test_supply_index_skips_unpublished_days():
+    print("Testing supply/demand index before flows are published...")
+    saved = (config.PRICE_DB_PATH, config.NEWS_DB_PATH, stock.get_market_net_purchases_of_equities)
+    with tempfile.TemporaryDirectory() as tmp:
+        config.PRICE_DB_PATH = os.path.join(tmp, "price.db")
+        config.NEWS_DB_PATH = os.path.join(tmp, "news.db")
+        stock.get_market_net_purchases_of_equities = fake_net_purchases
+        try:
+            collector = data_collector.DataCollector(parallel=False)
+            collector.get_recent_trading_days = lambda count: sorted(NET_BUYERS)[-count:]
+
+            # 당일(빈 데이터)을 건너뛰고 직전 3거래일(0910~0914)로 계산
+            index = collector.load_supply_demand_index(days=3)
+            assert index == {"000660": (True, False), "005930": (False, True)}, index
+
+            # 데이터가 있는 거래일이 부족하면 None
+            assert collector.load_supply_demand_index(days=5) is None
+        finally:
+            config.PRICE_DB_PATH, config.NEWS_DB_PATH, stock.get_market_net_purchases_of_equities = saved
+            collector.price_store.conn.close()
+            collector.news_store.conn.close()
+    print("Supply/demand index uses the latest published trading days.")
+
+if __name__ == "__main__":
+    test_supply_index_skips_unpublished_days()
@@ -1,14 +1,90 @@
 import logging
+import logging.handlers
+import queue
+import atexit
 import time
 import random
+import re
+import os
+import json
+import math
+import threading
+import functools
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import config
 
 # 로깅 설정
-logging.basicConfig(
-    filename='stock_assistant.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    encoding='utf-8'
-)
+# 호출 스레드는 큐에 넣기만 하고, 파일 쓰기(회전 포함)는 백그라운드 리스너 스레드가 처리
+# 로그마다 실행 ID(run_id), 단계(stage), 종목(ticker) 필드를 함께 기록
+LOG_FORMAT = '%(asctime)s - %(levelname)s - [run=%(run_id)s stage=%(stage)s ticker=%(ticker)s] %(message)s'
+
+# 실행 단위 공통 로그 필드 (파이프라인이 set_log_context로 갱신)
+# 스레드마다 따로 보관하므로 동시에 도는 작업이 서로의 run_id/stage를 덮어쓰지 않음
+# 작업 스레드 풀에는 with_log_context로 감싸서 넘기면 호출한 쪽의 값을 이어받음
+_log_context = contextvars.ContextVar('log_context', default={'run_id': '-', 'stage': '-', 'ticker': '-'})
+_log_listener = None
+
+class _LogContextFilter(logging.Filter):
+    """
+    로그를 남기는 시점의 공통 필드를 레코드에 채웁니다. (extra로 직접 넘긴 값이 우선)
+    """
+    def filter(self, record):
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+def setup_logging(path=None):
+    """
+    큐 기반 비동기 로깅을 설정합니다. (여러 번 호출해도 한 번만 설정)
+    모듈을 import할 때는 설정하지 않으므로 실행 진입점(main/gui_main/scheduler)에서 호출합니다.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return _log_listener
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        path or config.LOG_PATH, maxBytes=config.LOG_MAX_BYTES, backupCount=config.LOG_BACKUP_COUNT, encoding='utf-8'
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue() # 크기 제한 없음 -> 로그 때문에 호출 스레드가 멈추지 않음
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(_LogContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(queue_handler)
+
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop) # 종료 시 남은 로그 기록
+    return _log_listener
+
+def set_log_context(**fields):
+    """
+    이후 로그에 붙일 공통 필드를 바꿉니다. 예: set_log_context(run_id=run_id, stage='fetch')
+    Returns: 바꾸기 전 값 (복원용)
+    """
+    context = _log_context.get()
+    previous = {key: context.get(key, '-') for key in fields}
+    _log_context.set({**context, **{key: '-' if value is None else value for key, value in fields.items()}})
+    return previous
+
+def with_log_context(func):
+    """
+    지금 스레드의 로그 필드를 이어받아 func를 실행하는 함수를 반환합니다. (스레드 풀 작업용)
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # 같은 Context를 여러 스레드가 동시에 쓸 수 없으므로 호출마다 복사본에서 실행
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
 
 def get_headers():
     """
@@ -21,14 +97,276 @@ def get_headers():
     ]
     return {'User-Agent': random.choice(user_agents)}
 
+def get_recommendation(score):
+    """
+    점수를 추천 강도 문자열로 변환합니다. (config의 기준 점수 사용)
+    """
+    if score >= config.STRONG_BUY_SCORE:
+        return "강력 추천"
+    elif score >= config.BUY_SCORE:
+        return "매수 추천"
+    elif score <= config.SELL_SCORE:
+        return "매도 경고"
+    return "관망"
+
 def random_sleep(min_seconds=0.5, max_seconds=1.5):
     """
     크롤링 속도 조절을 위한 랜덤 슬립
     """
     time.sleep(random.uniform(min_seconds, max_seconds))
 
-def log_error(message):
-    logging.error(message)
+def parse_news_time(text, now=None):
+    """
+    네이버 뉴스 시각 표시('5분 전', '3시간 전', '2일 전', '2024.01.02.')를 'YYYY-MM-DD HH:MM:SS'로 변환합니다.
+    시각 표시가 아니면 None
+    """
+    now = now or datetime.now()
+    text = text.strip()
+    match = re.fullmatch(r"(\d+)\s*(초|분|시간|일|주)\s*전", text)
+    if match:
+        units = {'초': 'seconds', '분': 'minutes', '시간': 'hours', '일': 'days', '주': 'weeks'}
+        published = now - timedelta(**{units[match.group(2)]: int(match.group(1))})
+        return published.strftime("%Y-%m-%d %H:%M:%S")
+    match = re.fullmatch(r"(\d{4})\.(\d{1,2})\.(\d{1,2})\.?", text)
+    if match:
+        try:
+            return datetime(*map(int, match.groups())).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return None
+    return None
+
+class RateLimiter:
+    """
+    토큰 버킷 방식의 호출 속도 제한기 (여러 스레드에서 공유 가능)
+    rate: 초당 허용 호출 수 (0 이하면 제한 없음), burst: 한 번에 몰아서 허용할 최대 호출 수
+    clock/sleep: 시각 함수와 대기 함수 (테스트에서 가짜 시계로 교체)
+    """
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1 - 1e-9: # 부동소수점 오차로 토큰이 1에 조금 못 미치는 경우 포함
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+class BatchBuffer:
+    """
+    항목을 모아서 flush(items)로 한 번에 넘기는 버퍼 (GUI 갱신 속도 제한용, 여러 스레드에서 공유 가능)
+    max_items개가 모이거나 마지막 전송 후 interval초가 지나면 전송합니다. 남은 항목은 flush()로 직접 전송.
+    """
+    def __init__(self, flush, max_items, interval):
+        self.on_flush = flush
+        self.max_items = max(1, max_items)
+        self.interval = interval
+        self.items = []
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add(self, item):
+        with self.lock:
+            self.items.append(item)
+            due = len(self.items) >= self.max_items or time.monotonic() - self.flushed_at >= self.interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            items, self.items = self.items, []
+            self.flushed_at = time.monotonic()
+        if items:
+            self.on_flush(items)
+
+# --- 계측 (스팬/카운터/지연 시간 히스토그램) ---
+
+# 지연 시간 히스토그램 구간 (초, Prometheus histogram의 le)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRICS_MAX_SAMPLES = 10000 # 백분위 계산용으로 보관할 최근 측정값 수 (이름별)
+
+class Metrics:
+    """
+    실행 중 계측값 모음 (여러 스레드에서 공유 가능).
+    - span(name) / timed(name): 구간 소요 시간을 이름별 히스토그램에 기록 (예외는 name.errors 카운터)
+    - count(name): HTTP 호출, 재시도, 캐시 적중 등의 카운터
+    summary()는 실행 종료 시 표, dump()는 JSON / Prometheus textfile을 만듭니다.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started = time.monotonic()
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        with self.lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = {
+                    'count': 0, 'sum': 0.0, 'min': math.inf, 'max': 0.0,
+                    'buckets': [0] * len(LATENCY_BUCKETS), 'samples': deque(maxlen=METRICS_MAX_SAMPLES)
+                }
+            hist['count'] += 1
+            hist['sum'] += seconds
+            hist['min'] = min(hist['min'], seconds)
+            hist['max'] = max(hist['max'], seconds)
+            hist['samples'].append(seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    hist['buckets'][i] += 1
+                    break
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.count(f"{name}.errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name=None):
+        """
+        함수 호출 시간을 기록하는 데코레이터 (이름 생략 시 모듈.함수명)
+        """
+        def decorator(func):
+            span_name = name or f"{func.__module__}.{func.__qualname__}"
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def rate(self, prefix):
+        """
+        prefix로 시작하는 카운터 합계의 초당 처리량 (예: rate('http.'))
+        """
+        with self.lock:
+            total = sum(value for name, value in self.counters.items() if name.startswith(prefix))
+        return total / max(self.elapsed(), 1e-9)
+
+    def snapshot(self):
+        """
+        JSON으로 저장 가능한 계측값 (히스토그램은 p50/p95 포함)
+        """
+        with self.lock:
+            histograms = {}
+            for name, hist in self.histograms.items():
+                samples = sorted(hist['samples'])
+                histograms[name] = {
+                    'count': hist['count'],
+                    'sum': hist['sum'],
+                    'min': hist['min'],
+                    'max': hist['max'],
+                    'p50': samples[int(0.50 * (len(samples) - 1))],
+                    'p95': samples[int(0.95 * (len(samples) - 1))],
+                    'buckets': dict(zip(map(str, LATENCY_BUCKETS), hist['buckets'])),
+                }
+            return {'elapsed': self.elapsed(), 'counters': dict(self.counters), 'histograms': histograms}
+
+    def summary(self):
+        """
+        실행 종료 시 출력할 표 (지연 시간 합계가 큰 순)
+        """
+        snapshot = self.snapshot()
+        lines = [f"{'span':<40} {'count':>7} {'total':>9} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}"]
+        for name, hist in sorted(snapshot['histograms'].items(), key=lambda item: -item[1]['sum']):
+            lines.append(
+                f"{name:<40} {hist['count']:>7} {hist['sum']:>8.2f}s {hist['sum'] / hist['count']:>7.3f}s "
+                f"{hist['p50']:>7.3f}s {hist['p95']:>7.3f}s {hist['max']:>7.3f}s"
+            )
+        if snapshot['counters']:
+            lines.append("")
+            lines.append(f"{'counter':<40} {'value':>7}")
+            for name, value in sorted(snapshot['counters'].items()):
+                lines.append(f"{name:<40} {value:>7}")
+        lines.append(f"(elapsed {snapshot['elapsed']:.2f}s, http {self.rate('http.'):.1f} req/s)")
+        return "\n".join(lines)
+
+    def to_prometheus(self, prefix="stock_assistant"):
+        """
+        Prometheus textfile 형식 (node_exporter textfile collector 용)
+        """
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_events_total counter"]
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f'{prefix}_events_total{{name="{name}"}} {value}')
+        lines.append(f"# TYPE {prefix}_latency_seconds histogram")
+        for name, hist in sorted(snapshot['histograms'].items()):
+            cumulative = 0
+            for bound, bucket_count in hist['buckets'].items():
+                cumulative += bucket_count
+                lines.append(f'{prefix}_latency_seconds_bucket{{name="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_latency_seconds_bucket{{name="{name}",le="+Inf"}} {hist["count"]}')
+            lines.append(f'{prefix}_latency_seconds_sum{{name="{name}"}} {hist["sum"]}')
+            lines.append(f'{prefix}_latency_seconds_count{{name="{name}"}} {hist["count"]}')
+        lines.append(f"# TYPE {prefix}_run_elapsed_seconds gauge")
+        lines.append(f"{prefix}_run_elapsed_seconds {snapshot['elapsed']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, json_path=None, prom_path=None):
+        """
+        계측값을 파일로 저장합니다. (경로가 None이면 생략)
+        """
+        try:
+            if json_path:
+                with open(json_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            if prom_path:
+                # 수집기가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+                tmp_path = prom_path + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(self.to_prometheus())
+                os.replace(tmp_path, prom_path)
+        except Exception as e:
+            log_error(f"Metrics Dump Error: {e}")
+
+# 프로그램 전체에서 공유하는 계측값
+metrics = Metrics()
+
+def span(name):
+    return metrics.span(name)
+
+def timed(name=None):
+    return metrics.timed(name)
+
+def count(name, n=1):
+    metrics.count(name, n)
+
+def log_error(message, **fields):
+    """
+    fields: 이 로그에만 붙일 필드 (예: ticker='005930')
+    """
+    logging.error(message, extra=fields)
+
+def log_info(message, **fields):
+    logging.info(message, extra=fields)
 
-def log_info(message):
-    logging.info(message)
+def log_warning(message, **fields):
+    logging.warning(message, extra=fields)